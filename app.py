@@ -4,8 +4,45 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import uuid
+import atexit
 from typing import Dict, List
 import json
+import os
+import tempfile
+import time
+
+from cdrive.aggregates import compute_dashboard_metrics
+from cdrive.catalog import (
+    CASE_STEPS, COVERAGE_TYPES, DEDUCTIBLE_AMOUNTS, DRIVER_AGES, EXECUTIVES, FUEL_TYPES, MAX_VEHICLE_VALUE,
+    MIN_VEHICLE_VALUE, NCB_SLABS, POLICY_DURATIONS, VEHICLE_TYPES, VEHICLE_YEAR_SPAN
+)
+from cdrive.documents import DEFAULT_DOCUMENT_DIR, VERIFICATION_ITEMS, DocumentStore, required_documents
+from cdrive.export import EXPORT_FORMATS, iter_case_chunks, write_export
+from cdrive.followups import FOLLOWUP_KINDS, UPCOMING_DAYS, FollowUpScheduler, task_cursor
+from cdrive.leaderboard import LOWER_IS_BETTER, METRICS, ExecutiveStats
+from cdrive.importer import DEFAULT_CHUNK_SIZE, detect_format, import_cases
+from cdrive.indexes import FilterIndex
+from cdrive.issuance import (
+    ISSUED_STATUS, file_policy_documents, issue_batch, next_policy_number, policy_file_names, policy_terms,
+    render_insurance_card, render_policy_pdf
+)
+from cdrive.payments import COMPLETED, FAILED, PAYMENT_METHODS, FakeGateway, PaymentProcessor
+from cdrive.plans import case_plan_name, plan_selection
+from cdrive.pricing import PremiumEngine, depreciation_percent, idv_range, suggested_idv
+from cdrive.quote_cache import QuoteCache
+from cdrive.renewals import (
+    RENEWAL_REMINDER_DAYS, RENEWAL_WINDOWS, RenewalBook, policy_expiry_date, renewal_quotes
+)
+from cdrive.rollups import CaseRollups
+from cdrive.samples import seed_sample_data
+from cdrive.sequences import SequenceAllocator
+from cdrive.store import (
+    DEFAULT_DB_PATH, MIN_SEARCH_LENGTH, SQLiteCaseStore,
+    normalize_search_text, page_cursor
+)
+from cdrive.telemetry import COMPLETED_STEP, StepTelemetry
+from cdrive.validation import CUSTOMER_REQUIRED_FIELDS, VEHICLE_REQUIRED_FIELDS, missing_fields
+from cdrive.vehicles import vehicle_master
 
 # Configure page
 st.set_page_config(
@@ -16,359 +53,115 @@ st.set_page_config(
 )
 
 # Custom CSS for modern, mobile-responsive design
-st.markdown("""
-<style>
-    /* Modern color scheme */
-    :root {
-        --primary-color: #2E86AB;
-        --secondary-color: #A23B72;
-        --accent-color: #F18F01;
-        --success-color: #C73E1D;
-        --background-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        --card-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Hide default Streamlit styling */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Main container styling */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        max-width: 1200px;
-    }
-    
-    /* Header styling */
-    .app-header {
-        background: var(--background-gradient);
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        box-shadow: var(--card-shadow);
-        color: white;
-        text-align: center;
-    }
-    
-    /* Card styling */
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: var(--card-shadow);
-        margin: 0.5rem 0;
-        border-left: 4px solid var(--primary-color);
-        transition: transform 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
-    }
-    
-    /* Status badges */
-    .status-badge {
-        display: inline-block;
-        padding: 0.25rem 0.75rem;
-        border-radius: 50px;
-        font-size: 0.8rem;
-        font-weight: bold;
-        text-align: center;
-        margin: 0.25rem;
-    }
-    
-    .status-new { background-color: #e3f2fd; color: #1976d2; }
-    .status-quote { background-color: #fff3e0; color: #f57c00; }
-    .status-policy { background-color: #e8f5e8; color: #388e3c; }
-    .status-closed { background-color: #fce4ec; color: #c2185b; }
-    
-    /* Step indicator */
-    .step-indicator {
-        display: flex;
-        justify-content: space-between;
-        margin: 2rem 0;
-        flex-wrap: wrap;
-    }
-    
-    .step {
-        flex: 1;
-        text-align: center;
-        padding: 1rem 0.5rem;
-        position: relative;
-        min-width: 100px;
-    }
-    
-    .step.active {
-        color: var(--primary-color);
-        font-weight: bold;
-    }
-    
-    .step.completed {
-        color: var(--success-color);
-    }
-    
-    .step::after {
-        content: '';
-        position: absolute;
-        top: 50%;
-        right: -50%;
-        width: 100%;
-        height: 2px;
-        background: #e0e0e0;
-        z-index: -1;
-    }
-    
-    .step:last-child::after {
-        display: none;
-    }
-    
-    .step.completed::after {
-        background: var(--success-color);
-    }
-    
-    /* Mobile responsiveness */
-    @media (max-width: 768px) {
-        .main .block-container {
-            padding: 1rem;
-        }
-        
-        .step-indicator {
-            flex-direction: column;
-        }
-        
-        .step::after {
-            display: none;
-        }
-        
-        .metric-card {
-            margin: 0.25rem 0;
-            padding: 1rem;
-        }
-    }
-    
-    /* Form styling */
-    .stSelectbox > div > div {
-        background-color: white;
-        border: 1px solid #e0e0e0;
-        border-radius: 5px;
-    }
-    
-    .stTextInput > div > div > input {
-        border: 1px solid #e0e0e0;
-        border-radius: 5px;
-        padding: 0.5rem;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: var(--background-gradient);
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 0.75rem 2rem;
-        font-weight: bold;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_css():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'style.css'), encoding='utf-8') as css:
+        return css.read()
+
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
+
+# Shared case store (one per server process, shared by every session).
+# The watcher picks up cases written by other server processes.
+@st.cache_resource
+def get_case_store():
+    store = SQLiteCaseStore(DEFAULT_DB_PATH)
+    store.start_change_watcher()
+    return store
+
+@st.cache_resource
+def get_premium_engine():
+    return PremiumEngine()
+
+@st.cache_resource
+def get_quote_cache():
+    return QuoteCache(get_premium_engine())
+
+@st.cache_resource
+def get_filter_index():
+    return FilterIndex(get_case_store())
+
+@st.cache_resource
+def get_renewal_book():
+    return RenewalBook(get_case_store())
+
+@st.cache_resource
+def get_document_store():
+    return DocumentStore(DEFAULT_DOCUMENT_DIR, DEFAULT_DB_PATH)
+
+@st.cache_resource
+def get_payment_processor():
+    return PaymentProcessor(FakeGateway())
+
+@st.cache_resource
+def get_sequence_allocator():
+    return SequenceAllocator(DEFAULT_DB_PATH)
+
+# Wizard step events, buffered and written in batches by a background thread
+@st.cache_resource
+def get_step_telemetry():
+    telemetry = StepTelemetry(DEFAULT_DB_PATH)
+    telemetry.start_flusher()
+    atexit.register(telemetry.close)
+    return telemetry
+
+# Per-executive counters behind the leaderboards; needs the case and follow-up tables
+@st.cache_resource
+def get_executive_stats():
+    get_case_store()
+    get_followup_scheduler()
+    return ExecutiveStats(DEFAULT_DB_PATH)
+
+# Daily rollups behind the analytics reports; the store creates the cases table first
+@st.cache_resource
+def get_case_rollups():
+    get_case_store()
+    return CaseRollups(DEFAULT_DB_PATH)
+
+@st.cache_resource
+def get_followup_scheduler():
+    scheduler = FollowUpScheduler(DEFAULT_DB_PATH)
+    scheduler.start_overdue_worker()
+    return scheduler
+
+# Dashboard aggregates, recomputed only when the store version changes
+@st.cache_data(max_entries=2, show_spinner=False)
+def get_dashboard_metrics(store_version):
+    return compute_dashboard_metrics(get_case_store())
+
+# Analytics report periods, in days back from today (None for all time)
+ANALYTICS_PERIODS = {"Last 30 Days": 30, "Last 90 Days": 90, "Last 365 Days": 365, "All Time": None}
+ANALYTICS_DIMENSIONS = {
+    "Vehicle Make": 'vehicle_make',
+    "Fuel Type": 'fuel_type',
+    "Coverage Type": 'coverage_type',
+    "Executive": 'assigned_to',
+    "Status": 'status',
+}
+
+# Manage Cases pagination
+CASE_PAGE_SIZES = [10, 25, 50, 100]
+DEFAULT_CASE_PAGE_SIZE = 25
+FOLLOWUP_PAGE_SIZE = 25
+
+# Executives charted on the Team Analytics page
+TEAM_CHART_SIZE = 15
 
 # Initialize session state
-if 'cases' not in st.session_state:
-    st.session_state.cases = []
 if 'current_user_role' not in st.session_state:
     st.session_state.current_user_role = 'Admin'
 if 'current_case' not in st.session_state:
     st.session_state.current_case = {}
+    st.session_state.saved_uploads = {}
 if 'case_step' not in st.session_state:
     st.session_state.case_step = 1
-
-# Indian Car Make and Model Data
-CAR_DATA = {
-    'Maruti Suzuki': [
-        'Swift', 'Baleno', 'Alto K10', 'WagonR', 'Dzire', 'Brezza', 'Victoris', 
-        'Ertiga', 'S-Presso', 'Celerio', 'Fronx', 'Grand Vitara', 'XL6', 
-        'Ignis', 'Jimny', 'Invicto', 'Ciaz', 'Eeco'
-    ],
-    'Hyundai': [
-        'Creta', 'Venue', 'Exter', 'Grand i10 Nios', 'i20', 'Aura', 'Verna', 
-        'Alcazar', 'Creta Electric', 'i20 N Line', 'Creta N Line', 'Tucson', 
-        'Venue N Line', 'Ioniq 5'
-    ],
-    'Tata': [
-        'Nexon', 'Punch', 'Tiago', 'Altroz', 'Harrier', 'Curvv', 'Safari', 
-        'Punch EV', 'Nexon EV', 'Harrier EV', 'Tiago EV', 'Tigor', 
-        'Curvv EV', 'Tiago NRG', 'Tigor EV'
-    ],
-    'Mahindra': [
-        'XUV700', 'Thar', 'Scorpio N', 'Scorpio Classic', 'XUV400', 'Bolero', 
-        'Bolero Neo', 'XUV 3XO', 'BE 6e', 'XEV 9e', 'Marazzo'
-    ],
-    'Kia': [
-        'Seltos', 'Sonet', 'Carens', 'EV6', 'EV9', 'Syros', 'Carens Clavis EV'
-    ],
-    'Honda': [
-        'City', 'Amaze', 'City Hybrid', 'Elevate', 'CR-V'
-    ],
-    'Toyota': [
-        'Innova Crysta', 'Fortuner', 'Urban Cruiser Hyryder', 'Glanza', 
-        'Rumion', 'Land Cruiser', 'Hilux', 'Camry', 'Vellfire'
-    ],
-    'MG': [
-        'Hector', 'Astor', 'ZS EV', 'Comet EV', 'Windsor EV', 'Hector Plus',
-        'Gloster'
-    ],
-    'Skoda': [
-        'Kushaq', 'Slavia', 'Kodiaq', 'Superb', 'Octavia'
-    ],
-    'Volkswagen': [
-        'Taigun', 'Virtus', 'Tiguan', 'T-Roc'
-    ],
-    'Nissan': [
-        'Magnite', 'X-Trail'
-    ],
-    'Renault': [
-        'Kiger', 'Triber', 'Kwid'
-    ],
-    'Jeep': [
-        'Compass', 'Meridian', 'Avenger'
-    ],
-    'Citroen': [
-        'C3', 'C5 Aircross', 'C3 Aircross', 'eC3'
-    ],
-    'BYD': [
-        'Atto 3', 'Seal'
-    ]
-}
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Vehicle Insurance Sample Data
 def load_sample_data():
-    if not st.session_state.cases:
-        sample_cases = [
-            {
-                'id': str(uuid.uuid4()),
-                'customer_name': 'Rajesh Kumar',
-                'customer_phone': '+91-9876543210',
-                'customer_email': 'rajesh.kumar@email.com',
-                'vehicle_make': 'Maruti Suzuki',
-                'vehicle_model': 'Swift',
-                'vehicle_variant': 'VXi',
-                'vehicle_year': 2020,
-                'registration_number': 'MH12AB1234',
-                'vehicle_type': 'Hatchback',
-                'fuel_type': 'Petrol',
-                'engine_capacity': '1197cc',
-                'vehicle_value': 800000,
-                'coverage_type': 'Comprehensive',
-                'premium_amount': 15000,
-                'status': 'Policy Issued',
-                'created_date': datetime.now() - timedelta(days=15),
-                'assigned_to': 'Priya Sharma',
-                'follow_up_date': datetime.now() + timedelta(days=330),
-                'policy_number': 'VEH-2024-001',
-                'documents': ['RC Copy', 'Driving License', 'Previous Policy', 'Photos'],
-                'step': 9
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'customer_name': 'Anita Desai',
-                'customer_phone': '+91-9876543211',
-                'customer_email': 'anita.desai@email.com',
-                'vehicle_make': 'Hyundai',
-                'vehicle_model': 'Creta',
-                'vehicle_variant': 'SX',
-                'vehicle_year': 2023,
-                'registration_number': 'DL08CB5678',
-                'vehicle_type': 'SUV',
-                'fuel_type': 'Diesel',
-                'engine_capacity': '1493cc',
-                'vehicle_value': 1500000,
-                'coverage_type': 'Comprehensive',
-                'premium_amount': 22000,
-                'status': 'Quote Generated',
-                'created_date': datetime.now() - timedelta(days=5),
-                'assigned_to': 'Amit Singh',
-                'follow_up_date': datetime.now() + timedelta(days=3),
-                'documents': ['RC Copy', 'Driving License'],
-                'step': 4
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'customer_name': 'Mohammed Ali',
-                'customer_phone': '+91-9876543212',
-                'customer_email': 'mohammed.ali@email.com',
-                'vehicle_make': 'Tata',
-                'vehicle_model': 'Nexon',
-                'vehicle_variant': 'XZ Plus',
-                'vehicle_year': 2022,
-                'registration_number': 'KA03MN9012',
-                'vehicle_type': 'SUV',
-                'fuel_type': 'Electric',
-                'engine_capacity': 'Electric',
-                'vehicle_value': 1200000,
-                'coverage_type': 'Comprehensive',
-                'premium_amount': 18000,
-                'status': 'Documentation Pending',
-                'created_date': datetime.now() - timedelta(days=2),
-                'assigned_to': 'Sneha Patel',
-                'follow_up_date': datetime.now() + timedelta(days=1),
-                'documents': ['RC Copy', 'Driving License'],
-                'step': 5
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'customer_name': 'Lakshmi Nair',
-                'customer_phone': '+91-9876543213',
-                'customer_email': 'lakshmi.nair@email.com',
-                'vehicle_make': 'Mahindra',
-                'vehicle_model': 'XUV700',
-                'vehicle_variant': 'AX7',
-                'vehicle_year': 2024,
-                'registration_number': 'TN22PQ3456',
-                'vehicle_type': 'SUV',
-                'fuel_type': 'Petrol',
-                'engine_capacity': '1998cc',
-                'vehicle_value': 2200000,
-                'coverage_type': 'Comprehensive',
-                'premium_amount': 28000,
-                'status': 'New Lead',
-                'created_date': datetime.now() - timedelta(days=1),
-                'assigned_to': 'Rahul Verma',
-                'follow_up_date': datetime.now() + timedelta(days=2),
-                'documents': [],
-                'step': 1
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'customer_name': 'Suresh Reddy',
-                'customer_phone': '+91-9876543214',
-                'customer_email': 'suresh.reddy@email.com',
-                'vehicle_make': 'Honda',
-                'vehicle_model': 'City',
-                'vehicle_variant': 'V',
-                'vehicle_year': 2019,
-                'registration_number': 'AP09RS7890',
-                'vehicle_type': 'Sedan',
-                'fuel_type': 'Petrol',
-                'engine_capacity': '1498cc',
-                'vehicle_value': 900000,
-                'coverage_type': 'Third Party',
-                'premium_amount': 8000,
-                'status': 'Policy Expired',
-                'created_date': datetime.now() - timedelta(days=30),
-                'assigned_to': 'Neha Gupta',
-                'follow_up_date': None,
-                'policy_number': 'VEH-2023-045',
-                'documents': ['RC Copy', 'Driving License', 'Previous Policy', 'Photos'],
-                'step': 9
-            }
-        ]
-        st.session_state.cases.extend(sample_cases)
+    store = get_case_store()
+    if store.count() == 0:
+        seed_sample_data(store, get_followup_scheduler())
 
 # Load sample data
 load_sample_data()
@@ -403,7 +196,9 @@ with st.sidebar:
             "📋 Manage Cases", 
             "👥 User Management",
             "🔄 Renewal Management",
-            "📈 Analytics & Reports"
+            "📈 Analytics & Reports",
+            "📥 Bulk Import",
+            "🏭 Batch Issuance"
         ]
     elif st.session_state.current_user_role == 'Team Lead':
         menu_options = [
@@ -428,15 +223,17 @@ with st.sidebar:
 def render_dashboard():
     st.markdown("## 🚗 Vehicle Insurance Dashboard")
     
+    metrics = get_dashboard_metrics(get_case_store().version())
+    
     # Key metrics
-    total_cases = len(st.session_state.cases)
-    active_cases = len([c for c in st.session_state.cases if c['status'] not in ['Policy Expired', 'Policy Issued']])
-    total_premium = sum([c['premium_amount'] for c in st.session_state.cases])
-    avg_case_value = total_premium / total_cases if total_cases > 0 else 0
+    total_cases = metrics['total_cases']
+    active_cases = metrics['active_cases']
+    total_premium = metrics['total_premium']
+    avg_case_value = metrics['avg_case_value']
     
     # Vehicle Insurance specific metrics
-    comprehensive_policies = len([c for c in st.session_state.cases if c.get('coverage_type') == 'Comprehensive'])
-    total_vehicle_value = sum([c.get('vehicle_value', 0) for c in st.session_state.cases])
+    comprehensive_policies = metrics['comprehensive_policies']
+    total_vehicle_value = metrics['total_vehicle_value']
     
     # Metrics cards
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -488,18 +285,18 @@ def render_dashboard():
     
     with col1:
         st.markdown("### 📊 Policies by Status")
-        if st.session_state.cases:
-            status_counts = pd.DataFrame(st.session_state.cases)['status'].value_counts()
-            fig = px.pie(values=status_counts.values, names=status_counts.index, 
+        if total_cases:
+            status_counts = metrics['status_counts']
+            fig = px.pie(values=list(status_counts.values()), names=list(status_counts), 
                         color_discrete_sequence=['#2E86AB', '#A23B72', '#F18F01', '#C73E1D'])
             fig.update_layout(showlegend=True, height=300)
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### 🚗 Vehicle Brands")
-        if st.session_state.cases:
-            brand_counts = pd.DataFrame(st.session_state.cases)['vehicle_make'].value_counts()
-            fig = px.bar(x=brand_counts.index, y=brand_counts.values,
+        if total_cases:
+            brand_counts = metrics['make_counts']
+            fig = px.bar(x=list(brand_counts), y=list(brand_counts.values()),
                         color_discrete_sequence=['#667eea'])
             fig.update_layout(showlegend=False, height=300, xaxis_title="Vehicle Brand", yaxis_title="Count")
             st.plotly_chart(fig, use_container_width=True)
@@ -509,26 +306,26 @@ def render_dashboard():
     
     with col1:
         st.markdown("### 🚙 Vehicle Types")
-        if st.session_state.cases:
-            type_counts = pd.DataFrame(st.session_state.cases)['vehicle_type'].value_counts()
-            fig = px.pie(values=type_counts.values, names=type_counts.index,
+        if total_cases:
+            type_counts = metrics['vehicle_type_counts']
+            fig = px.pie(values=list(type_counts.values()), names=list(type_counts),
                         color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4'])
             fig.update_layout(showlegend=True, height=300)
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### ⛽ Fuel Types")
-        if st.session_state.cases:
-            fuel_counts = pd.DataFrame(st.session_state.cases)['fuel_type'].value_counts()
-            fig = px.bar(x=fuel_counts.index, y=fuel_counts.values,
+        if total_cases:
+            fuel_counts = metrics['fuel_type_counts']
+            fig = px.bar(x=list(fuel_counts), y=list(fuel_counts.values()),
                         color_discrete_sequence=['#FF9F43'])
             fig.update_layout(showlegend=False, height=300, xaxis_title="Fuel Type", yaxis_title="Count")
             st.plotly_chart(fig, use_container_width=True)
     
     # Recent cases table
     st.markdown("### 📋 Recent Vehicle Insurance Cases")
-    if st.session_state.cases:
-        recent_cases = sorted(st.session_state.cases, key=lambda x: x['created_date'], reverse=True)[:5]
+    if total_cases:
+        recent_cases = metrics['recent_cases']
         
         for case in recent_cases:
             status_class = {
@@ -557,26 +354,26 @@ def render_dashboard():
             </div>
             """, unsafe_allow_html=True)
 
+def go_to_step(step):
+    # Move the case wizard to ``step``, logging the move for the funnel reports
+    case_id = st.session_state.current_case.setdefault('id', str(uuid.uuid4()))
+    get_step_telemetry().record(case_id, st.session_state.session_id, st.session_state.case_step, step)
+    st.session_state.case_step = step
+
 def render_case_creation():
     st.markdown("## ➕ Create New Vehicle Insurance Case")
     
-    # Case creation steps
-    steps = [
-        "Customer Details",
-        "Vehicle Details", 
-        "Coverage Options",
-        "Quote Generation",
-        "Documentation",
-        "Policy Finalization",
-        "Payment Processing", 
-        "Policy Issuance",
-        "Follow-up Setup"
-    ]
+    # A new case gets its id, and its first step event, when the wizard opens it
+    if 'id' not in st.session_state.current_case:
+        case_id = st.session_state.current_case['id'] = str(uuid.uuid4())
+        # Days to issue are measured from here, not from when step 9 saves the case
+        st.session_state.current_case['created_date'] = datetime.now()
+        get_step_telemetry().record(case_id, st.session_state.session_id, None, st.session_state.case_step)
     
     # Step indicator
     st.markdown(f"""
     <div class="step-indicator">
-        {" ".join([f'<div class="step {"active" if i+1 == st.session_state.case_step else "completed" if i+1 < st.session_state.case_step else ""}"><span>{i+1}</span><br><small>{step}</small></div>' for i, step in enumerate(steps)])}
+        {" ".join([f'<div class="step {"active" if i+1 == st.session_state.case_step else "completed" if i+1 < st.session_state.case_step else ""}"><span>{i+1}</span><br><small>{step}</small></div>' for i, step in enumerate(CASE_STEPS)])}
     </div>
     """, unsafe_allow_html=True)
     
@@ -625,16 +422,17 @@ def render_customer_details_step():
     col1, col2 = st.columns([3, 1])
     with col2:
         if st.button("Next Step →", key='step1_next'):
-            if customer_name and customer_phone and customer_email:
-                st.session_state.current_case.update({
-                    'customer_name': customer_name,
-                    'customer_phone': customer_phone,
-                    'customer_email': customer_email,
-                    'customer_dob': customer_dob,
-                    'customer_occupation': customer_occupation,
-                    'customer_address': customer_address
-                })
-                st.session_state.case_step = 2
+            customer_data = {
+                'customer_name': customer_name,
+                'customer_phone': customer_phone,
+                'customer_email': customer_email,
+                'customer_dob': customer_dob,
+                'customer_occupation': customer_occupation,
+                'customer_address': customer_address
+            }
+            if not missing_fields(customer_data, CUSTOMER_REQUIRED_FIELDS):
+                st.session_state.current_case.update(customer_data)
+                go_to_step(2)
                 st.rerun()
             else:
                 st.error("Please fill in all required fields (*)")
@@ -644,36 +442,53 @@ def render_insurance_type_step():
     
     col1, col2 = st.columns(2)
     
+    case = st.session_state.current_case
+    master = vehicle_master()
+    
     with col1:
         # Vehicle Make
+        makes = master.makes()
         vehicle_make = st.selectbox(
             "Vehicle Make *",
-            list(CAR_DATA.keys()),
-            index=list(CAR_DATA.keys()).index(st.session_state.current_case.get('vehicle_make', list(CAR_DATA.keys())[0]))
+            makes,
+            index=master.position(case.get('vehicle_make')) or 0
         )
         
         # Vehicle Model (depends on make)
-        available_models = CAR_DATA.get(vehicle_make, [])
+        available_models = master.models(vehicle_make)
         vehicle_model = st.selectbox(
             "Vehicle Model *",
             available_models,
-            index=available_models.index(st.session_state.current_case.get('vehicle_model', available_models[0])) if st.session_state.current_case.get('vehicle_model') in available_models else 0
+            index=master.position(vehicle_make, case.get('vehicle_model')) or 0
         )
         
-        # Vehicle Variant
-        variants = ["Base", "Mid", "Top", "LXi", "VXi", "ZXi", "S", "SX", "SX(O)", "E", "S+", "XE", "XM", "XT", "XZ", "XZ+"]
+        # Vehicle Variant (depends on model); keep a saved variant that is not in the catalog
+        variants = list(master.variants(vehicle_make, vehicle_model))
+        saved_vehicle = (case.get('vehicle_make'), case.get('vehicle_model'))
+        if saved_vehicle == (vehicle_make, vehicle_model) and case.get('vehicle_variant') and case['vehicle_variant'] not in variants:
+            variants.append(case['vehicle_variant'])
         vehicle_variant = st.selectbox(
             "Vehicle Variant",
             variants,
-            index=variants.index(st.session_state.current_case.get('vehicle_variant', 'S')) if st.session_state.current_case.get('vehicle_variant') in variants else 0
+            index=variants.index(case['vehicle_variant']) if case.get('vehicle_variant') in variants else 0
         )
         
+        # Fill type, fuel, engine and value from the catalog unless this is the vehicle already saved;
+        # the widgets are keyed by the selection so they reset when it changes
+        spec = master.spec(vehicle_make, vehicle_model, vehicle_variant)
+        defaults = case
+        if spec and saved_vehicle + (case.get('vehicle_variant'),) != (vehicle_make, vehicle_model, vehicle_variant):
+            defaults = {**case, **spec.case_fields()}
+        selection_key = f"{vehicle_make}|{vehicle_model}|{vehicle_variant}"
+        if spec:
+            st.caption(f"Ex-showroom ₹{spec.ex_showroom_price:,} · vehicle master {master.version}")
+        
         # Manufacturing Year
         current_year = datetime.now().year
         vehicle_year = st.selectbox(
             "Manufacturing Year *",
-            list(range(current_year, current_year - 25, -1)),
-            index=list(range(current_year, current_year - 25, -1)).index(st.session_state.current_case.get('vehicle_year', current_year - 2)) if st.session_state.current_case.get('vehicle_year') in list(range(current_year, current_year - 25, -1)) else 2
+            list(range(current_year, current_year - VEHICLE_YEAR_SPAN, -1)),
+            index=list(range(current_year, current_year - VEHICLE_YEAR_SPAN, -1)).index(st.session_state.current_case.get('vehicle_year', current_year - 2)) if st.session_state.current_case.get('vehicle_year') in list(range(current_year, current_year - VEHICLE_YEAR_SPAN, -1)) else 2
         )
         
         # Registration Number
@@ -685,38 +500,50 @@ def render_insurance_type_step():
     
     with col2:
         # Vehicle Type
-        vehicle_types = ["Hatchback", "Sedan", "SUV", "MUV/MPV", "Coupe", "Convertible", "Pickup Truck", "Van"]
+        vehicle_types = VEHICLE_TYPES
         vehicle_type = st.selectbox(
             "Vehicle Type *",
             vehicle_types,
-            index=vehicle_types.index(st.session_state.current_case.get('vehicle_type', 'Hatchback')) if st.session_state.current_case.get('vehicle_type') in vehicle_types else 0
+            index=vehicle_types.index(defaults['vehicle_type']) if defaults.get('vehicle_type') in vehicle_types else 0,
+            key=f"vehicle_type_{selection_key}"
         )
         
         # Fuel Type  
-        fuel_types = ["Petrol", "Diesel", "CNG", "Electric", "Hybrid", "LPG"]
+        fuel_types = FUEL_TYPES
         fuel_type = st.selectbox(
             "Fuel Type *",
             fuel_types,
-            index=fuel_types.index(st.session_state.current_case.get('fuel_type', 'Petrol')) if st.session_state.current_case.get('fuel_type') in fuel_types else 0
+            index=fuel_types.index(defaults['fuel_type']) if defaults.get('fuel_type') in fuel_types else 0,
+            key=f"fuel_type_{selection_key}"
         )
         
         # Engine Capacity
         if fuel_type == "Electric":
-            engine_capacity = st.selectbox("Power", ["Electric", "50kW", "100kW", "150kW", "200kW+"])
+            power_options = ["Electric", "50kW", "100kW", "150kW", "200kW+"]
+            if str(defaults.get('engine_capacity', '')).endswith('kW') and defaults['engine_capacity'] not in power_options:
+                power_options.insert(1, defaults['engine_capacity'])
+            engine_capacity = st.selectbox(
+                "Power",
+                power_options,
+                index=power_options.index(defaults['engine_capacity']) if defaults.get('engine_capacity') in power_options else 0,
+                key=f"power_{selection_key}"
+            )
         else:
             engine_capacity = st.text_input(
                 "Engine Capacity",
-                value=st.session_state.current_case.get('engine_capacity', ''),
-                placeholder="e.g. 1197cc"
+                value=defaults.get('engine_capacity', ''),
+                placeholder="e.g. 1197cc",
+                key=f"engine_capacity_{selection_key}"
             )
         
         # Vehicle Value
         vehicle_value = st.number_input(
             "Current Vehicle Value (₹) *",
-            min_value=50000,
-            max_value=50000000,
-            value=st.session_state.current_case.get('vehicle_value', 500000),
-            step=25000
+            min_value=MIN_VEHICLE_VALUE,
+            max_value=MAX_VEHICLE_VALUE,
+            value=min(max(defaults.get('vehicle_value', 500000), MIN_VEHICLE_VALUE), MAX_VEHICLE_VALUE),
+            step=25000,
+            key=f"vehicle_value_{selection_key}"
         )
         
         # RTO Location
@@ -747,34 +574,35 @@ def render_insurance_type_step():
         if has_previous_insurance:
             ncb_percentage = st.selectbox(
                 "No Claim Bonus (%)",
-                [0, 20, 25, 35, 45, 50],
-                index=[0, 20, 25, 35, 45, 50].index(st.session_state.current_case.get('ncb_percentage', 0))
+                NCB_SLABS,
+                index=NCB_SLABS.index(st.session_state.current_case.get('ncb_percentage', 0))
             )
     
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step2_prev'):
-            st.session_state.case_step = 1
+            go_to_step(1)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step2_next'):
-            if vehicle_make and vehicle_model and vehicle_year and registration_number and vehicle_value:
-                st.session_state.current_case.update({
-                    'vehicle_make': vehicle_make,
-                    'vehicle_model': vehicle_model,
-                    'vehicle_variant': vehicle_variant,
-                    'vehicle_year': vehicle_year,
-                    'registration_number': registration_number.upper(),
-                    'vehicle_type': vehicle_type,
-                    'fuel_type': fuel_type,
-                    'engine_capacity': engine_capacity,
-                    'vehicle_value': vehicle_value,
-                    'rto_location': rto_location,
-                    'has_previous_insurance': has_previous_insurance,
-                    'previous_insurer': previous_insurer if has_previous_insurance else '',
-                    'ncb_percentage': ncb_percentage if has_previous_insurance else 0
-                })
-                st.session_state.case_step = 3
+            vehicle_data = {
+                'vehicle_make': vehicle_make,
+                'vehicle_model': vehicle_model,
+                'vehicle_variant': vehicle_variant,
+                'vehicle_year': vehicle_year,
+                'registration_number': registration_number.upper(),
+                'vehicle_type': vehicle_type,
+                'fuel_type': fuel_type,
+                'engine_capacity': engine_capacity,
+                'vehicle_value': vehicle_value,
+                'rto_location': rto_location,
+                'has_previous_insurance': has_previous_insurance,
+                'previous_insurer': previous_insurer if has_previous_insurance else '',
+                'ncb_percentage': ncb_percentage if has_previous_insurance else 0
+            }
+            if not missing_fields(vehicle_data, VEHICLE_REQUIRED_FIELDS):
+                st.session_state.current_case.update(vehicle_data)
+                go_to_step(3)
                 st.rerun()
             else:
                 st.error("Please fill in all required fields (*)")
@@ -786,7 +614,7 @@ def render_coverage_requirements_step():
     
     with col1:
         # Coverage Type
-        coverage_types = ["Third Party", "Comprehensive"]
+        coverage_types = COVERAGE_TYPES
         coverage_type = st.selectbox(
             "Coverage Type *",
             coverage_types,
@@ -800,11 +628,10 @@ def render_coverage_requirements_step():
         
         # Deductible (only for comprehensive)
         if coverage_type == "Comprehensive":
-            deductible_amounts = [0, 1000, 2500, 5000, 7500, 10000, 15000]
             deductible = st.selectbox(
                 "Voluntary Deductible (₹)",
-                deductible_amounts,
-                index=deductible_amounts.index(st.session_state.current_case.get('deductible', 0))
+                DEDUCTIBLE_AMOUNTS,
+                index=DEDUCTIBLE_AMOUNTS.index(st.session_state.current_case.get('deductible', 0))
             )
             st.info("Higher deductible = Lower premium")
         else:
@@ -812,11 +639,10 @@ def render_coverage_requirements_step():
     
     with col2:
         # Policy Duration
-        policy_durations = ["1 Year", "2 Years", "3 Years"]
         policy_duration = st.selectbox(
             "Policy Duration *",
-            policy_durations,
-            index=policy_durations.index(st.session_state.current_case.get('policy_duration', '1 Year'))
+            POLICY_DURATIONS,
+            index=POLICY_DURATIONS.index(st.session_state.current_case.get('policy_duration', '1 Year'))
         )
         
         # IDV (Insured Declared Value) - Auto calculated but can be adjusted
@@ -826,15 +652,15 @@ def render_coverage_requirements_step():
         # Calculate depreciation-adjusted IDV
         current_year = datetime.now().year
         age = current_year - vehicle_year
-        depreciation_rates = {0: 0, 1: 5, 2: 10, 3: 15, 4: 20, 5: 25}
-        depreciation = depreciation_rates.get(age, 30 + (age - 5) * 5)  # 5% additional per year after 5 years
-        suggested_idv = vehicle_value * (100 - depreciation) / 100
+        depreciation = depreciation_percent(age)
+        offered_idv = suggested_idv(vehicle_value, vehicle_year, current_year)
+        min_idv, max_idv = idv_range(offered_idv)
         
         idv = st.number_input(
             f"IDV - Insured Declared Value (₹)",
-            min_value=int(suggested_idv * 0.8),
-            max_value=int(suggested_idv * 1.2),
-            value=int(suggested_idv),
+            min_value=min_idv,
+            max_value=max_idv,
+            value=int(offered_idv),
             step=5000,
             help=f"Suggested IDV based on {age} year old vehicle with {depreciation}% depreciation"
         )
@@ -891,8 +717,8 @@ def render_coverage_requirements_step():
     with col1:
         driver_age = st.selectbox(
             "Primary Driver Age",
-            ["18-25 years", "26-35 years", "36-50 years", "50+ years"],
-            index=["18-25 years", "26-35 years", "36-50 years", "50+ years"].index(st.session_state.current_case.get('driver_age', '26-35 years'))
+            DRIVER_AGES,
+            index=DRIVER_AGES.index(st.session_state.current_case.get('driver_age', '26-35 years'))
         )
     
     with col2:
@@ -911,7 +737,7 @@ def render_coverage_requirements_step():
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step3_prev'):
-            st.session_state.case_step = 2
+            go_to_step(2)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step3_next'):
@@ -936,7 +762,7 @@ def render_coverage_requirements_step():
                 })
             
             st.session_state.current_case.update(coverage_data)
-            st.session_state.case_step = 4
+            go_to_step(4)
             st.rerun()
 
 def render_quote_generation_step():
@@ -945,150 +771,12 @@ def render_quote_generation_step():
     # Get current case data
     case = st.session_state.current_case
     idv = case.get('idv', 500000)
-    coverage_type = case.get('coverage_type', 'Comprehensive')
-    vehicle_type = case.get('vehicle_type', 'Hatchback')
-    fuel_type = case.get('fuel_type', 'Petrol')
-    driver_age = case.get('driver_age', '26-35 years')
     ncb_percentage = case.get('ncb_percentage', 0)
     deductible = case.get('deductible', 0)
     
-    # Base premium calculation for vehicle insurance
-    if coverage_type == "Third Party":
-        # Third party rates based on engine capacity
-        engine_capacity = case.get('engine_capacity', '1197cc')
-        if fuel_type == "Electric":
-            base_premium = 3000
-        elif 'cc' in str(engine_capacity):
-            cc = int(''.join(filter(str.isdigit, str(engine_capacity))))
-            if cc <= 1000:
-                base_premium = 2072
-            elif cc <= 1500:
-                base_premium = 3221
-            else:
-                base_premium = 7890
-        else:
-            base_premium = 3221
-    else:
-        # Comprehensive insurance calculation
-        base_rate = 0.025  # 2.5% of IDV
-        
-        # Vehicle type multiplier
-        vehicle_multipliers = {
-            'Hatchback': 1.0,
-            'Sedan': 1.1,
-            'SUV': 1.3,
-            'MUV/MPV': 1.2,
-            'Coupe': 1.4,
-            'Convertible': 1.5,
-            'Pickup Truck': 1.1,
-            'Van': 1.1
-        }
-        
-        # Fuel type multiplier
-        fuel_multipliers = {
-            'Petrol': 1.0,
-            'Diesel': 1.05,
-            'CNG': 0.95,
-            'Electric': 0.9,
-            'Hybrid': 0.95,
-            'LPG': 0.95
-        }
-        
-        # Driver age multiplier
-        age_multipliers = {
-            '18-25 years': 1.3,
-            '26-35 years': 1.0,
-            '36-50 years': 0.95,
-            '50+ years': 1.1
-        }
-        
-        base_premium = idv * base_rate * vehicle_multipliers.get(vehicle_type, 1.0) * fuel_multipliers.get(fuel_type, 1.0) * age_multipliers.get(driver_age, 1.0)
-        
-        # Apply NCB discount
-        base_premium = base_premium * (100 - ncb_percentage) / 100
-        
-        # Apply voluntary deductible discount
-        if deductible > 0:
-            deductible_discount = min(deductible / 10000 * 5, 15)  # Max 15% discount
-            base_premium = base_premium * (100 - deductible_discount) / 100
-    
     # Generate quote options
-    quotes = []
-    
-    if coverage_type == "Third Party":
-        quotes.append({
-            'name': 'Third Party Only',
-            'premium': base_premium,
-            'features': [
-                'Third Party Liability Coverage',
-                'Legal Compliance',
-                'Covers injury/death to third parties',
-                'Property damage to third parties'
-            ],
-            'coverage_amount': 'Unlimited Third Party Liability'
-        })
-    else:
-        # Basic Comprehensive
-        basic_premium = base_premium
-        quotes.append({
-            'name': 'Basic Comprehensive',
-            'premium': basic_premium,
-            'features': [
-                'Own Damage Coverage',
-                'Third Party Liability',
-                'Theft Protection',
-                'Natural Calamity Coverage'
-            ],
-            'coverage_amount': f'IDV: ₹{idv:,}'
-        })
-        
-        # Standard Comprehensive with add-ons
-        standard_premium = basic_premium * 1.25
-        standard_features = [
-            'Own Damage Coverage',
-            'Third Party Liability', 
-            'Theft Protection',
-            'Natural Calamity Coverage',
-            '24x7 Roadside Assistance',
-            'Engine Protection Cover'
-        ]
-        if case.get('roadside_assistance'): standard_features.append('✓ Selected: Roadside Assistance')
-        if case.get('engine_protect'): standard_features.append('✓ Selected: Engine Protection')
-        
-        quotes.append({
-            'name': 'Standard Comprehensive',
-            'premium': standard_premium,
-            'features': standard_features,
-            'coverage_amount': f'IDV: ₹{idv:,}'
-        })
-        
-        # Premium Comprehensive with all add-ons
-        premium_premium = basic_premium * 1.6
-        premium_features = [
-            'Own Damage Coverage',
-            'Third Party Liability',
-            'Theft Protection', 
-            'Natural Calamity Coverage',
-            '24x7 Roadside Assistance',
-            'Engine Protection Cover',
-            'Zero Depreciation Cover',
-            'Consumables Cover',
-            'Key Replacement Cover',
-            'Return to Invoice Cover'
-        ]
-        
-        # Mark selected add-ons
-        if case.get('zero_depreciation'): premium_features.append('✓ Selected: Zero Depreciation')
-        if case.get('consumables_cover'): premium_features.append('✓ Selected: Consumables')
-        if case.get('key_replacement'): premium_features.append('✓ Selected: Key Replacement')
-        if case.get('return_invoice'): premium_features.append('✓ Selected: Return to Invoice')
-        
-        quotes.append({
-            'name': 'Premium Comprehensive',
-            'premium': premium_premium,
-            'features': premium_features,
-            'coverage_amount': f'IDV: ₹{idv:,}'
-        })
+    quote_cache = get_quote_cache()
+    quotes = quote_cache.quotes(case)
     
     st.markdown("#### Available Vehicle Insurance Quotes")
     
@@ -1096,6 +784,11 @@ def render_quote_generation_step():
     vehicle_info = f"{case.get('vehicle_make', '')} {case.get('vehicle_model', '')} {case.get('vehicle_variant', '')} ({case.get('vehicle_year', '')})"
     st.info(f"🚗 **Vehicle:** {vehicle_info} | **Registration:** {case.get('registration_number', '')} | **IDV:** ₹{idv:,}")
     
+    if st.session_state.current_user_role == 'Admin':
+        cache_stats = quote_cache.stats()
+        st.caption(f"Quote cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['size']}/{cache_stats['maxsize']} entries)")
+    
     selected_quote = None
     for i, quote in enumerate(quotes):
         with st.container():
@@ -1132,22 +825,22 @@ def render_quote_generation_step():
             with col3:
                 if st.button(f"Select", key=f'quote_{i}'):
                     selected_quote = quote
-                    st.session_state.current_case['selected_quote'] = quote
-                    st.session_state.current_case['premium_amount'] = quote['premium']
+                    st.session_state.current_case.update(plan_selection(quote))
                     st.success(f"{quote['name']} selected!")
     
-    if 'selected_quote' in st.session_state.current_case:
-        st.success(f"✅ Selected: {st.session_state.current_case['selected_quote']['name']} - ₹{st.session_state.current_case['premium_amount']:,.0f}/year")
+    plan_name = case_plan_name(st.session_state.current_case)
+    if plan_name:
+        st.success(f"✅ Selected: {plan_name} - ₹{st.session_state.current_case['premium_amount']:,.0f}/year")
     
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step4_prev'):
-            st.session_state.case_step = 3
+            go_to_step(3)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step4_next'):
-            if 'selected_quote' in st.session_state.current_case:
-                st.session_state.case_step = 5
+            if case_plan_name(st.session_state.current_case):
+                go_to_step(5)
                 st.rerun()
             else:
                 st.error("Please select a quote option")
@@ -1155,39 +848,10 @@ def render_quote_generation_step():
 def render_documentation_step():
     st.markdown("### 📄 Step 5: Vehicle Insurance Document Collection")
     
-    # Required documents for vehicle insurance
-    required_docs = [
-        'Registration Certificate (RC)',
-        'Valid Driving License',
-        'Previous Insurance Policy',
-        'Vehicle Photos (4 angles)',
-        'Identity Proof (Aadhar/Passport)',
-        'Address Proof',
-        'Pollution Under Control (PUC) Certificate'
-    ]
-    
-    # Additional documents based on case specifics
-    additional_docs = []
-    
-    # If commercial vehicle
-    vehicle_type = st.session_state.current_case.get('vehicle_type', 'Hatchback')
-    if 'commercial' in vehicle_type.lower():
-        additional_docs.extend(['Commercial License', 'Fitness Certificate'])
-    
-    # If financed vehicle
     is_financed = st.checkbox("Is this vehicle financed/on loan?")
     if is_financed:
-        additional_docs.extend(['Loan Agreement', 'NOC from Financier'])
         st.session_state.current_case['is_financed'] = True
-    
-    # If first-time buyer (no previous insurance)
-    has_previous_insurance = st.session_state.current_case.get('has_previous_insurance', False)
-    if not has_previous_insurance:
-        additional_docs = [doc for doc in additional_docs if 'Previous Insurance' not in doc]
-        required_docs = [doc for doc in required_docs if 'Previous Insurance' not in doc]
-        additional_docs.append('Vehicle Invoice/Bill of Sale')
-    
-    all_docs = required_docs + additional_docs
+    all_docs = required_documents(st.session_state.current_case, is_financed)
     
     st.markdown(f"#### Required Documents for Vehicle Insurance")
     
@@ -1212,8 +876,11 @@ def render_documentation_step():
             elif doc == 'Valid Driving License' and doc in collected_docs:
                 st.caption("🪪 Valid DL of primary driver")
     
-    # Document upload simulation
+    # Document upload - files are streamed into the document store and filed
+    # against the case id, so the case gets its id here
     st.markdown("#### Document Upload")
+    case_id = st.session_state.current_case.setdefault('id', str(uuid.uuid4()))
+    document_store = get_document_store()
     uploaded_files = st.file_uploader(
         "Upload Vehicle Insurance Documents", 
         accept_multiple_files=True,
@@ -1222,20 +889,28 @@ def render_documentation_step():
     )
     
     if uploaded_files:
+        # Save each upload once, not on every rerun
+        saved_uploads = st.session_state.setdefault('saved_uploads', {})
         st.success(f"📎 Uploaded {len(uploaded_files)} document(s)")
         for file in uploaded_files:
-            file_size = len(file.read()) / 1024  # Size in KB
-            st.markdown(f"• **{file.name}** ({file_size:.1f} KB)")
+            upload_key = (case_id, getattr(file, 'file_id', None) or file.name, file.size)
+            if upload_key not in saved_uploads:
+                file.seek(0)
+                saved_uploads[upload_key] = document_store.save(case_id, file, file.name, file.type)
+            document = saved_uploads[upload_key]
+            note = " - ♻️ already on file" if document.duplicate else ""
+            st.markdown(f"• **{file.name}** ({document.size / 1024:.1f} KB){note}")
+    
+    # Thumbnails are made in the background and appear once ready
+    thumbnails = [(document_store.thumbnail_path(document.sha256), document.name)
+                  for document in document_store.for_case(case_id)]
+    thumbnails = [(path, name) for path, name in thumbnails if path]
+    if thumbnails:
+        st.image([path for path, _ in thumbnails], caption=[name for _, name in thumbnails], width=120)
     
     # Document verification checklist
     st.markdown("#### Document Verification Checklist")
-    verification_items = [
-        "RC matches vehicle details entered",
-        "DL is valid and not expired", 
-        "Vehicle photos are clear and show damage (if any)",
-        "Previous policy shows NCB eligibility",
-        "All documents are clearly readable"
-    ]
+    verification_items = VERIFICATION_ITEMS
     
     verified_items = []
     for item in verification_items:
@@ -1266,7 +941,7 @@ def render_documentation_step():
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step5_prev'):
-            st.session_state.case_step = 4
+            go_to_step(4)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step5_next'):
@@ -1276,7 +951,7 @@ def render_documentation_step():
                 'is_financed': is_financed,
                 'document_completion_rate': completion_rate
             })
-            st.session_state.case_step = 6
+            go_to_step(6)
             st.rerun()
 
 def render_policy_finalization_step():
@@ -1312,8 +987,9 @@ def render_policy_finalization_step():
             st.markdown(f"• **Voluntary Deductible:** ₹{case.get('deductible'):,.0f}")
         
         st.markdown("**Premium Information**")
-        if 'selected_quote' in case:
-            st.markdown(f"• **Plan:** {case['selected_quote']['name']}")
+        plan_name = case_plan_name(case)
+        if plan_name:
+            st.markdown(f"• **Plan:** {plan_name}")
         st.markdown(f"• **Annual Premium:** ₹{case.get('premium_amount', 0):,.0f}")
         
         # Calculate premium for multi-year policies
@@ -1361,21 +1037,7 @@ def render_policy_finalization_step():
     # Important policy terms
     st.markdown("#### Important Policy Terms & Conditions")
     
-    terms = [
-        f"Policy covers vehicle {case.get('registration_number', '')} for {case.get('coverage_type', 'Comprehensive').lower()} insurance",
-        f"Insured Declared Value (IDV) is ₹{case.get('idv', 0):,}",
-        "Premium must be paid before policy inception",
-        "Policy is subject to terms and conditions of the insurance company",
-        "Claims must be intimated within 48 hours of incident"
-    ]
-    
-    if case.get('deductible', 0) > 0:
-        terms.append(f"Voluntary deductible of ₹{case.get('deductible'):,} applies to own damage claims")
-    
-    if case.get('coverage_type') == 'Third Party':
-        terms.append("Policy covers ONLY third party liability - own damage not covered")
-    
-    for term in terms:
+    for term in policy_terms(case):
         st.markdown(f"• {term}")
     
     # Terms and conditions acceptance
@@ -1383,8 +1045,7 @@ def render_policy_finalization_step():
     
     # Executive assignment
     st.markdown("#### Assignment")
-    executives = ["Priya Sharma", "Amit Singh", "Sneha Patel", "Rahul Verma", "Neha Gupta", "Rohit Kumar", "Kavita Jain"]
-    assigned_to = st.selectbox("Assign to Executive", executives)
+    assigned_to = st.selectbox("Assign to Executive", EXECUTIVES)
     
     # Pre-policy checklist
     st.markdown("#### Pre-Policy Issuance Checklist")
@@ -1406,7 +1067,7 @@ def render_policy_finalization_step():
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step6_prev'):
-            st.session_state.case_step = 5
+            go_to_step(5)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step6_next'):
@@ -1416,7 +1077,7 @@ def render_policy_finalization_step():
                     'terms_accepted': True,
                     'pre_policy_checks': completed_checks
                 })
-                st.session_state.case_step = 7
+                go_to_step(7)
                 st.rerun()
             else:
                 if not terms_accepted:
@@ -1446,7 +1107,7 @@ def render_payment_processing_step():
     # Payment methods
     payment_method = st.selectbox(
         "Select Payment Method",
-        ["Credit Card", "Debit Card", "Net Banking", "UPI", "Bank Transfer", "Cheque"]
+        PAYMENT_METHODS
     )
     
     if payment_method in ["Credit Card", "Debit Card"]:
@@ -1471,30 +1132,64 @@ def render_payment_processing_step():
         bank_name = st.text_input("Bank Name")
         cheque_date = st.date_input("Cheque Date", value=date.today())
     
-    # Payment processing simulation
-    if st.button("Process Payment", key='process_payment'):
-        with st.spinner("Processing payment..."):
-            import time
-            time.sleep(2)
-            st.success("Payment processed successfully!")
+    # Payments are charged on the processor's worker threads; each rerun
+    # just polls the status, so the page never blocks on the gateway
+    processor = get_payment_processor()
+    case_id = st.session_state.current_case.setdefault('id', str(uuid.uuid4()))
+    
+    payment_key = case.get('payment_key')
+    payment = processor.status(payment_key) if payment_key else None
+    if payment is None or payment.status == FAILED:
+        if payment is not None:
+            st.error(f"Payment failed: {payment.error}")
+        if st.button("Process Payment", key='process_payment'):
+            # A fresh key per attempt; repeat clicks on the same attempt reuse it
+            payment_key = str(uuid.uuid4())
+            st.session_state.current_case['payment_key'] = payment_key
+            st.session_state.current_case['payment_status'] = 'Pending'
+            payment = processor.submit(payment_key, case_id, payment_amount, payment_method)
+    
+    if payment is not None and payment.status == COMPLETED:
+        if case.get('payment_status') != 'Completed':
             st.session_state.current_case['payment_status'] = 'Completed'
-            st.session_state.current_case['payment_method'] = payment_method
-            st.session_state.current_case['payment_amount'] = payment_amount
-            st.session_state.current_case['payment_date'] = datetime.now()
+            st.session_state.current_case['payment_method'] = payment.method
+            st.session_state.current_case['payment_amount'] = payment.amount
+            st.session_state.current_case['payment_reference'] = payment.reference
+            st.session_state.current_case['payment_date'] = payment.completed_at
+        st.success(f"Payment processed successfully! Reference: {payment.reference}")
+    elif payment is not None and payment.status != FAILED:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.info(f"⏳ Payment of ₹{payment.amount:,.0f} by {payment.method} is being processed...")
+        with col2:
+            if st.button("🔄 Refresh Status", key='refresh_payment'):
+                st.rerun()
     
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step7_prev'):
-            st.session_state.case_step = 6
+            go_to_step(6)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step7_next'):
             if case.get('payment_status') == 'Completed':
-                st.session_state.case_step = 8
+                go_to_step(8)
                 st.rerun()
             else:
                 st.error("Please complete the payment processing")
 
+def issued_policy_documents(case):
+    # Render the policy and card PDFs once per policy number, not on every rerun
+    documents = st.session_state.get('issued_documents')
+    if not documents or documents['policy_number'] != case['policy_number']:
+        documents = {
+            'policy_number': case['policy_number'],
+            'policy': render_policy_pdf(case),
+            'card': render_insurance_card(case),
+        }
+        st.session_state.issued_documents = documents
+    return documents
+
 def render_policy_issuance_step():
     st.markdown("### 🚗 Step 8: Vehicle Insurance Policy Issuance")
     
@@ -1502,8 +1197,17 @@ def render_policy_issuance_step():
     
     # Generate policy number
     if 'policy_number' not in case:
-        policy_number = f"VEH-{datetime.now().strftime('%Y%m%d')}-{len(st.session_state.cases) + 1:04d}"
-        st.session_state.current_case['policy_number'] = policy_number
+        st.session_state.current_case['policy_number'] = next_policy_number(get_sequence_allocator(), datetime.now())
+    
+    # Policy term starts when the policy is first generated
+    if 'policy_expiry_date' not in case:
+        start_date = datetime.now()
+        st.session_state.current_case['policy_start_date'] = start_date
+        st.session_state.current_case['policy_expiry_date'] = policy_expiry_date(
+            start_date, case.get('policy_duration', '1 Year')
+        )
+    start_date = case['policy_start_date']
+    end_date = case['policy_expiry_date']
     
     st.markdown("#### Vehicle Insurance Policy Generated Successfully! 🎉")
     
@@ -1519,20 +1223,8 @@ def render_policy_issuance_step():
     with col1:
         st.markdown("**Policy Information**")
         st.markdown(f"• **Policy Number:** {case.get('policy_number')}")
-        st.markdown(f"• **Issue Date:** {datetime.now().strftime('%d %b %Y')}")
-        st.markdown(f"• **Effective Date:** {datetime.now().strftime('%d %b %Y')}")
-        
-        # Calculate policy end date based on duration
-        duration = case.get('policy_duration', '1 Year')
-        if duration == '1 Year':
-            end_date = datetime.now() + timedelta(days=365)
-        elif duration == '2 Years':
-            end_date = datetime.now() + timedelta(days=730)
-        elif duration == '3 Years':
-            end_date = datetime.now() + timedelta(days=1095)
-        else:
-            end_date = datetime.now() + timedelta(days=365)
-            
+        st.markdown(f"• **Issue Date:** {start_date.strftime('%d %b %Y')}")
+        st.markdown(f"• **Effective Date:** {start_date.strftime('%d %b %Y')}")
         st.markdown(f"• **Expiry Date:** {end_date.strftime('%d %b %Y')}")
         
         st.markdown("**Vehicle Details**")
@@ -1556,7 +1248,7 @@ def render_policy_issuance_step():
             st.markdown(f"• **NCB Applied:** {case.get('ncb_percentage')}%")
         
         # Next premium due calculation
-        next_due = datetime.now() + timedelta(days=365)
+        next_due = start_date + timedelta(days=365)
         st.markdown(f"• **Next Premium Due:** {next_due.strftime('%d %b %Y')}")
         
         st.markdown("**Customer Details**")
@@ -1593,11 +1285,12 @@ def render_policy_issuance_step():
     # Policy document generation
     st.markdown("#### Policy Document Actions")
     
+    file_names = policy_file_names(case)
+    documents = issued_policy_documents(case)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        if st.button("📄 Download Policy PDF", key='download_policy'):
-            st.success("Policy PDF downloaded!")
-            st.balloons()
+        st.download_button("📄 Download Policy PDF", documents['policy'], file_name=file_names['policy'],
+                           mime='application/pdf', key='download_policy')
     with col2:
         if st.button("📧 Email to Customer", key='email_policy'):
             st.success(f"Policy emailed to {case.get('customer_email')}")
@@ -1629,25 +1322,25 @@ def render_policy_issuance_step():
         <div style="font-size: 12px;">
             <strong>Policy:</strong> {case.get('policy_number', '')}<br>
             <strong>Vehicle:</strong> {case.get('registration_number', '')}<br>
-            <strong>Valid:</strong> {datetime.now().strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}<br>
+            <strong>Valid:</strong> {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}<br>
             <strong>IDV:</strong> ₹{case.get('idv', 0):,.0f}<br>
             <strong>Coverage:</strong> {case.get('coverage_type', '')}
         </div>
     </div>
     """, unsafe_allow_html=True)
     
-    if st.button("📱 Generate Digital Card", key='digital_card'):
-        st.success("Digital insurance card generated and sent to customer's mobile")
+    st.download_button("📱 Download Digital Card", documents['card'], file_name=file_names['card'],
+                       mime='application/pdf', key='digital_card')
     
     col1, col2, col3 = st.columns([2, 1, 1])
     with col2:
         if st.button("← Previous", key='step8_prev'):
-            st.session_state.case_step = 7
+            go_to_step(7)
             st.rerun()
     with col3:
         if st.button("Next Step →", key='step8_next'):
             st.session_state.current_case['status'] = 'Policy Issued'
-            st.session_state.case_step = 9
+            go_to_step(9)
             st.rerun()
 
 def render_followup_setup_step():
@@ -1670,13 +1363,15 @@ def render_followup_setup_step():
         )
         
         st.markdown("**Renewal Reminder**")
+        expiry = case.get('policy_expiry_date') or datetime.now() + timedelta(days=365)
         renewal_reminder = st.date_input(
             "Renewal Reminder Date",
-            value=datetime.now().date() + timedelta(days=335)  # 30 days before expiry
+            value=expiry.date() - timedelta(days=RENEWAL_REMINDER_DAYS)
         )
     
     with col2:
         st.markdown("**Payment Follow-up**")
+        next_payment = None
         if case.get('premium_frequency') != 'Annually':
             next_payment = st.date_input(
                 "Next Premium Due",
@@ -1700,8 +1395,8 @@ def render_followup_setup_step():
         # Finalize case data
         final_case = {
             **st.session_state.current_case,
-            'id': str(uuid.uuid4()),
-            'created_date': datetime.now(),
+            'id': st.session_state.current_case.get('id') or str(uuid.uuid4()),
+            'created_date': st.session_state.current_case.get('created_date') or datetime.now(),
             'follow_up_date': customer_followup,
             'renewal_date': renewal_reminder,
             'follow_up_notes': follow_up_notes,
@@ -1709,11 +1404,31 @@ def render_followup_setup_step():
             'status': 'Policy Issued'
         }
         
-        # Add to cases list
-        st.session_state.cases.append(final_case)
+        # File the policy documents, save to the case store and queue every
+        # follow-up for the executive
+        documents = issued_policy_documents(final_case)
+        final_case['policy_documents'] = file_policy_documents(
+            get_document_store(), final_case, documents['policy'], documents['card']
+        )
+        get_case_store().add(final_case)
+        get_followup_scheduler().schedule(
+            final_case['id'],
+            final_case.get('assigned_to', 'Unassigned'),
+            {
+                'customer': customer_followup,
+                'renewal': renewal_reminder,
+                'payment': next_payment,
+                'service': service_check,
+            },
+            notes=follow_up_notes
+        )
         
         # Reset case creation
+        get_step_telemetry().record(final_case['id'], st.session_state.session_id,
+                                    st.session_state.case_step, COMPLETED_STEP)
         st.session_state.current_case = {}
+        st.session_state.saved_uploads = {}
+        st.session_state.pop('issued_documents', None)
         st.session_state.case_step = 1
         
         st.success("Case created successfully!")
@@ -1729,116 +1444,620 @@ def render_followup_setup_step():
 def render_manage_cases():
     st.markdown("## 🚗 Manage Vehicle Insurance Cases")
     
+    store = get_case_store()
+    index = get_filter_index()
+    
+    # Search
+    search_text = st.text_input(
+        "🔍 Search Cases",
+        placeholder="Customer name, phone, email, registration or policy number (e.g. MH12AB)",
+        key='case_search'
+    ).strip()
+    searching = bool(search_text) and len(normalize_search_text(search_text)) >= MIN_SEARCH_LENGTH
+    if search_text and not searching:
+        st.caption(f"Type at least {MIN_SEARCH_LENGTH} characters to search")
+    search_notice = st.empty()
+    
     # Filters
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         status_filter = st.selectbox("Filter by Status", 
-                                   ["All"] + list(set([case['status'] for case in st.session_state.cases])))
+                                   ["All"] + index.options('status'))
     
     with col2:
         make_filter = st.selectbox("Filter by Vehicle Make",
-                                 ["All"] + list(set([case.get('vehicle_make', 'Unknown') for case in st.session_state.cases])))
+                                 ["All"] + index.options('vehicle_make'))
     
     with col3:
         assigned_filter = st.selectbox("Filter by Executive",
-                                     ["All"] + list(set([case['assigned_to'] for case in st.session_state.cases])))
+                                     ["All"] + index.options('assigned_to'))
     
     with col4:
         coverage_filter = st.selectbox("Filter by Coverage", 
                                      ["All", "Comprehensive", "Third Party"])
     
     # Apply filters
-    filtered_cases = st.session_state.cases.copy()
+    filters = {}
     
     if status_filter != "All":
-        filtered_cases = [case for case in filtered_cases if case['status'] == status_filter]
+        filters['status'] = status_filter
     
     if make_filter != "All":
-        filtered_cases = [case for case in filtered_cases if case.get('vehicle_make') == make_filter]
+        filters['vehicle_make'] = make_filter
     
     if assigned_filter != "All":
-        filtered_cases = [case for case in filtered_cases if case['assigned_to'] == assigned_filter]
+        filters['assigned_to'] = assigned_filter
         
     if coverage_filter != "All":
-        filtered_cases = [case for case in filtered_cases if case.get('coverage_type') == coverage_filter]
+        filters['coverage_type'] = coverage_filter
+    
+    # Filters go into the search itself so the cap and count cover filtered matches only
+    search_ids = None
+    if searching:
+        search_ids = store.search(search_text, **filters)
+        search_total = store.search_count(search_text, **filters)
+        if search_total > len(search_ids):
+            search_notice.caption(f"Showing the {len(search_ids):,} most recent of {search_total:,} matches - "
+                                  f"refine your search to narrow them down")
+    
+    # Pagination (keyset cursors on created_date)
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        page_size = st.selectbox("Cases per page", CASE_PAGE_SIZES,
+                                 index=CASE_PAGE_SIZES.index(DEFAULT_CASE_PAGE_SIZE),
+                                 key='case_page_size')
+    
+    # Start from the first page whenever the filters or page size change
+    page_signature = (search_text, tuple(sorted(filters.items())), page_size)
+    if st.session_state.get('case_page_signature') != page_signature:
+        st.session_state.case_page_signature = page_signature
+        st.session_state.case_page_cursors = [None]
+        st.session_state.open_case_id = None
+    
+    cursors = st.session_state.case_page_cursors
+    total_found = index.count(ids=search_ids, **filters)
+    # Fetch one extra row to know whether a next page exists
+    page_cases = store.get_many(index.page(page_size + 1, cursor=cursors[-1], ids=search_ids, **filters))
+    has_next_page = len(page_cases) > page_size
+    page_cases = page_cases[:page_size]
+    
+    # Export the whole filter result, not just this page
+    if search_ids is not None:
+        render_export_controls('cases_export', ids=index.page(len(search_ids), ids=search_ids, **filters))
+    else:
+        render_export_controls('cases_export', **filters)
     
     # Cases table
-    if filtered_cases:
-        st.markdown(f"### Found {len(filtered_cases)} vehicle insurance case(s)")
+    if page_cases:
+        with col1:
+            st.markdown(f"### Found {search_total if search_ids is not None else total_found} vehicle insurance case(s)")
         
-        for i, case in enumerate(filtered_cases):
-            # Prepare vehicle info
-            vehicle_info = f"{case.get('vehicle_make', 'Unknown')} {case.get('vehicle_model', 'Unknown')} ({case.get('vehicle_year', 'Unknown')})"
-            coverage_info = case.get('coverage_type', 'Unknown')
-            if case.get('idv'):
-                coverage_info += f" - IDV: ₹{case.get('idv'):,.0f}"
-            
-            with st.expander(f"🚗 {case['customer_name']} - {vehicle_info} - {case['status']}", expanded=False):
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.markdown("**Customer Details**")
-                    st.markdown(f"• **Name:** {case['customer_name']}")
-                    st.markdown(f"• **Phone:** {case['customer_phone']}")
-                    st.markdown(f"• **Email:** {case['customer_email']}")
-                    
-                    st.markdown("**Vehicle Details**") 
-                    st.markdown(f"• **Make/Model:** {case.get('vehicle_make', 'N/A')} {case.get('vehicle_model', 'N/A')}")
-                    st.markdown(f"• **Year:** {case.get('vehicle_year', 'N/A')}")
-                    st.markdown(f"• **Registration:** {case.get('registration_number', 'N/A')}")
-                    st.markdown(f"• **Fuel Type:** {case.get('fuel_type', 'N/A')}")
-                
-                with col2:
-                    st.markdown("**Insurance Details**")
-                    st.markdown(f"• **Coverage:** {case.get('coverage_type', 'N/A')}")
-                    if case.get('idv'):
-                        st.markdown(f"• **IDV:** ₹{case.get('idv'):,.0f}")
-                    st.markdown(f"• **Premium:** ₹{case['premium_amount']:,.0f}")
-                    if case.get('policy_number'):
-                        st.markdown(f"• **Policy Number:** {case.get('policy_number')}")
-                    
-                    # Add-on covers
-                    addons = []
-                    if case.get('zero_depreciation'): addons.append('Zero Dep')
-                    if case.get('engine_protect'): addons.append('Engine Cover')
-                    if case.get('roadside_assistance'): addons.append('RSA')
-                    if addons:
-                        st.markdown(f"• **Add-ons:** {', '.join(addons)}")
-                
-                with col3:
-                    st.markdown("**Case Status**")
-                    st.markdown(f"• **Status:** {case['status']}")
-                    st.markdown(f"• **Assigned to:** {case['assigned_to']}")
-                    st.markdown(f"• **Created:** {case['created_date'].strftime('%d %b %Y')}")
-                    if case.get('follow_up_date'):
-                        st.markdown(f"• **Follow-up:** {case['follow_up_date'].strftime('%d %b %Y')}")
-                    
-                    # Document status
-                    docs = case.get('documents', [])
-                    completion = case.get('document_completion_rate', 0)
-                    st.markdown(f"• **Documents:** {len(docs)} items ({completion:.0f}% complete)")
-                
-                # Action buttons
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    if st.button("📝 Edit", key=f"edit_{i}"):
-                        st.info("Edit functionality would open case details for modification")
-                with col2:
-                    if st.button("👥 Reassign", key=f"reassign_{i}"):
-                        st.info("Reassignment dialog would open here")
-                with col3:
-                    if st.button("📞 Follow-up", key=f"followup_{i}"):
-                        st.info("Follow-up scheduling dialog would open here") 
-                with col4:
-                    if st.button("📄 Policy", key=f"policy_{i}"):
-                        if case.get('policy_number'):
-                            st.success(f"Policy {case.get('policy_number')} details displayed")
-                        else:
-                            st.warning("Policy not yet issued")
+        for case in page_cases:
+            render_case_row(case)
+        
+        page_number = len(cursors)
+        total_pages = max(1, -(-total_found // page_size))
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("← Previous Page", key='cases_prev_page', disabled=page_number == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.markdown(f"<div style='text-align: center;'>Page {page_number} of {total_pages}</div>",
+                        unsafe_allow_html=True)
+        with col3:
+            if st.button("Next Page →", key='cases_next_page', disabled=not has_next_page):
+                cursors.append(page_cursor(page_cases[-1]))
+                st.rerun()
     else:
         st.info("No vehicle insurance cases found matching the selected filters.")
 
+def render_export_controls(key, ids=None, **filters):
+    with st.expander("⬇️ Export Cases"):
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            export_format = st.selectbox("Format", list(EXPORT_FORMATS), format_func=str.upper,
+                                         key=f'{key}_format')
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            prepare = st.button("📦 Prepare Export", key=f'{key}_prepare')
+        
+        if prepare:
+            previous = st.session_state.pop(key, None)
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+            # Stream chunk by chunk to a temporary file rather than building the export in memory
+            path = os.path.join(tempfile.gettempdir(), f"cdrive_export_{uuid.uuid4().hex}.{export_format}")
+            with st.spinner("Exporting cases..."):
+                with open(path, 'wb') as export_file:
+                    size = write_export(iter_case_chunks(get_case_store(), ids=ids, **filters),
+                                        export_format, export_file)
+            st.session_state[key] = {'path': path, 'format': export_format, 'size': size}
+        
+        export = st.session_state.get(key)
+        if export and os.path.exists(export['path']):
+            with open(export['path'], 'rb') as export_file:
+                st.download_button(f"⬇️ Download {export['format'].upper()} ({export['size'] / 1024:,.0f} KB)",
+                                   export_file,
+                                   file_name=f"cdrive_cases_{datetime.now().strftime('%Y%m%d_%H%M')}.{export['format']}",
+                                   mime=EXPORT_FORMATS[export['format']],
+                                   key=f'{key}_download')
+
+def render_case_row(case):
+    # One summary line per case; details are only rendered for the opened row
+    vehicle_info = f"{case.get('vehicle_make', 'Unknown')} {case.get('vehicle_model', 'Unknown')} ({case.get('vehicle_year', 'Unknown')})"
+    is_open = st.session_state.get('open_case_id') == case['id']
+    
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.markdown(f"{'▾' if is_open else '▸'} 🚗 **{case['customer_name']}** - {vehicle_info} - {case['status']}")
+    with col2:
+        if st.button("Hide" if is_open else "Details", key=f"toggle_{case['id']}"):
+            st.session_state.open_case_id = None if is_open else case['id']
+            st.rerun()
+    
+    if is_open:
+        with st.container():
+            render_case_details(case)
+
+def render_case_details(case):
+    case_id = case['id']
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("**Customer Details**")
+        st.markdown(f"• **Name:** {case['customer_name']}")
+        st.markdown(f"• **Phone:** {case['customer_phone']}")
+        st.markdown(f"• **Email:** {case['customer_email']}")
+        
+        st.markdown("**Vehicle Details**") 
+        st.markdown(f"• **Make/Model:** {case.get('vehicle_make', 'N/A')} {case.get('vehicle_model', 'N/A')}")
+        st.markdown(f"• **Year:** {case.get('vehicle_year', 'N/A')}")
+        st.markdown(f"• **Registration:** {case.get('registration_number', 'N/A')}")
+        st.markdown(f"• **Fuel Type:** {case.get('fuel_type', 'N/A')}")
+    
+    with col2:
+        st.markdown("**Insurance Details**")
+        st.markdown(f"• **Coverage:** {case.get('coverage_type', 'N/A')}")
+        if case.get('idv'):
+            st.markdown(f"• **IDV:** ₹{case.get('idv'):,.0f}")
+        st.markdown(f"• **Premium:** ₹{case['premium_amount']:,.0f}")
+        if case.get('policy_number'):
+            st.markdown(f"• **Policy Number:** {case.get('policy_number')}")
+        
+        # Add-on covers
+        addons = []
+        if case.get('zero_depreciation'): addons.append('Zero Dep')
+        if case.get('engine_protect'): addons.append('Engine Cover')
+        if case.get('roadside_assistance'): addons.append('RSA')
+        if addons:
+            st.markdown(f"• **Add-ons:** {', '.join(addons)}")
+    
+    with col3:
+        st.markdown("**Case Status**")
+        st.markdown(f"• **Status:** {case['status']}")
+        st.markdown(f"• **Assigned to:** {case['assigned_to']}")
+        st.markdown(f"• **Created:** {case['created_date'].strftime('%d %b %Y')}")
+        if case.get('follow_up_date'):
+            st.markdown(f"• **Follow-up:** {case['follow_up_date'].strftime('%d %b %Y')}")
+        
+        # Document status
+        docs = case.get('documents', [])
+        completion = case.get('document_completion_rate', 0)
+        st.markdown(f"• **Documents:** {len(docs)} items ({completion:.0f}% complete)")
+    
+    # Action buttons
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        if st.button("📝 Edit", key=f"edit_{case_id}"):
+            st.info("Edit functionality would open case details for modification")
+    with col2:
+        if st.button("👥 Reassign", key=f"reassign_{case_id}"):
+            st.info("Reassignment dialog would open here")
+    with col3:
+        if st.button("📞 Follow-up", key=f"followup_{case_id}"):
+            st.info("Follow-up scheduling dialog would open here") 
+    with col4:
+        if st.button("📄 Policy", key=f"policy_{case_id}"):
+            if case.get('policy_number'):
+                st.success(f"Policy {case.get('policy_number')} details displayed")
+            else:
+                st.warning("Policy not yet issued")
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+def render_analytics():
+    st.markdown("## 📈 Analytics & Reports")
+    
+    rollups = get_case_rollups()
+    today = date.today()
+    col1, col2 = st.columns(2)
+    with col1:
+        period = st.selectbox("Period", list(ANALYTICS_PERIODS), index=2, key='analytics_period')
+    with col2:
+        dimension_label = st.selectbox("Break Down By", list(ANALYTICS_DIMENSIONS), key='analytics_dimension')
+    days = ANALYTICS_PERIODS[period]
+    start, end = (today - timedelta(days=days - 1), today) if days else (None, None)
+    
+    started = time.perf_counter()
+    trend = rollups.daily_totals(start, end)
+    breakdown = rollups.breakdown(ANALYTICS_DIMENSIONS[dimension_label], start, end)
+    funnel = rollups.funnel(start, end)
+    issued = rollups.breakdown('status', start, end).get('Policy Issued', (0, 0))
+    elapsed = time.perf_counter() - started
+    
+    total_cases = sum(cases for _, cases, _ in trend)
+    total_premium = sum(premium for _, _, premium in trend)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cases", f"{total_cases:,}")
+    col2.metric("Premium", f"₹{total_premium:,.0f}")
+    col3.metric("Policies Issued", f"{issued[0]:,}")
+    col4.metric("Lead → Policy", f"{funnel[len(CASE_STEPS)] / funnel[1]:.1%}" if funnel[1] else "-")
+    st.caption(f"Read from daily rollups in {elapsed * 1000:.0f} ms")
+    
+    st.markdown("### 💰 Premium Trend")
+    if trend:
+        fig = px.area(x=[day for day, _, _ in trend], y=[premium for _, _, premium in trend],
+                      color_discrete_sequence=['#667eea'])
+        fig.update_layout(height=320, xaxis_title="Created", yaxis_title="Premium (₹)")
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No cases in this period.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"### 📊 Premium by {dimension_label}")
+        if breakdown:
+            fig = px.bar(x=list(breakdown), y=[premium for _, premium in breakdown.values()],
+                         color_discrete_sequence=['#2E86AB'])
+            fig.update_layout(showlegend=False, height=320, xaxis_title=dimension_label, yaxis_title="Premium (₹)")
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.markdown("### 🔻 Conversion Funnel")
+        if funnel[1]:
+            fig = go.Figure(go.Funnel(y=CASE_STEPS, x=list(funnel.values()), textinfo="value+percent initial"))
+            fig.update_layout(height=320, margin=dict(l=10, r=10, t=10, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+    
+    if breakdown:
+        st.dataframe(
+            [{dimension_label: value, "Cases": cases, "Premium (₹)": round(premium),
+              "Avg Premium (₹)": round(premium / cases) if cases else 0}
+             for value, (cases, premium) in breakdown.items()],
+            use_container_width=True, hide_index=True
+        )
+    
+    st.markdown("### 🧭 Wizard Drop-off & Step Times")
+    st.caption("From step events logged as executives move through the case wizard, including unsaved cases.")
+    telemetry = get_step_telemetry()
+    reached = telemetry.funnel(start, end)
+    latency = telemetry.step_latency(start, end)
+    if reached[1]:
+        labels = CASE_STEPS + ["Completed"]
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = go.Figure(go.Funnel(y=labels, x=list(reached.values()), textinfo="value+percent initial"))
+            fig.update_layout(height=360, margin=dict(l=10, r=10, t=10, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            rows = []
+            for step, name in enumerate(CASE_STEPS, start=1):
+                times = latency.get(step)
+                rows.append({
+                    "Step": name,
+                    "Reached": reached[step],
+                    "Dropped Here": reached[step] - reached[step + 1],
+                    "Median Time": format_duration(times['median']) if times else "-",
+                    "P90 Time": format_duration(times['p90']) if times else "-",
+                    "Went Back": times['back'] if times else 0,
+                })
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No wizard activity recorded in this period.")
+    
+    st.markdown("### 📦 Full Book Export")
+    st.caption("Every case in the store, newest first - for month-end and regulator extracts.")
+    render_export_controls('book_export')
+
+def render_bulk_import():
+    st.markdown("## 📥 Bulk Lead Import")
+    st.info("Import dealer lead files as New Lead cases. Rows are validated with the same rules as the "
+            "case wizard; rejected rows are collected in a downloadable report.")
+    
+    uploaded_file = st.file_uploader("Lead File (CSV or Parquet)", type=['csv', 'parquet'], key='import_file')
+    chunk_size = st.number_input("Rows per batch", min_value=500, max_value=50000,
+                                 value=DEFAULT_CHUNK_SIZE, step=500)
+    
+    if uploaded_file and st.button("📥 Start Import", key='start_import'):
+        progress_bar = st.progress(0.0)
+        status_text = st.empty()
+        
+        def show_progress(totals):
+            progress_bar.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0))
+            status_text.markdown(f"{totals.total_rows:,} rows read • {totals.imported:,} imported • "
+                                 f"{totals.rejected:,} rejected")
+        
+        report_path = os.path.join(tempfile.gettempdir(), f"rejected_{uuid.uuid4().hex}.csv")
+        try:
+            result = import_cases(get_case_store(), uploaded_file, detect_format(uploaded_file.name),
+                                  report_path, int(chunk_size), progress=show_progress)
+        except Exception as error:
+            st.error(f"Import failed: {error}")
+            return
+        progress_bar.progress(1.0)
+        st.session_state.last_import = result
+    
+    result = st.session_state.get('last_import')
+    if result:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows Read", f"{result.total_rows:,}")
+        col2.metric("Imported", f"{result.imported:,}")
+        col3.metric("Rejected", f"{result.rejected:,}")
+        if result.resolved:
+            st.caption(f"{result.resolved:,} rows had dealer vehicle names matched to the vehicle master.")
+        if result.report_path and os.path.exists(result.report_path):
+            with open(result.report_path, 'rb') as report:
+                st.download_button("⬇️ Download Rejected Rows", report,
+                                   file_name="rejected_rows.csv", mime="text/csv")
+        elif result.total_rows:
+            st.success("✅ All rows imported successfully!")
+
+def format_metric(metric, value):
+    if value is None:
+        return "-"
+    if metric == 'premium_written':
+        return f"₹{value:,.0f}"
+    if metric == 'avg_days_to_issue':
+        return f"{value:.1f} days"
+    if metric == 'followup_on_time_rate':
+        return f"{value:.0%}"
+    if metric == 'document_completion_rate':
+        return f"{value:.0f}%"
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.1f}"
+
+def render_my_performance():
+    st.markdown("## 📈 My Performance")
+    
+    stats = get_executive_stats()
+    executive = st.selectbox("Executive", EXECUTIVES, key='performance_executive')
+    mine = stats.executive(executive)
+    if not mine or not mine['cases']:
+        st.info("No cases assigned yet.")
+        return
+    
+    columns = st.columns(len(METRICS))
+    for column, (metric, label) in zip(columns, METRICS.items()):
+        board = stats.leaderboard(metric)
+        ranked = [entry for entry in board if entry['rank'] is not None]
+        rank = next((entry['rank'] for entry in ranked if entry['executive'] == executive), None)
+        column.metric(label, format_metric(metric, mine[metric]))
+        column.caption(f"Rank #{rank} of {len(ranked)}" if rank else "Not ranked yet")
+    
+    st.markdown("### 👥 Compared with the Team")
+    board = stats.leaderboard()
+    rows = []
+    for metric, label in METRICS.items():
+        values = [entry[metric] for entry in board if entry[metric] is not None]
+        rows.append({
+            "Metric": label,
+            "You": format_metric(metric, mine[metric]),
+            "Team Average": format_metric(metric, sum(values) / len(values) if values else None),
+            "Best": format_metric(metric, (min if metric in LOWER_IS_BETTER else max)(values) if values else None),
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+def render_team_analytics():
+    st.markdown("## 📈 Team Analytics")
+    
+    stats = get_executive_stats()
+    labels = {label: metric for metric, label in METRICS.items()}
+    metric = labels[st.selectbox("Rank By", list(labels), index=1, key='team_metric')]
+    board = stats.leaderboard(metric)
+    if not board:
+        st.info("No cases assigned yet.")
+        return
+    
+    ranked = [entry for entry in board if entry['rank'] is not None]
+    top = ranked[:TEAM_CHART_SIZE]
+    if top:
+        st.markdown(f"### 🏆 Top {len(top)} by {METRICS[metric]}")
+        fig = px.bar(x=[entry['executive'] for entry in top], y=[entry[metric] for entry in top],
+                     color_discrete_sequence=['#667eea'])
+        fig.update_layout(showlegend=False, height=320, xaxis_title="Executive", yaxis_title=METRICS[metric])
+        st.plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("### 📋 Leaderboard")
+    st.dataframe(
+        [{"Rank": entry['rank'], "Executive": entry['executive'], "Cases": entry['cases'],
+          **{label: format_metric(name, entry[name]) for name, label in METRICS.items()}}
+         for entry in board],
+        use_container_width=True, hide_index=True
+    )
+
+def render_followups():
+    st.markdown("## 📅 Follow-ups")
+    
+    scheduler = get_followup_scheduler()
+    today = date.today()
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        executive = st.selectbox("Executive", EXECUTIVES, key='followup_executive')
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        include_upcoming = st.checkbox(f"Include next {UPCOMING_DAYS} days", key='followup_upcoming')
+    
+    counts = scheduler.counts(executive, today)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Overdue", counts['overdue'])
+    col2.metric("Due Today", counts['today'])
+    col3.metric(f"Next {UPCOMING_DAYS} Days", counts['upcoming'])
+    
+    # Keyset pages over the executive's queue, oldest due first
+    page_signature = (executive, include_upcoming)
+    if st.session_state.get('followup_page_signature') != page_signature:
+        st.session_state.followup_page_signature = page_signature
+        st.session_state.followup_page_cursors = [None]
+    cursors = st.session_state.followup_page_cursors
+    
+    until = today + timedelta(days=UPCOMING_DAYS if include_upcoming else 0)
+    tasks = scheduler.queue(executive, FOLLOWUP_PAGE_SIZE + 1, cursor=cursors[-1], until=until)
+    has_next_page = len(tasks) > FOLLOWUP_PAGE_SIZE
+    tasks = tasks[:FOLLOWUP_PAGE_SIZE]
+    
+    if not tasks and len(cursors) == 1:
+        st.success("🎉 No follow-ups due - all caught up!")
+        return
+    
+    cases = {case['id']: case for case in get_case_store().get_many(list({task['case_id'] for task in tasks}))}
+    for task in tasks:
+        case = cases.get(task['case_id'], {})
+        due = date.fromisoformat(task['due'])
+        marker = '🔴' if due < today else '🟡' if due == today else '🟢'
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"{marker} **{FOLLOWUP_KINDS[task['kind']]}** - {case.get('customer_name', 'Unknown')} "
+                        f"({case.get('customer_phone', 'N/A')}) - {case.get('registration_number', 'N/A')} - "
+                        f"due {due.strftime('%d %b %Y')}")
+            if task['notes']:
+                st.caption(task['notes'])
+        with col2:
+            if st.button("✅ Done", key=f"followup_done_{task['id']}"):
+                scheduler.complete(task['id'])
+                st.rerun()
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("← Previous Page", key='followups_prev_page', disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<div style='text-align: center;'>Page {len(cursors)}</div>", unsafe_allow_html=True)
+    with col3:
+        if st.button("Next Page →", key='followups_next_page', disabled=not has_next_page):
+            cursors.append(task_cursor(tasks[-1]))
+            st.rerun()
+
+def render_batch_issuance():
+    st.markdown("## 🏭 Batch Policy Issuance")
+    st.info("Issue every case in a status at once - for fleet and dealer month-end runs. Policy "
+            "certificates and insurance cards are rendered across worker processes and filed in the "
+            "document store.")
+    
+    index = get_filter_index()
+    statuses = [status for status in index.options('status') if status not in (ISSUED_STATUS, 'Policy Expired')]
+    if not statuses:
+        st.success("No cases are waiting to be issued.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        status = st.selectbox("Cases in Status", statuses, key='issue_status')
+    with col2:
+        workers = st.number_input("Worker Processes", min_value=1, max_value=64,
+                                  value=os.cpu_count() or 1, key='issue_workers')
+    
+    case_ids = list(index.match(status=status))
+    st.markdown(f"**{len(case_ids):,}** case(s) will be issued.")
+    
+    if case_ids and st.button("🏭 Issue Policies", key='start_issuance'):
+        progress_bar = st.progress(0.0)
+        status_text = st.empty()
+        
+        def show_progress(report):
+            progress_bar.progress(min(report.issued / len(case_ids), 1.0))
+            status_text.markdown(f"{report.issued:,} of {len(case_ids):,} issued • "
+                                 f"{report.per_second:,.0f} policies/s")
+        
+        st.session_state.last_issuance = issue_batch(
+            get_case_store(), get_document_store(), get_sequence_allocator(), case_ids, engine=get_premium_engine(),
+            workers=int(workers), progress=show_progress
+        )
+        progress_bar.progress(1.0)
+    
+    report = st.session_state.get('last_issuance')
+    if report:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Policies Issued", f"{report.issued:,}")
+        col2.metric("Time", f"{report.seconds:.1f}s")
+        col3.metric("Throughput", f"{report.per_second:,.1f}/s")
+        col4.metric("PDFs Written", f"{report.pdf_bytes / 1e6:.1f} MB")
+        if report.already_issued:
+            st.warning(f"{report.already_issued:,} case(s) were already issued and kept their policy.")
+        if report.unpriced:
+            st.warning(f"{report.unpriced:,} case(s) have no premium or vehicle value and were not issued.")
+
+def render_renewal_management():
+    st.markdown("## 🔄 Renewal Management")
+    
+    store = get_case_store()
+    book = get_renewal_book()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Lapsed", f"{book.count_lapsed():,}")
+    col2.metric("Due in 7 Days", f"{book.count_due(7):,}")
+    col3.metric("Due in 30 Days", f"{book.count_due(30):,}")
+    col4.metric("Due in 90 Days", f"{book.count_due(90):,}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        window = st.selectbox("Renewal Window", RENEWAL_WINDOWS, index=RENEWAL_WINDOWS.index(30),
+                              format_func=lambda days: f"Next {days} days", key='renewal_window')
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        include_lapsed = st.checkbox("Include lapsed policies", key='renewal_include_lapsed')
+    
+    due_ids = book.due_within(window, include_lapsed=include_lapsed)
+    if not due_ids:
+        st.info("No policies are due for renewal in this window.")
+        return
+    
+    st.markdown(f"### 📋 {len(due_ids):,} Policies Due")
+    today = date.today()
+    shown = store.get_many(due_ids[:CASE_PAGE_SIZES[-1]])
+    st.dataframe(pd.DataFrame([{
+        'Policy Number': case.get('policy_number'),
+        'Customer': case.get('customer_name'),
+        'Registration': case.get('registration_number'),
+        'Vehicle': f"{case.get('vehicle_make', '')} {case.get('vehicle_model', '')}",
+        'Expiry Date': book.expiry(case['id']).strftime('%d %b %Y'),
+        'Days Left': (book.expiry(case['id']) - today).days,
+        'Assigned To': case.get('assigned_to'),
+        'Premium': case.get('premium_amount', 0),
+    } for case in shown]), use_container_width=True, hide_index=True)
+    if len(due_ids) > len(shown):
+        st.caption(f"Showing the {len(shown)} soonest of {len(due_ids):,} policies; "
+                   "renewal quotes cover all of them.")
+    
+    # Batch renewal quotes
+    st.markdown("### 💰 Renewal Quotes")
+    st.caption("Claim-free policies move up one NCB slab; IDV is depreciated for the renewal year.")
+    signature = (window, include_lapsed, store.version())
+    if st.button("⚡ Generate Renewal Quotes", key='generate_renewals'):
+        started = time.perf_counter()
+        with st.spinner(f"Pricing {len(due_ids):,} renewals..."):
+            quotes = renewal_quotes(store, get_premium_engine(), book, due_ids)
+        st.session_state.renewal_quotes = (signature, quotes, time.perf_counter() - started)
+    
+    saved = st.session_state.get('renewal_quotes')
+    if saved and saved[0] == signature:
+        _, quotes, elapsed = saved
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Policies Priced", f"{len(quotes):,}")
+        col2.metric("Renewal Premium", f"₹{quotes['renewal_premium'].sum():,.0f}")
+        col3.metric("Priced In", f"{elapsed:.2f}s")
+        st.dataframe(quotes.head(CASE_PAGE_SIZES[-1]), use_container_width=True, hide_index=True)
+        st.download_button("⬇️ Download Renewal Quotes", quotes.to_csv(index=False),
+                           file_name=f"renewal_quotes_{today.isoformat()}.csv", mime="text/csv",
+                           key='download_renewals')
+
 # Main page routing
 if "Dashboard" in selected_page:
     render_dashboard()
@@ -1846,15 +2065,23 @@ elif "Create New Case" in selected_page:
     render_case_creation()
 elif "Manage Cases" in selected_page or "Team Cases" in selected_page or "My Cases" in selected_page:
     render_manage_cases()
+elif "Team Analytics" in selected_page:
+    render_team_analytics()
 elif "Analytics" in selected_page:
-    st.markdown("## 📈 Analytics & Reports")
-    st.info("Advanced analytics dashboard would be implemented here with detailed charts, KPIs, and export options.")
+    render_analytics()
+elif "My Performance" in selected_page:
+    render_my_performance()
+elif "Bulk Import" in selected_page:
+    render_bulk_import()
+elif "Batch Issuance" in selected_page:
+    render_batch_issuance()
 elif "User Management" in selected_page:
     st.markdown("## 👥 User Management")
     st.info("User management interface for creating, editing, and managing user accounts and roles.")
 elif "Renewal Management" in selected_page:
-    st.markdown("## 🔄 Renewal Management") 
-    st.info("Renewal tracking and management system with automated alerts and assignment workflows.")
+    render_renewal_management()
+elif "Follow-ups" in selected_page:
+    render_followups()
 else:
     render_dashboard()
 
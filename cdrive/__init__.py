@@ -0,0 +1,6 @@
+"""Domain services for the CDrive Vehicle Insurance Management System.
+
+The Streamlit UI in ``app.py`` is a thin layer over the modules in this
+package.  Submodules are imported explicitly (``from cdrive.store import
+...``) so importing the package itself stays cheap.
+"""
@@ -0,0 +1,36 @@
+"""Dashboard aggregates computed in a single columnar pass over the case store."""
+from typing import Dict
+
+from cdrive.records import CaseColumns
+from cdrive.store import CaseStore
+
+INACTIVE_STATUSES = ['Policy Expired', 'Policy Issued']
+
+RECENT_CASES_LIMIT = 5
+
+
+def compute_dashboard_metrics(store: CaseStore) -> Dict:
+    """Build every dashboard KPI and chart series from one columnar pass.
+
+    The result is keyed by the store version it was computed at, so
+    callers can cache it until the next case is added or changed.
+    """
+    version = store.version()
+    columns = CaseColumns.from_store(store)
+
+    total_cases = len(columns)
+    total_premium = columns.total('premium_amount')
+    return {
+        'version': version,
+        'total_cases': total_cases,
+        'active_cases': total_cases - columns.count('status', INACTIVE_STATUSES),
+        'total_premium': total_premium,
+        'avg_case_value': total_premium / total_cases if total_cases > 0 else 0,
+        'comprehensive_policies': columns.count('coverage_type', ['Comprehensive']),
+        'total_vehicle_value': columns.total('vehicle_value'),
+        'status_counts': columns.value_counts('status'),
+        'make_counts': columns.value_counts('vehicle_make'),
+        'vehicle_type_counts': columns.value_counts('vehicle_type'),
+        'fuel_type_counts': columns.value_counts('fuel_type'),
+        'recent_cases': store.find(limit=RECENT_CASES_LIMIT),
+    }
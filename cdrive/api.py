@@ -0,0 +1,253 @@
+"""Headless JSON API for aggregators and other services.
+
+A plain ASGI application exposing case creation, quoting, issuance and
+search with the same validation, pricing and issuance code as the
+Streamlit app.  Quotes are priced on the event loop from the shared
+:class:`cdrive.quote_cache.QuoteCache`; anything that touches the
+database runs on a worker thread with a store borrowed from a
+:class:`cdrive.store.SQLiteStorePool`, so slow requests never hold up
+the loop.
+
+Routes::
+
+    GET  /health
+    POST /quotes              rating factors -> quote tiers
+    POST /cases               lead fields -> new case
+    GET  /cases?q=MH12AB      search, newest first
+    GET  /cases/{id}
+    POST /cases/{id}/issue    issue the policy and file its PDFs
+
+Serve with any ASGI server, e.g.::
+
+    python -m cdrive.api --port 8000 --workers 4
+"""
+import asyncio
+import json
+import logging
+import threading
+import zlib
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from cdrive.documents import DEFAULT_DOCUMENT_DIR, DocumentStore
+from cdrive.importer import lead_case, resolve_vehicle
+from cdrive.issuance import AlreadyIssuedError, UnpricedCaseError, issue_case
+from cdrive.pricing import PremiumEngine
+from cdrive.quote_cache import QuoteCache
+from cdrive.resolver import vehicle_resolver
+from cdrive.sequences import SequenceAllocator
+from cdrive.store import DEFAULT_DB_PATH, DEFAULT_POOL_SIZE, SQLiteStorePool
+from cdrive.validation import validate_lead, validate_quote
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# Issue requests for the same case wait on the same lock
+ISSUE_LOCK_STRIPES = 64
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, errors: Optional[List[str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.errors = errors
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _read_json(receive) -> Dict:
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_REQUEST_BYTES:
+            raise HTTPError(413, "Request body too large")
+        if not message.get('more_body'):
+            break
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    return data
+
+
+async def _send_json(send, status: int, payload):
+    body = json.dumps(payload, default=_encode_value, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class CaseAPI:
+    """The ASGI application. Stores are opened on startup, or on the first request."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, document_dir: str = DEFAULT_DOCUMENT_DIR,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.document_dir = document_dir
+        self.pool_size = pool_size
+        self.pool = None
+        self._open_lock = threading.Lock()
+        self._issue_locks = [threading.Lock() for _ in range(ISSUE_LOCK_STRIPES)]
+
+    def open(self):
+        with self._open_lock:
+            if self.pool is None:
+                self._open()
+
+    def _open(self):
+        self.engine = PremiumEngine()
+        self.quote_cache = QuoteCache(self.engine)
+        self.documents = DocumentStore(self.document_dir, self.db_path)
+        self.sequences = SequenceAllocator(self.db_path)
+        self.pool = SQLiteStorePool(self.db_path, self.pool_size)
+
+    def close(self):
+        with self._open_lock:
+            if self.pool is None:
+                return
+            self.pool.close()
+            self.documents.close()
+            self.sequences.close()
+            self.pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if self.pool is None:
+            await asyncio.to_thread(self.open)
+        try:
+            status, payload = await self._route(scope, receive)
+        except HTTPError as error:
+            status, payload = error.status, {'error': error.message}
+            if error.errors:
+                payload['errors'] = error.errors
+        except Exception:
+            logger.exception("Unhandled error in %s %s", scope.get('method'), scope.get('path'))
+            status, payload = 500, {'error': "Internal server error"}
+        await _send_json(send, status, payload)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.to_thread(self.open)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.to_thread(self.close)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _route(self, scope, receive) -> tuple:
+        method = scope['method']
+        parts = [part for part in scope['path'].split('/') if part]
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+
+        if parts == ['health'] and method == 'GET':
+            return 200, {'status': 'ok'}
+        if parts == ['quotes'] and method == 'POST':
+            return 200, self.quote(await _read_json(receive))
+        if parts == ['cases'] and method == 'POST':
+            data = await _read_json(receive)
+            return 201, await asyncio.to_thread(self.create_case, data)
+        if parts == ['cases'] and method == 'GET':
+            text = query.get('q', [''])[0]
+            try:
+                limit = int(query.get('limit', [DEFAULT_SEARCH_LIMIT])[0])
+            except ValueError:
+                limit = 0
+            # SQLite reads a negative LIMIT as no limit at all
+            if limit < 1:
+                raise HTTPError(400, f"limit must be a whole number from 1 to {MAX_SEARCH_LIMIT}")
+            limit = min(limit, MAX_SEARCH_LIMIT)
+            return 200, await asyncio.to_thread(self.search, text, limit)
+        if len(parts) == 2 and parts[0] == 'cases' and method == 'GET':
+            return 200, await asyncio.to_thread(self.get_case, parts[1])
+        if len(parts) == 3 and parts[0] == 'cases' and parts[2] == 'issue' and method == 'POST':
+            return 200, await asyncio.to_thread(self.issue, parts[1])
+        if parts[:1] in (['health'], ['quotes'], ['cases']):
+            raise HTTPError(405, f"{method} is not allowed here")
+        raise HTTPError(404, "Not found")
+
+    # Handlers
+
+    def quote(self, data: Dict) -> Dict:
+        factors, errors = validate_quote(resolve_vehicle(data, vehicle_resolver()))
+        if errors:
+            raise HTTPError(422, "Invalid quote request", errors)
+        return {'idv': factors['idv'], 'quotes': self.quote_cache.quotes(factors)}
+
+    def create_case(self, data: Dict) -> Dict:
+        fields, errors = validate_lead(resolve_vehicle(data, vehicle_resolver()))
+        if errors:
+            raise HTTPError(422, "Invalid case", errors)
+        case = {**lead_case(fields, datetime.now()), 'source': 'API'}
+        with self.pool.store() as store:
+            store.add(case)
+        return case
+
+    def get_case(self, case_id: str) -> Dict:
+        with self.pool.store() as store:
+            case = store.get(case_id)
+        if case is None:
+            raise HTTPError(404, f"Case '{case_id}' not found")
+        return case
+
+    def search(self, text: str, limit: int) -> Dict:
+        with self.pool.store() as store:
+            cases = store.get_many(store.search(text, limit))
+        return {'cases': cases}
+
+    def issue(self, case_id: str) -> Dict:
+        # The lock keeps this process from numbering a case twice; the store's
+        # conditional write settles races with other server processes
+        with self._issue_locks[zlib.crc32(case_id.encode()) % ISSUE_LOCK_STRIPES], self.pool.store() as store:
+            if store.get(case_id) is None:
+                raise HTTPError(404, f"Case '{case_id}' not found")
+            try:
+                return issue_case(store, self.documents, self.sequences, case_id, self.engine)
+            except AlreadyIssuedError as error:
+                raise HTTPError(409, f"Case '{case_id}' already has policy {error}")
+            except UnpricedCaseError:
+                raise HTTPError(422, f"Case '{case_id}' has no premium or vehicle value to price it from")
+
+
+app = CaseAPI()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the case API (set CDRIVE_DB_PATH to choose the database)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="server processes sharing the database")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError("The API server needs uvicorn: pip install uvicorn")
+    uvicorn.run('cdrive.api:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Vehicle and cover options offered by the case wizard."""
+
+# Makes, models and variants are in the vehicle master (cdrive.vehicles)
+
+VEHICLE_TYPES = ["Hatchback", "Sedan", "SUV", "MUV/MPV", "Coupe", "Convertible", "Pickup Truck", "Van"]
+
+FUEL_TYPES = ["Petrol", "Diesel", "CNG", "Electric", "Hybrid", "LPG"]
+
+COVERAGE_TYPES = ["Third Party", "Comprehensive"]
+
+POLICY_DURATIONS = ["1 Year", "2 Years", "3 Years"]
+
+DRIVER_AGES = ["18-25 years", "26-35 years", "36-50 years", "50+ years"]
+
+# Voluntary deductibles offered on comprehensive cover (₹)
+DEDUCTIBLE_AMOUNTS = [0, 1000, 2500, 5000, 7500, 10000, 15000]
+
+# Add-on flags that change the feature lists of the comprehensive plans
+ADDON_FIELDS = [
+    'zero_depreciation',
+    'engine_protect',
+    'roadside_assistance',
+    'consumables_cover',
+    'key_replacement',
+    'return_invoice',
+]
+
+# Steps of the case wizard; a case's ``step`` is the 1-based position reached
+CASE_STEPS = [
+    "Customer Details",
+    "Vehicle Details",
+    "Coverage Options",
+    "Quote Generation",
+    "Documentation",
+    "Policy Finalization",
+    "Payment Processing",
+    "Policy Issuance",
+    "Follow-up Setup",
+]
+
+EXECUTIVES = ["Priya Sharma", "Amit Singh", "Sneha Patel", "Rahul Verma", "Neha Gupta", "Rohit Kumar", "Kavita Jain"]
+
+# No Claim Bonus slabs (%)
+NCB_SLABS = [0, 20, 25, 35, 45, 50]
+
+# NCB earned at renewal after a claim-free year: the next slab, capped at the top one
+NCB_STEP_UP = dict(zip(NCB_SLABS, NCB_SLABS[1:] + NCB_SLABS[-1:]))
+
+# Current vehicle value limits (₹)
+MIN_VEHICLE_VALUE = 50000
+MAX_VEHICLE_VALUE = 50000000
+
+# Manufacturing years offered, counting back from the current year
+VEHICLE_YEAR_SPAN = 25
@@ -0,0 +1,228 @@
+"""Content-addressed storage for case documents.
+
+Uploads are copied to disk in fixed-size chunks while their SHA-256 is
+computed, so a file is never held in memory whole.  Files are stored
+once under their hash: a second upload of the same RC or licence scan
+only adds a metadata row pointing at the existing file.  Metadata lives
+in a ``documents`` table keyed by case id, next to the cases.
+
+Thumbnails for image uploads are made on a background thread pool and
+need Pillow; without it documents are stored without thumbnails.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional
+
+from cdrive.store import DEFAULT_DB_PATH
+
+DEFAULT_DOCUMENT_DIR = os.environ.get('CDRIVE_DOCUMENT_DIR', 'cdrive_documents')
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+DEFAULT_THUMBNAIL_WORKERS = 2
+
+DOCUMENT_FIELDS = ['id', 'case_id', 'name', 'sha256', 'size', 'content_type', 'uploaded_at']
+
+# Documents collected in step 5 of the case wizard
+REQUIRED_DOCUMENTS = [
+    'Registration Certificate (RC)',
+    'Valid Driving License',
+    'Previous Insurance Policy',
+    'Vehicle Photos (4 angles)',
+    'Identity Proof (Aadhar/Passport)',
+    'Address Proof',
+    'Pollution Under Control (PUC) Certificate'
+]
+COMMERCIAL_DOCUMENTS = ['Commercial License', 'Fitness Certificate']
+FINANCED_DOCUMENTS = ['Loan Agreement', 'NOC from Financier']
+NEW_VEHICLE_DOCUMENTS = ['Vehicle Invoice/Bill of Sale']
+
+VERIFICATION_ITEMS = [
+    "RC matches vehicle details entered",
+    "DL is valid and not expired",
+    "Vehicle photos are clear and show damage (if any)",
+    "Previous policy shows NCB eligibility",
+    "All documents are clearly readable"
+]
+
+
+def required_documents(case: Dict, is_financed: bool = False) -> List[str]:
+    """Documents to collect for ``case``, in checklist order."""
+    documents = list(REQUIRED_DOCUMENTS)
+    if 'commercial' in case.get('vehicle_type', 'Hatchback').lower():
+        documents.extend(COMMERCIAL_DOCUMENTS)
+    if is_financed:
+        documents.extend(FINANCED_DOCUMENTS)
+    # First-time buyers have no previous policy but show the invoice instead
+    if not case.get('has_previous_insurance', False):
+        documents.remove('Previous Insurance Policy')
+        documents.extend(NEW_VEHICLE_DOCUMENTS)
+    return documents
+
+
+@dataclass
+class StoredDocument:
+    id: int
+    case_id: str
+    name: str
+    sha256: str
+    size: int
+    content_type: Optional[str]
+    uploaded_at: str
+    # True when the content was already on disk and no new file was written
+    duplicate: bool = False
+
+
+class DocumentStore:
+    """Files under ``root`` addressed by SHA-256, with metadata in SQLite."""
+
+    def __init__(self, root: str = DEFAULT_DOCUMENT_DIR, db_path: str = DEFAULT_DB_PATH,
+                 thumbnail_workers: int = DEFAULT_THUMBNAIL_WORKERS):
+        self.root = root
+        for folder in ('blobs', 'thumbnails', 'incoming'):
+            os.makedirs(os.path.join(root, folder), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._thumbnails = ThreadPoolExecutor(max_workers=thumbnail_workers, thread_name_prefix='thumbnail')
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    case_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    content_type TEXT,
+                    uploaded_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_documents_case ON documents (case_id)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_documents_sha256 ON documents (sha256)')
+
+    def close(self):
+        self._thumbnails.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+    # Paths
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, 'blobs', sha256[:2], sha256[2:4], sha256)
+
+    def thumbnail_path(self, sha256: str) -> Optional[str]:
+        """Path of a finished thumbnail, or None if there is none (yet)."""
+        path = os.path.join(self.root, 'thumbnails', f'{sha256}.jpg')
+        return path if os.path.exists(path) else None
+
+    def open(self, sha256: str) -> BinaryIO:
+        return open(self.path(sha256), 'rb')
+
+    # Writes
+
+    def _write_blob(self, source: BinaryIO, chunk_size: int) -> tuple:
+        # Copy to a temporary file while hashing, then move it into place
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'incoming'))
+        try:
+            with os.fdopen(handle, 'wb') as temp:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            path = self.path(sha256)
+            if os.path.exists(path):
+                return sha256, size, True
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            return sha256, size, False
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def save(self, case_id: str, source: BinaryIO, name: str, content_type: Optional[str] = None,
+             chunk_size: int = UPLOAD_CHUNK_SIZE) -> StoredDocument:
+        """Stream ``source`` to disk and record it against ``case_id``.
+
+        Saving content the case already has returns the existing record.
+        """
+        sha256, size, duplicate = self._write_blob(source, chunk_size)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT {', '.join(DOCUMENT_FIELDS)} FROM documents WHERE case_id = ? AND sha256 = ?",
+                (case_id, sha256)
+            ).fetchone()
+            if row is not None:
+                return StoredDocument(*row, duplicate=True)
+            uploaded_at = datetime.now().isoformat()
+            cursor = self._conn.execute(
+                'INSERT INTO documents (case_id, name, sha256, size, content_type, uploaded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (case_id, name, sha256, size, content_type, uploaded_at)
+            )
+        document = StoredDocument(cursor.lastrowid, case_id, name, sha256, size, content_type,
+                                  uploaded_at, duplicate=duplicate)
+        if not duplicate and os.path.splitext(name)[1].lower() in THUMBNAIL_EXTENSIONS:
+            self._thumbnails.submit(self._make_thumbnail, sha256)
+        return document
+
+    def _make_thumbnail(self, sha256: str):
+        try:
+            from PIL import Image
+        except ImportError:
+            return
+        target = os.path.join(self.root, 'thumbnails', f'{sha256}.jpg')
+        handle, temp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'incoming'), suffix='.jpg')
+        os.close(handle)
+        try:
+            with Image.open(self.path(sha256)) as image:
+                image.thumbnail(THUMBNAIL_SIZE)
+                image.convert('RGB').save(temp_path, 'JPEG', quality=80)
+            os.replace(temp_path, target)
+        except (OSError, ValueError):
+            pass  # Not a readable image; the document is kept without a thumbnail
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    # Reads
+
+    def for_case(self, case_id: str) -> List[StoredDocument]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(DOCUMENT_FIELDS)} FROM documents WHERE case_id = ? ORDER BY id",
+                (case_id,)
+            ).fetchall()
+        return [StoredDocument(*row) for row in rows]
+
+    def stats(self) -> dict:
+        """Uploaded versus stored bytes, showing what deduplication saved."""
+        with self._lock:
+            uploads, uploaded_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents'
+            ).fetchone()
+            files, stored_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM '
+                '(SELECT sha256, MAX(size) AS size FROM documents GROUP BY sha256)'
+            ).fetchone()
+        return {'uploads': uploads, 'uploaded_bytes': uploaded_bytes,
+                'files': files, 'stored_bytes': stored_bytes}
@@ -0,0 +1,242 @@
+"""Streaming export of cases to CSV, Parquet and XLSX.
+
+Cases are read from the store in keyset-paged chunks and every format is
+produced by a generator that yields the encoded bytes for one chunk at a
+time, so an export of the whole book never holds more than one chunk of
+rows in memory.  XLSX is written as a streamed zip without any Excel
+library.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+from cdrive.plans import case_plan_name
+from cdrive.store import CaseStore, page_cursor
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# (column, kind) pairs; numeric columns stay numeric in Parquet and XLSX
+EXPORT_COLUMNS = [
+    ('id', 'text'),
+    ('customer_name', 'text'),
+    ('customer_phone', 'text'),
+    ('customer_email', 'text'),
+    ('vehicle_make', 'text'),
+    ('vehicle_model', 'text'),
+    ('vehicle_variant', 'text'),
+    ('vehicle_year', 'number'),
+    ('registration_number', 'text'),
+    ('vehicle_type', 'text'),
+    ('fuel_type', 'text'),
+    ('engine_capacity', 'text'),
+    ('vehicle_value', 'number'),
+    ('idv', 'number'),
+    ('coverage_type', 'text'),
+    ('plan', 'text'),
+    ('premium_amount', 'number'),
+    ('ncb_percentage', 'number'),
+    ('deductible', 'number'),
+    ('policy_duration', 'text'),
+    ('policy_number', 'text'),
+    ('policy_expiry_date', 'text'),
+    ('status', 'text'),
+    ('assigned_to', 'text'),
+    ('created_date', 'text'),
+    ('follow_up_date', 'text'),
+    ('renewal_date', 'text'),
+]
+
+EXPORT_COLUMN_NAMES = [column for column, _ in EXPORT_COLUMNS]
+
+
+def iter_case_chunks(store: CaseStore, chunk_size: int = EXPORT_CHUNK_SIZE,
+                     ids: Optional[List[str]] = None, **filters) -> Iterator[List[Dict]]:
+    """Yield matching cases newest first, ``chunk_size`` at a time.
+
+    When ``ids`` is given those cases are exported in that order and
+    ``filters`` are ignored.
+    """
+    if ids is not None:
+        for start in range(0, len(ids), chunk_size):
+            yield store.get_many(ids[start:start + chunk_size])
+        return
+    cursor = None
+    while True:
+        cases = store.find_page(chunk_size, cursor=cursor, **filters)
+        if not cases:
+            return
+        yield cases
+        cursor = page_cursor(cases[-1])
+
+
+def _export_value(case: Dict, column: str, kind: str):
+    if column == 'plan':
+        value = case_plan_name(case)
+    else:
+        value = case.get(column)
+    if value is None or value == '':
+        return None
+    if kind == 'number':
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def export_rows(cases: Iterable[Dict]) -> List[list]:
+    return [[_export_value(case, column, kind) for column, kind in EXPORT_COLUMNS] for case in cases]
+
+
+class _ChunkSink(io.RawIOBase):
+    # Unseekable file object that hands back whatever was written since the last drain
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def csv_stream(case_chunks: Iterable[List[Dict]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMN_NAMES)
+    for cases in case_chunks:
+        writer.writerows(['' if value is None else value for value in row] for row in export_rows(cases))
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def parquet_stream(case_chunks: Iterable[List[Dict]]) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet exports need pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (column, pa.float64() if kind == 'number' else pa.string()) for column, kind in EXPORT_COLUMNS
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for cases in case_chunks:
+            rows = export_rows(cases)
+            columns = list(zip(*rows)) if rows else [[] for _ in EXPORT_COLUMNS]
+            # Each chunk becomes its own row group, flushed before the next is read
+            writer.write_table(pa.Table.from_arrays([pa.array(column, type=field.type)
+                                                     for column, field in zip(columns, schema)],
+                                                    schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""
+
+_XLSX_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Cases" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""
+
+# Control characters are not allowed in XML text
+_XML_ILLEGAL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xlsx_row(values: list) -> str:
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, float):
+            cells.append(f'<c><v>{value!r}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL_CHARS.sub('', value))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def xlsx_stream(case_chunks: Iterable[List[Dict]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            sheet.write(_xlsx_row(EXPORT_COLUMN_NAMES).encode('utf-8'))
+            for cases in case_chunks:
+                sheet.write(''.join(_xlsx_row(row) for row in export_rows(cases)).encode('utf-8'))
+                yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+def stream_export(case_chunks: Iterable[List[Dict]], file_format: str) -> Iterator[bytes]:
+    """Encode case chunks as ``file_format``, yielding bytes as each chunk is done."""
+    if file_format == 'csv':
+        return csv_stream(case_chunks)
+    if file_format == 'parquet':
+        return parquet_stream(case_chunks)
+    if file_format == 'xlsx':
+        return xlsx_stream(case_chunks)
+    raise ValueError(f"Unsupported export format '{file_format}'")
+
+
+def write_export(case_chunks: Iterable[List[Dict]], file_format: str, destination) -> int:
+    """Stream an export into an open binary file. Returns the bytes written."""
+    written = 0
+    for data in stream_export(case_chunks, file_format):
+        destination.write(data)
+        written += len(data)
+    return written
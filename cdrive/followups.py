@@ -0,0 +1,211 @@
+"""Follow-up task scheduling for executives.
+
+Every follow-up date picked in step 9 of the case wizard becomes a task
+row.  Open tasks are indexed by ``(assigned_to, due, id)``, so an
+executive's queue of today's and overdue tasks is read a page at a time
+straight off the index, however many tasks they have in total.  A
+background thread moves open tasks whose due date has passed to
+``Overdue``.
+"""
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from cdrive.store import DEFAULT_DB_PATH
+
+# Follow-up kinds collected by the wizard, with their display names
+FOLLOWUP_KINDS = {
+    'customer': 'Customer Satisfaction Call',
+    'renewal': 'Renewal Reminder',
+    'payment': 'Premium Payment',
+    'service': 'Service Check',
+}
+
+TASK_STATUSES = ['Open', 'Overdue', 'Done']
+
+TASK_FIELDS = ['id', 'case_id', 'kind', 'assigned_to', 'due', 'status', 'notes', 'created_at', 'completed_at']
+
+OVERDUE_CHECK_SECONDS = 300
+
+UPCOMING_DAYS = 7
+
+
+def _iso_day(value) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def task_cursor(task: Dict) -> tuple:
+    """Keyset cursor for paging past ``task`` in due order."""
+    return (task['due'], task['id'])
+
+
+class FollowUpScheduler:
+    """SQLite-backed queue of follow-up tasks.
+
+    Tasks live in the case database by default, on a connection of their
+    own so scheduling never waits on the case store's lock.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._worker = None
+        self._stop = threading.Event()
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS followup_tasks (
+                    id INTEGER PRIMARY KEY,
+                    case_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    assigned_to TEXT NOT NULL,
+                    due TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'Open',
+                    notes TEXT,
+                    created_at TEXT NOT NULL,
+                    completed_at TEXT
+                )
+            """)
+            # Each executive's open tasks in due order: the work queue
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_followups_queue ON followup_tasks (assigned_to, due, id) '
+                "WHERE status != 'Done'"
+            )
+            # Open tasks by due date, for the overdue sweep
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_followups_open_due ON followup_tasks (due) '
+                "WHERE status = 'Open'"
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_followups_case ON followup_tasks (case_id)'
+            )
+
+    def close(self):
+        self.stop_overdue_worker()
+        with self._lock:
+            self._conn.close()
+
+    # Writes
+
+    def schedule(self, case_id: str, assigned_to: str, due_dates: Dict[str, date], notes: str = '') -> int:
+        """Create one task per ``FOLLOWUP_KINDS`` key in ``due_dates``. Returns the count."""
+        return self.schedule_many([
+            {'case_id': case_id, 'kind': kind, 'assigned_to': assigned_to, 'due': due, 'notes': notes}
+            for kind, due in due_dates.items() if due is not None
+        ])
+
+    def schedule_many(self, tasks: List[Dict]) -> int:
+        """Insert several tasks in a single transaction. Returns the count."""
+        today = date.today().isoformat()
+        created_at = datetime.now().isoformat()
+        rows = []
+        for task in tasks:
+            if task['kind'] not in FOLLOWUP_KINDS:
+                raise ValueError(f"Unknown follow-up kind '{task['kind']}'")
+            due = _iso_day(task['due'])
+            rows.append((task['case_id'], task['kind'], task['assigned_to'] or 'Unassigned', due,
+                         'Overdue' if due < today else 'Open', task.get('notes') or '', created_at))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO followup_tasks (case_id, kind, assigned_to, due, status, notes, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def complete(self, task_id: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE followup_tasks SET status = 'Done', completed_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), task_id)
+            )
+
+    def mark_overdue(self, today: Optional[date] = None) -> int:
+        """Move open tasks due before ``today`` to Overdue. Returns how many changed."""
+        today = today or date.today()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE followup_tasks SET status = 'Overdue' WHERE status = 'Open' AND due < ?",
+                (today.isoformat(),)
+            ).rowcount
+
+    # Background overdue sweep
+
+    def start_overdue_worker(self, interval: float = OVERDUE_CHECK_SECONDS):
+        """Run :meth:`mark_overdue` now and every ``interval`` seconds on a daemon thread."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+
+        def sweep():
+            while not self._stop.is_set():
+                try:
+                    self.mark_overdue()
+                except sqlite3.Error:
+                    pass  # Database busy or closing; try again next round
+                self._stop.wait(interval)
+
+        self._worker = threading.Thread(target=sweep, name='followup-overdue', daemon=True)
+        self._worker.start()
+
+    def stop_overdue_worker(self):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    # Reads
+
+    def _tasks(self, sql: str, params=()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def queue(self, assigned_to: str, limit: int, cursor: Optional[tuple] = None,
+              until: Optional[date] = None) -> List[Dict]:
+        """Open and overdue tasks for ``assigned_to`` due by ``until`` (default today), oldest first.
+
+        ``cursor`` is the :func:`task_cursor` of the last task on the
+        previous page.
+        """
+        until = until or date.today()
+        sql = (f"SELECT {', '.join(TASK_FIELDS)} FROM followup_tasks "
+               "WHERE assigned_to = ? AND status != 'Done' AND due <= ?")
+        params = [assigned_to, until.isoformat()]
+        if cursor is not None:
+            sql += ' AND (due, id) > (?, ?)'
+            params.extend(cursor)
+        sql += ' ORDER BY due, id LIMIT ?'
+        params.append(limit)
+        return self._tasks(sql, params)
+
+    def counts(self, assigned_to: str, today: Optional[date] = None) -> Dict[str, int]:
+        """Overdue, due-today and upcoming open task counts for ``assigned_to``."""
+        today = today or date.today()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT "
+                "    SUM(due < :today), SUM(due = :today), SUM(due > :today) "
+                "FROM followup_tasks "
+                "WHERE assigned_to = :assigned_to AND status != 'Done' AND due <= :upcoming",
+                {'assigned_to': assigned_to, 'today': today.isoformat(),
+                 'upcoming': (today + timedelta(days=UPCOMING_DAYS)).isoformat()}
+            ).fetchone()
+        return {'overdue': row[0] or 0, 'today': row[1] or 0, 'upcoming': row[2] or 0}
+
+    def for_case(self, case_id: str) -> List[Dict]:
+        return self._tasks(
+            f"SELECT {', '.join(TASK_FIELDS)} FROM followup_tasks WHERE case_id = ? ORDER BY due, id",
+            (case_id,)
+        )
@@ -0,0 +1,210 @@
+"""Bulk import of dealer lead files into the case store.
+
+Files are read in fixed-size chunks, each row is checked with
+:func:`cdrive.validation.validate_lead`, valid rows are written to the
+store one transaction per chunk and rejected rows are streamed to a CSV
+report.  Memory use depends on the chunk size, not the file size.
+Dealer spellings of makes, models and variants are first mapped to the
+vehicle master by :mod:`cdrive.resolver`.
+
+Run from the command line with::
+
+    python -m cdrive.importer leads.csv --report rejected.csv
+"""
+import csv
+import io
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from cdrive.resolver import VehicleResolver, vehicle_resolver
+from cdrive.store import CaseStore
+from cdrive.validation import is_blank, validate_lead
+
+DEFAULT_CHUNK_SIZE = 5000
+
+IMPORT_FORMATS = ['csv', 'parquet']
+
+
+@dataclass
+class ImportResult:
+    total_rows: int = 0
+    imported: int = 0
+    rejected: int = 0
+    # Rows whose vehicle names or blank spec columns were taken from the vehicle master
+    resolved: int = 0
+    report_path: Optional[str] = None
+
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import file '{filename}'; expected CSV or Parquet")
+    return extension
+
+
+def _csv_chunks(source, chunk_size: int) -> Iterator[List[Dict]]:
+    if isinstance(source, io.TextIOBase):
+        text = source
+    else:
+        text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parquet_chunks(source, chunk_size: int) -> Iterator[List[Dict]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet imports need pyarrow: pip install pyarrow")
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+def read_chunks(source, file_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """Yield lists of up to ``chunk_size`` raw rows from a CSV or Parquet file."""
+    if file_format == 'csv':
+        return _csv_chunks(source, chunk_size)
+    if file_format == 'parquet':
+        return _parquet_chunks(source, chunk_size)
+    raise ValueError(f"Unsupported import format '{file_format}'")
+
+
+def lead_case(data: Dict, created_date: datetime) -> Dict:
+    """Turn validated lead fields into a new case record."""
+    return {
+        **data,
+        'id': str(uuid.uuid4()),
+        'premium_amount': 0,
+        'status': 'New Lead',
+        'created_date': created_date,
+        'follow_up_date': None,
+        'documents': [],
+        'step': 1,
+        'source': 'Bulk Import',
+    }
+
+
+def resolve_vehicle(row: Dict, resolver: VehicleResolver) -> Dict:
+    """``row`` with its vehicle names replaced by the master's, when they resolve.
+
+    Blank type, fuel and engine columns are filled from the variant's
+    spec, or from the model's when all its variants agree.  Unresolved
+    names are left for validation to reject.
+    """
+    names = ['' if is_blank(row.get(field)) else row[field]
+             for field in ('vehicle_make', 'vehicle_model', 'vehicle_variant')]
+    if not all(isinstance(name, (str, int, float)) for name in names):
+        return row
+    resolution = resolver.resolve(*names)
+    if resolution is None:
+        return row
+    resolved = {**row, 'vehicle_make': resolution.make}
+    if resolution.model is not None:
+        resolved['vehicle_model'] = resolution.model
+    if resolution.variant is not None:
+        resolved['vehicle_variant'] = resolution.variant
+    for field, value in resolver.case_fields(resolution).items():
+        if field != 'vehicle_value' and is_blank(row.get(field)):
+            resolved[field] = value
+    return resolved
+
+
+class _RejectReport:
+    # Opened on the first rejected row so clean imports leave no file behind
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._writer = None
+
+    def write(self, row_number: int, row: Dict, errors: List[str]):
+        if self._writer is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._fields = list(row.keys())
+            self._writer.writerow(['row_number', 'errors', *self._fields])
+        self._writer.writerow([row_number, '; '.join(errors), *[row.get(field, '') for field in self._fields]])
+
+    def close(self) -> Optional[str]:
+        if self._file is None:
+            return None
+        self._file.close()
+        return self.path
+
+
+def import_cases(store: CaseStore, source, file_format: str, report_path: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 progress: Optional[Callable[[ImportResult], None]] = None,
+                 resolver: Optional[VehicleResolver] = None) -> ImportResult:
+    """Stream ``source`` into ``store`` and return the import totals.
+
+    ``source`` is a path or an open file.  ``progress`` is called with
+    the running totals after each chunk is written.  Vehicle names are
+    resolved with the process-wide resolver unless ``resolver`` is given.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as handle:
+            return import_cases(store, handle, file_format, report_path, chunk_size, progress, resolver)
+
+    resolver = resolver or vehicle_resolver()
+    result = ImportResult()
+    report = _RejectReport(report_path)
+    try:
+        for chunk in read_chunks(source, file_format, chunk_size):
+            valid = []
+            for row in chunk:
+                result.total_rows += 1
+                resolved = resolve_vehicle(row, resolver)
+                if resolved is not row and any(resolved.get(field) != row.get(field) for field in resolved):
+                    result.resolved += 1
+                data, errors = validate_lead(resolved)
+                if errors:
+                    result.rejected += 1
+                    # Report the row as it was in the file
+                    report.write(result.total_rows, row, errors)
+                else:
+                    valid.append(lead_case(data, datetime.now()))
+            result.imported += store.add_many(valid)
+            if progress is not None:
+                progress(result)
+    finally:
+        result.report_path = report.close()
+    return result
+
+
+def main(argv=None):
+    import argparse
+
+    from cdrive.store import DEFAULT_DB_PATH, SQLiteCaseStore
+
+    parser = argparse.ArgumentParser(description="Import a CSV or Parquet lead file into the case store")
+    parser.add_argument('path', help="lead file (.csv or .parquet)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="case store database")
+    parser.add_argument('--report', default='rejected_rows.csv', help="where to write rejected rows")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    store = SQLiteCaseStore(args.db)
+    result = import_cases(
+        store, args.path, detect_format(args.path), args.report, args.chunk_size,
+        progress=lambda totals: print(f"{totals.total_rows:,} rows read, {totals.imported:,} imported, "
+                                      f"{totals.rejected:,} rejected", flush=True)
+    )
+    if result.resolved:
+        print(f"{result.resolved:,} rows had vehicle names matched to the vehicle master")
+    if result.report_path:
+        print(f"Rejected rows written to {result.report_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""In-memory inverted indexes for the Manage Cases filters.
+
+Every case gets a slot number, with slots ordered by ``(created_date,
+id)``.  Each indexed field maps its values to a bitmap of slots (a plain
+Python int), so a filter combination resolves by ANDing a few bitmaps,
+counts with ``bit_count`` and pages newest-first by walking the highest
+set bits below a cursor.
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from cdrive.store import CaseStore, page_cursor
+
+FILTER_FIELDS = ['status', 'vehicle_make', 'assigned_to', 'coverage_type']
+
+
+def _bitmap(slots: List[int], offset: int = 0) -> int:
+    # Build the int through a byte buffer instead of OR-ing one bit at a time
+    if not slots:
+        return 0
+    bits = bytearray((max(slots) - offset) // 8 + 1)
+    for slot in slots:
+        slot -= offset
+        bits[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(bits, 'little') << offset
+
+
+class FilterIndex:
+    """Value -> case bitmap index over ``FILTER_FIELDS``.
+
+    The index subscribes to the store and is updated as cases are added
+    or changed, so it only reads the whole store once when it is built.
+    """
+
+    def __init__(self, store: CaseStore, fields: Optional[List[str]] = None):
+        self.fields = list(fields or FILTER_FIELDS)
+        self._lock = threading.RLock()
+        rows = store.columns(['id', 'created_date', *self.fields])
+        self._rebuild([(row[0], row[1] or '', tuple(row[2:])) for row in rows])
+        store.subscribe(self.apply)
+
+    def _rebuild(self, entries: List[tuple]):
+        entries.sort(key=lambda entry: (entry[1], entry[0]))
+        self._ids = [case_id for case_id, _, _ in entries]
+        self._keys = [(created, case_id) for case_id, created, _ in entries]
+        self._values = [values for _, _, values in entries]
+        self._slots = {case_id: slot for slot, case_id in enumerate(self._ids)}
+        self._postings = {field: {} for field in self.fields}
+        self._add_postings(0)
+
+    def _add_postings(self, first_slot: int):
+        for position, field in enumerate(self.fields):
+            slots_by_value = {}
+            for slot in range(first_slot, len(self._values)):
+                slots_by_value.setdefault(self._values[slot][position], []).append(slot)
+            postings = self._postings[field]
+            for value, slots in slots_by_value.items():
+                postings[value] = postings.get(value, 0) | _bitmap(slots, first_slot)
+
+    def _set_value(self, field: str, old, new, slot: int):
+        postings = self._postings[field]
+        bit = 1 << slot
+        remaining = postings[old] & ~bit
+        if remaining:
+            postings[old] = remaining
+        else:
+            del postings[old]
+        postings[new] = postings.get(new, 0) | bit
+
+    def apply(self, cases: List[Dict]):
+        """Store listener: index new cases and re-index changed ones."""
+        with self._lock:
+            first_new_slot = len(self._ids)
+            needs_rebuild = False
+            for case in cases:
+                key = page_cursor(case)
+                key = (key[0] or '', key[1])
+                values = tuple(case.get(field) for field in self.fields)
+                slot = self._slots.get(case['id'])
+                if slot is None:
+                    # New cases are normally the newest; anything older forces a re-sort
+                    if self._keys and key < self._keys[-1]:
+                        needs_rebuild = True
+                    self._slots[case['id']] = len(self._ids)
+                    self._ids.append(case['id'])
+                    self._keys.append(key)
+                    self._values.append(values)
+                    continue
+                if key != self._keys[slot]:
+                    self._keys[slot] = key
+                    needs_rebuild = True
+                if slot >= first_new_slot:
+                    self._values[slot] = values
+                    continue
+                for position, field in enumerate(self.fields):
+                    if values[position] != self._values[slot][position]:
+                        self._set_value(field, self._values[slot][position], values[position], slot)
+                self._values[slot] = values
+
+            if needs_rebuild:
+                self._rebuild([(case_id, key[0], self._values[slot])
+                               for slot, (case_id, key) in enumerate(zip(self._ids, self._keys))])
+            elif len(self._ids) > first_new_slot:
+                self._add_postings(first_new_slot)
+
+    # Queries
+
+    def options(self, field: str) -> List:
+        """Distinct values of ``field`` that at least one case has."""
+        with self._lock:
+            return sorted(value for value in self._postings[field] if value is not None)
+
+    def _match(self, filters: Dict, ids: Optional[List[str]] = None) -> int:
+        if ids is None:
+            bitmap = (1 << len(self._ids)) - 1
+        else:
+            bitmap = _bitmap([self._slots[case_id] for case_id in ids if case_id in self._slots])
+        for field, value in filters.items():
+            if field not in self._postings:
+                raise ValueError(f"Field '{field}' is not indexed")
+            bitmap &= self._postings[field].get(value, 0)
+            if not bitmap:
+                break
+        return bitmap
+
+    def count(self, ids: Optional[List[str]] = None, **filters) -> int:
+        """Number of cases matching ``filters``, optionally only among ``ids``."""
+        with self._lock:
+            return self._match(filters, ids).bit_count()
+
+    def match(self, **filters) -> set:
+        """Ids of all cases matching ``filters``."""
+        with self._lock:
+            bitmap = self._match(filters)
+            data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+            return {
+                self._ids[(byte_index << 3) + bit]
+                for byte_index, byte in enumerate(data) if byte
+                for bit in range(8) if byte >> bit & 1
+            }
+
+    def page(self, limit: int, cursor: Optional[tuple] = None,
+             ids: Optional[List[str]] = None, **filters) -> List[str]:
+        """Ids of up to ``limit`` matching cases, newest first, older than ``cursor``.
+
+        ``cursor`` is the :func:`cdrive.store.page_cursor` of the last case
+        on the previous page.  ``ids`` restricts the page to a candidate
+        set, such as search results.
+        """
+        with self._lock:
+            bitmap = self._match(filters, ids)
+            if cursor is not None:
+                bitmap &= (1 << bisect_left(self._keys, (cursor[0] or '', cursor[1]))) - 1
+            ids = []
+            while bitmap and len(ids) < limit:
+                slot = bitmap.bit_length() - 1
+                ids.append(self._ids[slot])
+                bitmap ^= 1 << slot
+            return ids
@@ -0,0 +1,497 @@
+"""Policy issuance: certificate and insurance card PDFs.
+
+Both documents are laid out from the templates below and written with a
+small built-in PDF writer (standard Helvetica fonts, no PDF library), so
+rendering is pure Python and safe to run in worker processes.
+
+:func:`issue_batch` issues many cases at once: rendering is spread over a
+process pool while the parent process stamps the cases, files the PDFs
+in the :class:`cdrive.documents.DocumentStore` and reports throughput.
+
+Run from the command line with::
+
+    python -m cdrive.issuance --status "Quote Generated" --workers 8
+"""
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+from cdrive.documents import DocumentStore
+from cdrive.plans import case_plan_id, case_plan_name, plan_selection
+from cdrive.pricing import PremiumEngine, suggested_idv
+from cdrive.renewals import policy_expiry_date
+from cdrive.sequences import SequenceAllocator
+from cdrive.store import CaseStore
+
+ISSUED_STATUS = 'Policy Issued'
+
+ISSUE_CHUNK_SIZE = 200
+
+# Case fields a batch issue writes back
+ISSUE_FIELDS = ['status', 'step', 'policy_start_date', 'policy_expiry_date', 'policy_number', 'premium_amount',
+                'idv', 'plan_id', 'plan_version']
+
+# Page sizes in points
+A4 = (595, 842)
+CARD = (243, 153)
+
+BRAND_COLOR = (0.18, 0.525, 0.671)  # #2E86AB
+
+POLICY_TEMPLATE = [
+    ('Policy Information', [
+        ('Policy Number', 'policy_number'),
+        ('Issue Date', 'issue_date'),
+        ('Effective Date', 'issue_date'),
+        ('Expiry Date', 'expiry_date'),
+        ('Policy Duration', 'policy_duration'),
+    ]),
+    ('Policyholder', [
+        ('Name', 'customer_name'),
+        ('Contact', 'customer_phone'),
+        ('Email', 'customer_email'),
+    ]),
+    ('Vehicle Details', [
+        ('Vehicle', 'vehicle'),
+        ('Year', 'vehicle_year'),
+        ('Registration', 'registration_number'),
+        ('Engine', 'engine_capacity'),
+        ('Fuel Type', 'fuel_type'),
+    ]),
+    ('Coverage Summary', [
+        ('Coverage Type', 'coverage_type'),
+        ('Plan', 'plan'),
+        ('IDV (Insured Declared Value)', 'idv'),
+        ('Voluntary Deductible', 'deductible'),
+    ]),
+    ('Premium Details', [
+        ('Annual Premium', 'premium_amount'),
+        ('NCB Applied', 'ncb_percentage'),
+    ]),
+]
+
+CARD_TEMPLATE = [
+    ('Policy', 'policy_number'),
+    ('Insured', 'customer_name'),
+    ('Vehicle', 'registration_number'),
+    ('Valid', 'validity'),
+    ('IDV', 'idv'),
+    ('Coverage', 'coverage_type'),
+]
+
+POLICY_NOTES = [
+    'Keep this policy number safe for all future communications',
+    'Claims must be intimated within 48 hours of incident',
+    'Policy documents will be sent to your registered email',
+    'Premium payment receipt will be generated separately',
+    'For claims assistance: Call 1800-XXX-XXXX (24x7)',
+]
+
+ADDON_NAMES = {
+    'zero_depreciation': 'Zero Depreciation Cover',
+    'engine_protect': 'Engine Protection Cover',
+    'roadside_assistance': '24x7 Roadside Assistance',
+    'consumables_cover': 'Consumables Cover',
+    'key_replacement': 'Key Replacement Cover',
+    'return_invoice': 'Return to Invoice Cover',
+}
+
+
+def policy_terms(case: Dict) -> List[str]:
+    """Key terms shown for acceptance before a policy is finalized."""
+    terms = [
+        f"Policy covers vehicle {case.get('registration_number', '')} for {case.get('coverage_type', 'Comprehensive').lower()} insurance",
+        f"Insured Declared Value (IDV) is ₹{case.get('idv', 0):,}",
+        "Premium must be paid before policy inception",
+        "Policy is subject to terms and conditions of the insurance company",
+        "Claims must be intimated within 48 hours of incident"
+    ]
+    if case.get('deductible', 0) > 0:
+        terms.append(f"Voluntary deductible of ₹{case.get('deductible'):,} applies to own damage claims")
+    if case.get('coverage_type') == 'Third Party':
+        terms.append("Policy covers ONLY third party liability - own damage not covered")
+    return terms
+
+
+def policy_number(issue_date: datetime, sequence: int) -> str:
+    return f"VEH-{issue_date.strftime('%Y%m%d')}-{sequence:06d}"
+
+
+def next_policy_number(sequences: SequenceAllocator, issue_date: datetime) -> str:
+    """A policy number no other session or process will be given."""
+    # One sequence per issue day, so numbers restart at 1 every day
+    return policy_number(issue_date, sequences.next(f"policy-{issue_date.strftime('%Y%m%d')}"))
+
+
+# Minimal PDF writer
+
+def _pdf_text(text) -> str:
+    # Standard fonts use WinAnsiEncoding, which has no rupee sign
+    data = str(text).replace('₹', 'Rs. ').encode('cp1252', 'replace').decode('latin-1')
+    return data.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+class _Canvas:
+    # Collects drawing operators for one page
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.ops = []
+
+    def text(self, x: float, y: float, text, size: float = 10, bold: bool = False, color=(0, 0, 0)):
+        self.ops.append(f"{color[0]} {color[1]} {color[2]} rg BT /{'F2' if bold else 'F1'} {size} Tf "
+                        f"{x:.1f} {y:.1f} Td ({_pdf_text(text)}) Tj ET")
+
+    def rect(self, x: float, y: float, width: float, height: float, fill=None, stroke=None, line_width: float = 1):
+        if fill:
+            self.ops.append(f"{fill[0]} {fill[1]} {fill[2]} rg {x:.1f} {y:.1f} {width:.1f} {height:.1f} re f")
+        if stroke:
+            self.ops.append(f"{stroke[0]} {stroke[1]} {stroke[2]} RG {line_width} w "
+                            f"{x:.1f} {y:.1f} {width:.1f} {height:.1f} re S")
+
+    def stream(self) -> bytes:
+        return '\n'.join(self.ops).encode('latin-1')
+
+
+def _pdf_document(canvas: _Canvas, title: str) -> bytes:
+    content = canvas.stream()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {canvas.width} {canvas.height}] '
+         f'/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> /Contents 4 0 R >>').encode('latin-1'),
+        b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        f'<< /Title ({_pdf_text(title)}) /Producer (CDrive) >>'.encode('latin-1'),
+    ]
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b'%010d 00000 n \n' % offset)
+    output.write(b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                 % (len(objects) + 1, len(objects), xref))
+    return output.getvalue()
+
+
+# Templates
+
+def _format_date(value) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime('%d %b %Y') if isinstance(value, (datetime, date)) else 'N/A'
+
+
+def policy_fields(case: Dict) -> Dict[str, str]:
+    """Display values for the policy and card templates."""
+    start = case.get('policy_start_date') or datetime.now()
+    expiry = case.get('policy_expiry_date') or policy_expiry_date(start, case.get('policy_duration', '1 Year'))
+    deductible = case.get('deductible', 0) or 0
+    ncb = case.get('ncb_percentage', 0) or 0
+    return {
+        'policy_number': case.get('policy_number', ''),
+        'issue_date': _format_date(start),
+        'expiry_date': _format_date(expiry),
+        'validity': f"{_format_date(start)} - {_format_date(expiry)}",
+        'policy_duration': case.get('policy_duration', '1 Year'),
+        'customer_name': case.get('customer_name', 'N/A'),
+        'customer_phone': case.get('customer_phone', 'N/A'),
+        'customer_email': case.get('customer_email', 'N/A'),
+        'vehicle': f"{case.get('vehicle_make', '')} {case.get('vehicle_model', '')} {case.get('vehicle_variant', '')}".strip(),
+        'vehicle_year': case.get('vehicle_year', 'N/A'),
+        'registration_number': case.get('registration_number', 'N/A'),
+        'engine_capacity': case.get('engine_capacity') or 'N/A',
+        'fuel_type': case.get('fuel_type', 'N/A'),
+        'coverage_type': case.get('coverage_type', 'Comprehensive'),
+        'plan': case_plan_name(case) or 'N/A',
+        'idv': f"₹{case.get('idv', 0) or 0:,.0f}",
+        'deductible': f"₹{deductible:,.0f}" if deductible > 0 else 'None',
+        'premium_amount': f"₹{case.get('premium_amount', 0) or 0:,.0f}",
+        'ncb_percentage': f"{ncb}%" if ncb > 0 else 'None',
+    }
+
+
+def render_policy_pdf(case: Dict) -> bytes:
+    """Policy certificate for ``case`` as PDF bytes."""
+    fields = policy_fields(case)
+    width, height = A4
+    canvas = _Canvas(width, height)
+    canvas.rect(0, height - 110, width, 110, fill=BRAND_COLOR)
+    canvas.text(50, height - 55, 'VEHICLE INSURANCE POLICY CERTIFICATE', size=18, bold=True, color=(1, 1, 1))
+    canvas.text(50, height - 80, 'CDrive Vehicle Insurance', size=11, color=(1, 1, 1))
+
+    y = height - 150
+    for heading, rows in POLICY_TEMPLATE:
+        canvas.text(50, y, heading, size=12, bold=True, color=BRAND_COLOR)
+        y -= 18
+        for label, field in rows:
+            canvas.text(60, y, label, size=10, color=(0.3, 0.3, 0.3))
+            canvas.text(240, y, fields[field], size=10)
+            y -= 15
+        y -= 10
+
+    addons = [name for field, name in ADDON_NAMES.items() if case.get(field)]
+    if case.get('coverage_type') == 'Comprehensive' and addons:
+        canvas.text(50, y, 'Add-on Covers Included', size=12, bold=True, color=BRAND_COLOR)
+        y -= 18
+        for addon in addons:
+            canvas.text(60, y, f"• {addon}", size=10)
+            y -= 15
+        y -= 10
+
+    canvas.text(50, y, 'Important Policy Information', size=12, bold=True, color=BRAND_COLOR)
+    y -= 18
+    for note in POLICY_NOTES:
+        canvas.text(60, y, f"• {note}", size=9)
+        y -= 13
+
+    canvas.rect(30, 30, width - 60, height - 60, stroke=BRAND_COLOR, line_width=1.5)
+    canvas.text(50, 40, f"Policy {fields['policy_number']} - computer generated certificate, no signature required",
+                size=8, color=(0.4, 0.4, 0.4))
+    return _pdf_document(canvas, f"Policy {fields['policy_number']}")
+
+
+def render_insurance_card(case: Dict) -> bytes:
+    """Wallet-size digital insurance card for ``case`` as PDF bytes."""
+    fields = policy_fields(case)
+    width, height = CARD
+    canvas = _Canvas(width, height)
+    canvas.rect(0, height - 30, width, 30, fill=BRAND_COLOR)
+    canvas.text(12, height - 20, 'VEHICLE INSURANCE CARD', size=10, bold=True, color=(1, 1, 1))
+    y = height - 48
+    for label, field in CARD_TEMPLATE:
+        canvas.text(12, y, f"{label}:", size=7.5, bold=True)
+        canvas.text(60, y, fields[field], size=7.5)
+        y -= 15
+    canvas.rect(2, 2, width - 4, height - 4, stroke=BRAND_COLOR)
+    return _pdf_document(canvas, f"Insurance Card {fields['policy_number']}")
+
+
+def policy_file_names(case: Dict) -> Dict[str, str]:
+    return {
+        'policy': f"{case['policy_number']}_policy.pdf",
+        'card': f"{case['policy_number']}_card.pdf",
+    }
+
+
+def file_policy_documents(documents: DocumentStore, case: Dict, policy_pdf: bytes, card_pdf: bytes) -> Dict[str, str]:
+    """Save rendered PDFs against the case. Returns their SHA-256 by kind."""
+    names = policy_file_names(case)
+    return {
+        kind: documents.save(case['id'], io.BytesIO(data), names[kind], 'application/pdf').sha256
+        for kind, data in (('policy', policy_pdf), ('card', card_pdf))
+    }
+
+
+# Batch issuance
+
+@dataclass
+class IssuanceReport:
+    issued: int = 0
+    # Cases skipped because they were already issued, or had no premium and no vehicle value to price
+    already_issued: int = 0
+    unpriced: int = 0
+    seconds: float = 0.0
+    pdf_bytes: int = 0
+    workers: int = 0
+
+    @property
+    def per_second(self) -> float:
+        return self.issued / self.seconds if self.seconds else 0.0
+
+
+def _render_chunk(cases: List[Dict]) -> List[tuple]:
+    # Runs in a worker process
+    return [(case['id'], render_policy_pdf(case), render_insurance_card(case)) for case in cases]
+
+
+class AlreadyIssuedError(Exception):
+    """The case already has a policy."""
+
+
+class UnpricedCaseError(Exception):
+    """The case has no premium and no vehicle value and year to price it from."""
+
+
+def _pricing_changes(case: Dict, issue_date: datetime, engine: PremiumEngine) -> Dict:
+    # Quote a case that was never priced, as the quote step would: leads have
+    # no IDV yet, so offer the suggested one, and sell the case's plan or the
+    # first plan for its coverage
+    changes = {}
+    if not case.get('idv'):
+        if not case.get('vehicle_value') or not case.get('vehicle_year'):
+            raise UnpricedCaseError(case['id'])
+        changes['idv'] = int(suggested_idv(case['vehicle_value'], int(case['vehicle_year']), issue_date.year))
+    quotes = engine.quotes({**case, **changes})
+    plan_id = case_plan_id(case)
+    quote = next((quote for quote in quotes if quote['plan_id'] == plan_id), quotes[0])
+    changes.update(plan_selection(quote))
+    changes['premium_amount'] = round(changes['premium_amount'], 2)
+    return changes
+
+
+def _issue_changes(case: Dict, issue_date: datetime, number: Callable[[], str], engine: PremiumEngine) -> Dict:
+    # Priced first so a case that cannot be priced is never given a number
+    changes = {} if case.get('premium_amount') else _pricing_changes(case, issue_date, engine)
+    changes.update({
+        'status': ISSUED_STATUS,
+        'step': 9,
+        'policy_start_date': issue_date,
+        'policy_expiry_date': policy_expiry_date(issue_date, case.get('policy_duration', '1 Year')),
+    })
+    if not case.get('policy_number'):
+        changes['policy_number'] = number()
+    return changes
+
+
+def issue_case(store: CaseStore, documents: DocumentStore, sequences: SequenceAllocator, case_id: str,
+               engine: Optional[PremiumEngine] = None) -> Dict:
+    """Issue a single case in this process, as :func:`issue_batch` would, and return it.
+
+    Raises :class:`AlreadyIssuedError` if the case is already issued,
+    including when another writer issues it first while this one renders
+    its PDFs; only one of them is saved.  Raises
+    :class:`UnpricedCaseError` if it has neither a premium nor a vehicle
+    value to price it from.
+    """
+    case = store.get(case_id)
+    if case is None:
+        raise KeyError(case_id)
+    if case.get('status') == ISSUED_STATUS:
+        raise AlreadyIssuedError(case.get('policy_number'))
+    issue_date = datetime.now()
+    changes = _issue_changes(case, issue_date, lambda: next_policy_number(sequences, issue_date),
+                             engine or PremiumEngine())
+    case = {**case, **changes}
+    changes['policy_documents'] = file_policy_documents(
+        documents, case, render_policy_pdf(case), render_insurance_card(case)
+    )
+    issued = store.update(case_id, changes, unless_status=ISSUED_STATUS)
+    if issued is None:
+        raise AlreadyIssuedError(store.get(case_id).get('policy_number'))
+    return issued
+
+
+def issue_batch(store: CaseStore, documents: DocumentStore, sequences: SequenceAllocator, case_ids: List[str],
+                engine: Optional[PremiumEngine] = None, workers: Optional[int] = None,
+                chunk_size: int = ISSUE_CHUNK_SIZE,
+                progress: Optional[Callable[[IssuanceReport], None]] = None) -> IssuanceReport:
+    """Issue policies for ``case_ids`` and file their PDFs.
+
+    Each case is marked issued with fresh policy dates, a policy number if
+    it has none (drawn from ``sequences``) and, if it was never priced,
+    the suggested IDV and the premium of its plan.  PDFs are rendered
+    ``chunk_size`` cases at a time across ``workers`` processes (default:
+    one per CPU).  ``progress`` gets the running report after each chunk.
+
+    Cases that are already issued, including by another process while the
+    batch runs, are left alone and counted in ``already_issued``; cases
+    that cannot be priced are counted in ``unpriced``.
+    """
+    import multiprocessing
+
+    engine = engine or PremiumEngine()
+    workers = workers or os.cpu_count() or 1
+    report = IssuanceReport(workers=workers)
+    started = time.perf_counter()
+    issue_date = datetime.now()
+
+    def number() -> str:
+        return next_policy_number(sequences, issue_date)
+
+    def stamped_chunks():
+        for start in range(0, len(case_ids), chunk_size):
+            stamped = []
+            for case in store.get_many(case_ids[start:start + chunk_size]):
+                if case.get('status') == ISSUED_STATUS:
+                    report.already_issued += 1
+                    continue
+                try:
+                    stamped.append({**case, **_issue_changes(case, issue_date, number, engine)})
+                except UnpricedCaseError:
+                    report.unpriced += 1
+            if stamped:
+                yield stamped
+
+    # Spawned workers only import this module, not the Streamlit app
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        chunks = {}
+        pending = []
+        for cases in stamped_chunks():
+            future = pool.submit(_render_chunk, cases)
+            chunks[future] = cases
+            pending.append(future)
+            # Keep a bounded number of chunks in flight
+            if len(pending) >= workers * 2:
+                _finish_chunk(store, documents, pending.pop(0), chunks, report)
+                report.seconds = time.perf_counter() - started
+                if progress is not None:
+                    progress(report)
+        while pending:
+            _finish_chunk(store, documents, pending.pop(0), chunks, report)
+            report.seconds = time.perf_counter() - started
+            if progress is not None:
+                progress(report)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _finish_chunk(store: CaseStore, documents: DocumentStore, future, chunks: Dict, report: IssuanceReport):
+    cases = {case['id']: case for case in chunks.pop(future)}
+    changes = {}
+    for case_id, policy_pdf, card_pdf in future.result():
+        case = cases[case_id]
+        files = file_policy_documents(documents, case, policy_pdf, card_pdf)
+        changes[case_id] = {field: case[field] for field in ISSUE_FIELDS if field in case}
+        changes[case_id]['policy_documents'] = files
+        report.pdf_bytes += len(policy_pdf) + len(card_pdf)
+    # Cases another writer issued since the chunk was read keep that policy
+    issued = store.update_many(changes, unless_status=ISSUED_STATUS)
+    report.issued += len(issued)
+    report.already_issued += len(changes) - len(issued)
+
+
+def main(argv=None):
+    import argparse
+
+    from cdrive.documents import DEFAULT_DOCUMENT_DIR
+    from cdrive.store import DEFAULT_DB_PATH, SQLiteCaseStore
+
+    parser = argparse.ArgumentParser(description="Issue policies and PDFs for every case in a status")
+    parser.add_argument('--status', required=True, help="issue all cases currently in this status")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="case store database")
+    parser.add_argument('--documents', default=DEFAULT_DOCUMENT_DIR, help="document store directory")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=ISSUE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    store = SQLiteCaseStore(args.db)
+    documents = DocumentStore(args.documents, args.db)
+    sequences = SequenceAllocator(args.db)
+    case_ids = [case_id for (case_id, status) in store.columns(['id', 'status']) if status == args.status]
+    report = issue_batch(
+        store, documents, sequences, case_ids, workers=args.workers, chunk_size=args.chunk_size,
+        progress=lambda totals: print(f"{totals.issued:,} issued, {totals.per_second:,.0f} policies/s",
+                                      flush=True)
+    )
+    print(f"Issued {report.issued:,} policies in {report.seconds:.1f}s "
+          f"({report.per_second:,.0f}/s, {report.pdf_bytes / 1e6:.1f} MB of PDFs, {report.workers} workers)")
+    if report.already_issued or report.unpriced:
+        print(f"Skipped {report.already_issued:,} already issued and {report.unpriced:,} without a vehicle value")
+    documents.close()
+    sequences.close()
+
+
+if __name__ == '__main__':
+    main()
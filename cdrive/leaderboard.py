@@ -0,0 +1,192 @@
+"""Per-executive performance counters for the leaderboards.
+
+The ``executive_stats`` table keeps one row of running totals per
+executive: cases assigned, policies issued and their premium, days from
+case creation to policy start, document completion, and follow-up
+timeliness.  Like the daily rollups, the totals are kept by SQLite
+triggers, on the cases and follow-up task tables, inside each write's
+transaction; an update takes the old row's contribution off and adds the
+new one.  Reading a 300-person leaderboard is a scan of 300 rows, never
+of the cases.
+"""
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from cdrive.store import DEFAULT_DB_PATH
+
+ISSUED_STATUSES = ['Policy Issued', 'Policy Expired']
+
+# Running totals -> SQL for one row's contribution
+_CASE_COUNTERS = {
+    'cases': '1',
+    'issued': '{issued}',
+    'premium': "CASE WHEN {issued} THEN coalesce({row}.premium_amount, 0) ELSE 0 END",
+    'issue_days': "CASE WHEN {issued} THEN coalesce(julianday({start}) - julianday({row}.created_date), 0) "
+                  "ELSE 0 END",
+    'issue_days_count': "{issued} AND {start} IS NOT NULL AND {row}.created_date IS NOT NULL",
+    'document_rate': "coalesce(json_extract({row}.data, '$.document_completion_rate'), 0)",
+    'document_rate_count': "json_extract({row}.data, '$.document_completion_rate') IS NOT NULL",
+}
+_FOLLOWUP_COUNTERS = {
+    'followups_done': "{row}.status = 'Done'",
+    'followups_on_time': "{row}.status = 'Done' AND substr({row}.completed_at, 1, 10) <= {row}.due",
+    'followups_overdue': "{row}.status = 'Overdue'",
+}
+COUNTERS = list(_CASE_COUNTERS) + list(_FOLLOWUP_COUNTERS)
+
+# Bumped whenever a counter's SQL changes; older tables and triggers are rebuilt
+STATS_VERSION = 2
+
+# Leaderboard metrics, each sorted best first
+METRICS = {
+    'policies_issued': "Policies Issued",
+    'premium_written': "Premium Written",
+    'avg_days_to_issue': "Avg Days to Issue",
+    'followup_on_time_rate': "Follow-up On-time Rate",
+    'document_completion_rate': "Document Completion",
+}
+# Metrics where a lower value ranks higher
+LOWER_IS_BETTER = {'avg_days_to_issue'}
+
+
+def _case_terms(row: str) -> Dict[str, str]:
+    issued = f"({row}.status IN ({', '.join(repr(status) for status in ISSUED_STATUSES)}))"
+    start = (f"coalesce(json_extract({row}.data, '$.policy_start_date.__datetime__'), "
+             f"json_extract({row}.data, '$.policy_start_date.__date__'))")
+    return {counter: f"coalesce({sql.format(row=row, issued=issued, start=start)}, 0)"
+            for counter, sql in _CASE_COUNTERS.items()}
+
+
+def _followup_terms(row: str) -> Dict[str, str]:
+    return {counter: f"coalesce({sql.format(row=row)}, 0)" for counter, sql in _FOLLOWUP_COUNTERS.items()}
+
+
+def _upsert(executive: str, terms: Dict[str, str], sign: str, source: str = '') -> str:
+    # Add (sign '+') or take off ('-') one row's counters, or a grouped SELECT's sums
+    columns = ', '.join(terms)
+    assignments = ', '.join(f'{counter} = {counter} + excluded.{counter}' for counter in terms)
+    if source:
+        values = f"SELECT {executive}, {', '.join(f'total({term})' for term in terms.values())} {source}"
+    else:
+        values = f"VALUES ({executive}, {', '.join(f'{sign}{term}' for term in terms.values())})"
+    return (f"INSERT INTO executive_stats (executive, {columns}) {values} "
+            f"ON CONFLICT (executive) DO UPDATE SET {assignments};")
+
+
+class ExecutiveStats:
+    """Reads the per-executive counters, installing the table and triggers on first use.
+
+    The cases and follow-up task tables must already exist, so open the
+    case store and follow-up scheduler first.  Existing cases and tasks
+    are counted once when the counters are installed, and again if
+    ``STATS_VERSION`` has moved on since.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._create_schema()
+
+    def _create_schema(self):
+        executive = "coalesce({row}.assigned_to, 'Unassigned')"
+        with self._lock:
+            # IMMEDIATE so two processes starting together count existing rows only once
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'executive_stats'"
+                ).fetchone()
+                version = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'executive_stats_version'"
+                ).fetchone()
+                if exists and (version is None or version[0] < STATS_VERSION):
+                    # Counted by older definitions: drop them and count everything again
+                    for table in ('cases', 'followup_tasks'):
+                        self._conn.execute(f'DROP TRIGGER IF EXISTS {table}_stats_insert')
+                        self._conn.execute(f'DROP TRIGGER IF EXISTS {table}_stats_update')
+                    self._conn.execute('DROP TABLE executive_stats')
+                    exists = None
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('executive_stats_version', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                    (STATS_VERSION,)
+                )
+                counters = ',\n'.join(f'{counter} REAL NOT NULL DEFAULT 0' for counter in COUNTERS)
+                self._conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS executive_stats (
+                        executive TEXT PRIMARY KEY,
+                        {counters}
+                    )
+                """)
+                for table, columns, terms in (
+                    ('cases', 'data', _case_terms),
+                    ('followup_tasks', 'assigned_to, due, status, completed_at', _followup_terms),
+                ):
+                    self._conn.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS {table}_stats_insert AFTER INSERT ON {table} BEGIN
+                            {_upsert(executive.format(row='new'), terms('new'), '+')}
+                        END
+                    """)
+                    self._conn.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS {table}_stats_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                            {_upsert(executive.format(row='old'), terms('old'), '-')}
+                            {_upsert(executive.format(row='new'), terms('new'), '+')}
+                        END
+                    """)
+                    if not exists:
+                        self._conn.execute(_upsert(
+                            executive.format(row=table), terms(table), '+',
+                            source=f"FROM {table} WHERE true GROUP BY 1"
+                        ))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _rows(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _metrics(row: sqlite3.Row) -> Dict:
+        followups_due = row['followups_done'] + row['followups_overdue']
+        return {
+            'executive': row['executive'],
+            'cases': int(row['cases']),
+            'policies_issued': int(row['issued']),
+            'premium_written': row['premium'],
+            'avg_days_to_issue': (row['issue_days'] / row['issue_days_count']
+                                  if row['issue_days_count'] else None),
+            'followup_on_time_rate': row['followups_on_time'] / followups_due if followups_due else None,
+            'document_completion_rate': (row['document_rate'] / row['document_rate_count']
+                                         if row['document_rate_count'] else None),
+        }
+
+    def executive(self, name: str) -> Optional[Dict]:
+        """Metrics for one executive, or None if they have no cases or tasks."""
+        rows = self._rows('SELECT * FROM executive_stats WHERE executive = ?', (name,))
+        return self._metrics(rows[0]) if rows else None
+
+    def leaderboard(self, metric: str = 'premium_written') -> List[Dict]:
+        """Every executive's metrics, best first on ``metric``, with their ``rank``.
+
+        Executives without a value for ``metric`` come last, unranked.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown leaderboard metric '{metric}'")
+        board = [self._metrics(row) for row in self._rows('SELECT * FROM executive_stats WHERE cases > 0')]
+        ranked = sorted((entry for entry in board if entry[metric] is not None),
+                        key=lambda entry: entry[metric], reverse=metric not in LOWER_IS_BETTER)
+        for rank, entry in enumerate(ranked, start=1):
+            entry['rank'] = rank
+        unranked = [{**entry, 'rank': None} for entry in board if entry[metric] is None]
+        return ranked + unranked
@@ -0,0 +1,142 @@
+"""Non-blocking payment processing.
+
+The wizard hands payments to a shared :class:`PaymentProcessor`, which
+charges them through a :class:`PaymentGateway` on a thread pool and
+returns straight away.  The UI then polls the payment's status on later
+reruns instead of holding its script thread while the gateway responds.
+
+Every payment carries an idempotency key chosen by the caller; submitting
+the same key again returns the original payment rather than charging the
+customer twice.
+"""
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Optional
+
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "Net Banking", "UPI", "Bank Transfer", "Cheque"]
+
+PENDING = 'Pending'
+COMPLETED = 'Completed'
+FAILED = 'Failed'
+
+DEFAULT_PAYMENT_WORKERS = 32
+
+# Finished payments kept for idempotency and status lookups
+MAX_PAYMENT_RECORDS = 10000
+
+
+class PaymentDeclined(Exception):
+    """Raised by a gateway when it refuses a charge."""
+
+
+@dataclass
+class Payment:
+    idempotency_key: str
+    case_id: str
+    amount: float
+    method: str
+    status: str = PENDING
+    reference: Optional[str] = None
+    error: Optional[str] = None
+    submitted_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class PaymentGateway(ABC):
+    """Adapter for a payment provider."""
+
+    @abstractmethod
+    def charge(self, payment: Payment) -> str:
+        """Charge ``payment`` and return the provider's reference.
+
+        Raises :class:`PaymentDeclined` when the charge is refused.  Called
+        on a worker thread, so it may block for as long as the provider
+        takes.
+        """
+
+
+class FakeGateway(PaymentGateway):
+    """Local stand-in gateway for development and tests."""
+
+    def __init__(self, latency: float = 2.0, decline_rate: float = 0.0):
+        self.latency = latency
+        self.decline_rate = decline_rate
+
+    def charge(self, payment: Payment) -> str:
+        time.sleep(self.latency)
+        if random.random() < self.decline_rate:
+            raise PaymentDeclined("Declined by issuing bank")
+        return f"FAKE-{uuid.uuid4().hex[:12].upper()}"
+
+
+class PaymentProcessor:
+    """Runs gateway charges on a thread pool and tracks their status."""
+
+    def __init__(self, gateway: PaymentGateway, max_workers: int = DEFAULT_PAYMENT_WORKERS):
+        self.gateway = gateway
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='payment')
+        self._payments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, idempotency_key: str, case_id: str, amount: float, method: str) -> Payment:
+        """Start charging a payment and return it while it is still pending.
+
+        A key that was already submitted returns the existing payment and
+        does not charge again; use a new key to retry a failed payment.
+        """
+        with self._lock:
+            payment = self._payments.get(idempotency_key)
+            if payment is not None:
+                return replace(payment)
+            payment = Payment(idempotency_key, case_id, amount, method, submitted_at=datetime.now())
+            self._payments[idempotency_key] = payment
+            self._prune()
+        self._executor.submit(self._charge, payment)
+        return replace(payment)
+
+    def _prune(self):
+        # Forget the oldest finished payments; pending ones are always kept
+        excess = len(self._payments) - MAX_PAYMENT_RECORDS
+        if excess <= 0:
+            return
+        for key in list(self._payments):
+            if excess <= 0:
+                break
+            if self._payments[key].status != PENDING:
+                del self._payments[key]
+                excess -= 1
+
+    def _charge(self, payment: Payment):
+        try:
+            reference = self.gateway.charge(replace(payment))
+        except PaymentDeclined as error:
+            status, reference, message = FAILED, None, str(error)
+        except Exception as error:
+            status, reference, message = FAILED, None, f"Gateway error: {error}"
+        else:
+            status, message = COMPLETED, None
+        with self._lock:
+            payment.status = status
+            payment.reference = reference
+            payment.error = message
+            payment.completed_at = datetime.now()
+
+    def status(self, idempotency_key: str) -> Optional[Payment]:
+        """Current state of a submitted payment, or None if the key is unknown."""
+        with self._lock:
+            payment = self._payments.get(idempotency_key)
+            return replace(payment) if payment is not None else None
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(payment.status == PENDING for payment in self._payments.values())
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
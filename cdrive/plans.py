@@ -0,0 +1,141 @@
+"""Versioned catalog of the insurance plans offered in the quote step.
+
+Plan definitions live here once instead of being copied into every case.
+A case that picked a plan records ``plan_id`` and ``plan_version`` next
+to its add-on flags; the plan's feature list is rebuilt from the catalog
+when it is needed.  A published version is never edited: to change a
+plan's name, loading or features, add a new :class:`Plan` with the next
+version to ``PLANS``, so cases sold on the old terms still show them and
+the history of every plan stays in one place.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+SELECTED_ADDON_PREFIX = '✓ Selected: '
+
+_CORE_FEATURES = (
+    'Own Damage Coverage',
+    'Third Party Liability',
+    'Theft Protection',
+    'Natural Calamity Coverage',
+)
+
+
+@dataclass(frozen=True)
+class Plan:
+    """One version of a plan.
+
+    ``loading`` multiplies the base premium.  ``addon_features`` pairs an
+    add-on flag with the label listed as selected when a case sets it.
+    """
+    id: str
+    version: int
+    name: str
+    coverage_type: str
+    loading: float
+    features: Tuple[str, ...]
+    addon_features: Tuple[Tuple[str, str], ...] = ()
+    # Date the version was first offered
+    introduced: str = '2024-01-01'
+
+    def feature_list(self, case: Dict) -> List[str]:
+        """The plan's features followed by the add-ons ``case`` selected."""
+        features = list(self.features)
+        features.extend(SELECTED_ADDON_PREFIX + label for field, label in self.addon_features if case.get(field))
+        return features
+
+
+# Every version of every plan, oldest first. Only append to this list.
+PLANS = [
+    Plan(
+        id='third_party_only', version=1, name='Third Party Only', coverage_type='Third Party', loading=1.0,
+        features=(
+            'Third Party Liability Coverage',
+            'Legal Compliance',
+            'Covers injury/death to third parties',
+            'Property damage to third parties',
+        ),
+    ),
+    Plan(
+        id='basic_comprehensive', version=1, name='Basic Comprehensive', coverage_type='Comprehensive',
+        loading=1.0, features=_CORE_FEATURES,
+    ),
+    Plan(
+        id='standard_comprehensive', version=1, name='Standard Comprehensive', coverage_type='Comprehensive',
+        loading=1.25,
+        features=_CORE_FEATURES + (
+            '24x7 Roadside Assistance',
+            'Engine Protection Cover',
+        ),
+        addon_features=(
+            ('roadside_assistance', 'Roadside Assistance'),
+            ('engine_protect', 'Engine Protection'),
+        ),
+    ),
+    Plan(
+        id='premium_comprehensive', version=1, name='Premium Comprehensive', coverage_type='Comprehensive',
+        loading=1.6,
+        features=_CORE_FEATURES + (
+            '24x7 Roadside Assistance',
+            'Engine Protection Cover',
+            'Zero Depreciation Cover',
+            'Consumables Cover',
+            'Key Replacement Cover',
+            'Return to Invoice Cover',
+        ),
+        addon_features=(
+            ('zero_depreciation', 'Zero Depreciation'),
+            ('consumables_cover', 'Consumables'),
+            ('key_replacement', 'Key Replacement'),
+            ('return_invoice', 'Return to Invoice'),
+        ),
+    ),
+]
+
+_PLANS_BY_VERSION = {(plan.id, plan.version): plan for plan in PLANS}
+# Latest version of each plan, in the order plans are offered
+CURRENT_PLANS: Dict[str, Plan] = {}
+for _plan in PLANS:
+    CURRENT_PLANS[_plan.id] = _plan
+
+# Cases written before the catalog only stored the plan's name
+_LEGACY_PLAN_IDS = {plan.name: plan.id for plan in PLANS}
+
+
+def get_plan(plan_id: str, version: Optional[int] = None) -> Optional[Plan]:
+    """The given version of a plan, its latest version by default, or None."""
+    if version is None:
+        return CURRENT_PLANS.get(plan_id)
+    return _PLANS_BY_VERSION.get((plan_id, version))
+
+
+def plans_for(coverage_type: str) -> List[Plan]:
+    """Current plans offered for a coverage type."""
+    coverage = "Third Party" if coverage_type == "Third Party" else "Comprehensive"
+    return [plan for plan in CURRENT_PLANS.values() if plan.coverage_type == coverage]
+
+
+def case_plan(case: Dict) -> Optional[Plan]:
+    """The plan version ``case`` was sold on, or None when no plan was picked."""
+    if case.get('plan_id'):
+        return get_plan(case['plan_id'], case.get('plan_version'))
+    plan_id = _LEGACY_PLAN_IDS.get((case.get('selected_quote') or {}).get('name'))
+    return get_plan(plan_id, 1) if plan_id else None
+
+
+def case_plan_id(case: Dict) -> Optional[str]:
+    plan = case_plan(case)
+    return plan.id if plan else None
+
+
+def case_plan_name(case: Dict) -> Optional[str]:
+    plan = case_plan(case)
+    if plan is not None:
+        return plan.name
+    # A legacy quote whose name is not in the catalog
+    return (case.get('selected_quote') or {}).get('name')
+
+
+def plan_selection(quote: Dict) -> Dict:
+    """Case fields recording the choice of ``quote`` from the quote step."""
+    return {'plan_id': quote['plan_id'], 'plan_version': quote['plan_version'], 'premium_amount': quote['premium']}
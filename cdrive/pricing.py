@@ -0,0 +1,219 @@
+"""Vehicle insurance premium calculation.
+
+:class:`PremiumEngine` holds the rating tables used by the quote step of
+the case wizard.  ``quotes`` prices a single case for the UI while
+``price_frame`` prices a whole DataFrame of cases in one vectorized pass
+for batch jobs such as nightly renewals; both give identical figures.
+Plan tiers and their loadings come from the :mod:`cdrive.plans` catalog.
+"""
+from typing import Dict, List, Optional
+
+from cdrive.plans import CURRENT_PLANS, plans_for
+
+# Third party premiums by engine capacity
+TP_PREMIUM_UPTO_1000CC = 2072
+TP_PREMIUM_UPTO_1500CC = 3221
+TP_PREMIUM_ABOVE_1500CC = 7890
+TP_PREMIUM_ELECTRIC = 3000
+TP_PREMIUM_DEFAULT = 3221
+
+BASE_RATE = 0.025  # 2.5% of IDV
+
+VEHICLE_MULTIPLIERS = {
+    'Hatchback': 1.0,
+    'Sedan': 1.1,
+    'SUV': 1.3,
+    'MUV/MPV': 1.2,
+    'Coupe': 1.4,
+    'Convertible': 1.5,
+    'Pickup Truck': 1.1,
+    'Van': 1.1
+}
+
+FUEL_MULTIPLIERS = {
+    'Petrol': 1.0,
+    'Diesel': 1.05,
+    'CNG': 0.95,
+    'Electric': 0.9,
+    'Hybrid': 0.95,
+    'LPG': 0.95
+}
+
+AGE_MULTIPLIERS = {
+    '18-25 years': 1.3,
+    '26-35 years': 1.0,
+    '36-50 years': 0.95,
+    '50+ years': 1.1
+}
+
+# Values assumed when a case does not carry a rating factor
+RATING_DEFAULTS = {
+    'idv': 500000,
+    'coverage_type': 'Comprehensive',
+    'vehicle_type': 'Hatchback',
+    'fuel_type': 'Petrol',
+    'driver_age': '26-35 years',
+    'ncb_percentage': 0,
+    'deductible': 0,
+    'engine_capacity': '1197cc',
+}
+
+# IDV depreciation (%) by vehicle age in years
+DEPRECIATION_RATES = {0: 0, 1: 5, 2: 10, 3: 15, 4: 20, 5: 25}
+
+# How far the IDV may be moved from the suggested value, either way
+IDV_ADJUSTMENT = 0.2
+
+# Columns added by PremiumEngine.price_frame: the base premium and one per current plan id
+PRICE_COLUMNS = ['base_premium'] + list(CURRENT_PLANS)
+
+
+def parse_engine_cc(engine_capacity) -> Optional[int]:
+    """Return the CC figure from values like ``'1197cc'``, or None."""
+    text = str(engine_capacity)
+    if 'cc' not in text:
+        return None
+    digits = ''.join(filter(str.isdigit, text))
+    return int(digits) if digits else None
+
+
+def depreciation_percent(age: int) -> int:
+    age = max(0, age)
+    return DEPRECIATION_RATES.get(age, 30 + (age - 5) * 5)  # 5% additional per year after 5 years
+
+
+def idv_range(offered_idv: float) -> tuple:
+    """Lowest and highest IDV a customer may choose around ``offered_idv``."""
+    return int(offered_idv * (1 - IDV_ADJUSTMENT)), int(offered_idv * (1 + IDV_ADJUSTMENT))
+
+
+def suggested_idv(vehicle_value, vehicle_year: int, current_year: int) -> float:
+    """Depreciation-adjusted IDV offered for a vehicle in ``current_year``."""
+    return vehicle_value * (100 - depreciation_percent(current_year - vehicle_year)) / 100
+
+
+class PremiumEngine:
+    """Premium calculator for third party and comprehensive cover."""
+
+    def __init__(self, base_rate: float = BASE_RATE,
+                 vehicle_multipliers: Optional[Dict[str, float]] = None,
+                 fuel_multipliers: Optional[Dict[str, float]] = None,
+                 age_multipliers: Optional[Dict[str, float]] = None):
+        self.base_rate = base_rate
+        self.vehicle_multipliers = vehicle_multipliers or VEHICLE_MULTIPLIERS
+        self.fuel_multipliers = fuel_multipliers or FUEL_MULTIPLIERS
+        self.age_multipliers = age_multipliers or AGE_MULTIPLIERS
+
+    # Single case
+
+    def third_party_premium(self, fuel_type: str, engine_capacity) -> float:
+        if fuel_type == "Electric":
+            return TP_PREMIUM_ELECTRIC
+        cc = parse_engine_cc(engine_capacity)
+        if cc is None:
+            return TP_PREMIUM_DEFAULT
+        if cc <= 1000:
+            return TP_PREMIUM_UPTO_1000CC
+        elif cc <= 1500:
+            return TP_PREMIUM_UPTO_1500CC
+        return TP_PREMIUM_ABOVE_1500CC
+
+    def comprehensive_premium(self, idv, vehicle_type: str, fuel_type: str, driver_age: str,
+                              ncb_percentage=0, deductible=0) -> float:
+        premium = (idv * self.base_rate
+                   * self.vehicle_multipliers.get(vehicle_type, 1.0)
+                   * self.fuel_multipliers.get(fuel_type, 1.0)
+                   * self.age_multipliers.get(driver_age, 1.0))
+
+        # Apply NCB discount
+        premium = premium * (100 - ncb_percentage) / 100
+
+        # Apply voluntary deductible discount
+        if deductible > 0:
+            deductible_discount = min(deductible / 10000 * 5, 15)  # Max 15% discount
+            premium = premium * (100 - deductible_discount) / 100
+        return premium
+
+    def base_premium(self, case: Dict) -> float:
+        factors = {field: case.get(field, default) for field, default in RATING_DEFAULTS.items()}
+        if factors['coverage_type'] == "Third Party":
+            return self.third_party_premium(factors['fuel_type'], factors['engine_capacity'])
+        return self.comprehensive_premium(
+            factors['idv'], factors['vehicle_type'], factors['fuel_type'],
+            factors['driver_age'], factors['ncb_percentage'], factors['deductible']
+        )
+
+    def quotes(self, case: Dict) -> List[Dict]:
+        """Build the plan options shown in the quote step for a case."""
+        idv = case.get('idv', RATING_DEFAULTS['idv'])
+        base_premium = self.base_premium(case)
+        coverage_type = case.get('coverage_type', RATING_DEFAULTS['coverage_type'])
+
+        quotes = []
+        for plan in plans_for(coverage_type):
+            quotes.append({
+                'plan_id': plan.id,
+                'plan_version': plan.version,
+                'name': plan.name,
+                'premium': base_premium * plan.loading,
+                'features': plan.feature_list(case),
+                'coverage_amount': ('Unlimited Third Party Liability' if plan.coverage_type == "Third Party"
+                                    else f'IDV: ₹{idv:,}')
+            })
+        return quotes
+
+    # Batch
+
+    def price_frame(self, cases):
+        """Price every row of a DataFrame of cases in one vectorized pass.
+
+        Returns a new frame with the input columns plus ``PRICE_COLUMNS``.
+        Plan columns that do not apply to a row's coverage type are NaN.
+        """
+        import numpy as np
+        import pandas as pd
+
+        frame = cases.copy()
+        factors = {}
+        for field, default in RATING_DEFAULTS.items():
+            column = frame[field] if field in frame else pd.Series(default, index=frame.index)
+            factors[field] = column.where(column.notna(), default)
+
+        fuel_type = factors['fuel_type']
+        is_third_party = (factors['coverage_type'] == "Third Party").to_numpy()
+
+        # Third party slabs
+        engine_capacity = factors['engine_capacity'].astype(str)
+        digits = engine_capacity.str.replace(r'\D', '', regex=True)
+        cc = pd.to_numeric(digits.where(engine_capacity.str.contains('cc', regex=False)),
+                           errors='coerce').to_numpy(dtype=float)
+        third_party = np.select(
+            [(fuel_type == "Electric").to_numpy(), np.isnan(cc), cc <= 1000, cc <= 1500],
+            [TP_PREMIUM_ELECTRIC, TP_PREMIUM_DEFAULT, TP_PREMIUM_UPTO_1000CC, TP_PREMIUM_UPTO_1500CC],
+            default=TP_PREMIUM_ABOVE_1500CC
+        ).astype(float)
+
+        # Comprehensive rating
+        comprehensive = (factors['idv'].to_numpy(dtype=float) * self.base_rate
+                         * factors['vehicle_type'].map(self.vehicle_multipliers).fillna(1.0).to_numpy()
+                         * fuel_type.map(self.fuel_multipliers).fillna(1.0).to_numpy()
+                         * factors['driver_age'].map(self.age_multipliers).fillna(1.0).to_numpy())
+        comprehensive = comprehensive * (100 - factors['ncb_percentage'].to_numpy(dtype=float)) / 100
+        deductible = factors['deductible'].to_numpy(dtype=float)
+        deductible_discount = np.minimum(deductible / 10000 * 5, 15)
+        comprehensive = np.where(deductible > 0,
+                                 comprehensive * (100 - deductible_discount) / 100,
+                                 comprehensive)
+
+        base = np.where(is_third_party, third_party, comprehensive)
+        frame['base_premium'] = base
+        for plan in CURRENT_PLANS.values():
+            offered = is_third_party if plan.coverage_type == "Third Party" else ~is_third_party
+            frame[plan.id] = np.where(offered, base * plan.loading, np.nan)
+        return frame
+
+    def price_cases(self, cases: List[Dict]):
+        """Convenience wrapper around :meth:`price_frame` for case dicts."""
+        import pandas as pd
+
+        return self.price_frame(pd.DataFrame(list(cases)))
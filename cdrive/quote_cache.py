@@ -0,0 +1,83 @@
+"""Shared LRU cache of quote tiers keyed by rating factors."""
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from cdrive.catalog import ADDON_FIELDS
+from cdrive.pricing import RATING_DEFAULTS, PremiumEngine, parse_engine_cc
+
+DEFAULT_QUOTE_CACHE_SIZE = 4096
+
+
+def rating_key(case: Dict) -> tuple:
+    """Normalized tuple of the factors that determine a case's quotes.
+
+    Third party quotes only depend on the fuel type and engine CC, so
+    the other factors are left out of their key to share entries across
+    cases; comprehensive quotes ignore the engine CC.
+    """
+    factors = {field: case.get(field, default) for field, default in RATING_DEFAULTS.items()}
+    if factors['coverage_type'] == "Third Party":
+        return ("Third Party", factors['fuel_type'] == "Electric",
+                parse_engine_cc(factors['engine_capacity']))
+    return (
+        factors['coverage_type'],
+        factors['idv'],
+        factors['vehicle_type'],
+        factors['fuel_type'],
+        factors['driver_age'],
+        factors['ncb_percentage'],
+        factors['deductible'],
+        tuple(bool(case.get(field)) for field in ADDON_FIELDS),
+    )
+
+
+class QuoteCache:
+    """Bounded, thread-safe memo of :meth:`PremiumEngine.quotes`.
+
+    One instance is shared by every session in the process so popular
+    vehicles are priced once.
+    """
+
+    def __init__(self, engine: PremiumEngine, maxsize: int = DEFAULT_QUOTE_CACHE_SIZE):
+        self.engine = engine
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def quotes(self, case: Dict) -> List[Dict]:
+        key = rating_key(case)
+        with self._lock:
+            quotes = self._entries.get(key)
+            if quotes is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if quotes is None:
+            quotes = self.engine.quotes(case)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = quotes
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        # Callers keep quotes in their case, so hand out copies
+        return [{**quote, 'features': list(quote['features'])} for quote in quotes]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
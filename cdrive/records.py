@@ -0,0 +1,126 @@
+"""Compact column storage of the case book for analytics.
+
+Cases are stored and passed around as JSON-shaped dicts.  Holding many
+of them that way is expensive: every case repeats about 40 key strings,
+and its own copies of values such as "Maruti Suzuki" or "Comprehensive".
+:class:`CaseColumns` keeps only the columns the dashboard aggregates:
+categorical columns are small integer codes into a per-column list of
+values, numbers are ``array('d')`` and dates are day ordinals.
+
+There is deliberately no per-case record type.  Since cases moved into
+the SQLite store, no code path holds many case dicts at once: pages,
+search results, exports and import batches are a few thousand cases at
+most and are dropped after use, and the in-memory indexes
+(:class:`cdrive.indexes.FilterIndex`, :class:`cdrive.renewals.RenewalBook`)
+keep ids and values, not cases.  The only whole-book in-memory copy is
+the one analytics needs, and that is this module's columns.  A slots
+``Case`` was built and measured (153 MB against 524 MB of dicts at 100k
+cases) and then removed because nothing held cases long enough for the
+saving to matter; if a path that caches whole cases is added, give it a
+compact record rather than dicts.
+"""
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterable, List
+
+from cdrive.store import CaseStore
+
+# Fields with few distinct values, stored as codes
+CATEGORICAL_COLUMNS = ['status', 'vehicle_make', 'vehicle_type', 'fuel_type', 'coverage_type', 'assigned_to']
+NUMBER_COLUMNS = ['premium_amount', 'vehicle_value']
+DATE_COLUMNS = ['created_date']
+
+ANALYTICS_COLUMNS = CATEGORICAL_COLUMNS + NUMBER_COLUMNS + DATE_COLUMNS
+
+ANALYTICS_CHUNK_SIZE = 10000
+
+
+def _day(value) -> int:
+    # Proleptic ordinal of a date, datetime or ISO string; 0 when missing
+    if value is None or value == '':
+        return 0
+    if isinstance(value, datetime):
+        return value.toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+class CaseColumns:
+    """Column arrays over many cases for analytics.
+
+    Each categorical column keeps the distinct values in first-seen order
+    and one unsigned 16-bit code per case; pass the rows of
+    ``ANALYTICS_COLUMNS`` to :meth:`extend`, or build the whole book with
+    :meth:`from_store`.
+    """
+
+    def __init__(self):
+        self.categories: Dict[str, List] = {column: [] for column in CATEGORICAL_COLUMNS}
+        self.codes: Dict[str, array] = {column: array('H') for column in CATEGORICAL_COLUMNS}
+        self.numbers: Dict[str, array] = {column: array('d') for column in NUMBER_COLUMNS}
+        self.days: Dict[str, array] = {column: array('l') for column in DATE_COLUMNS}
+        self._lookup = {column: {} for column in CATEGORICAL_COLUMNS}
+
+    @classmethod
+    def from_store(cls, store: CaseStore, chunk_size: int = ANALYTICS_CHUNK_SIZE) -> 'CaseColumns':
+        columns = cls()
+        for rows in store.iter_columns(ANALYTICS_COLUMNS, chunk_size):
+            columns.extend(rows)
+        return columns
+
+    def _encode(self, column: str, values: tuple):
+        lookup = self._lookup[column]
+        categories = self.categories[column]
+        for value in set(values).difference(lookup):
+            lookup[value] = len(categories)
+            categories.append(value)
+        if len(categories) > 0xFFFF and self.codes[column].typecode == 'H':
+            self.codes[column] = array('I', self.codes[column])
+        self.codes[column].extend(map(lookup.__getitem__, values))
+
+    def extend(self, rows: List[tuple]):
+        """Append rows of values in ``ANALYTICS_COLUMNS`` order."""
+        if not rows:
+            return
+        values = dict(zip(ANALYTICS_COLUMNS, zip(*rows)))
+        for column in CATEGORICAL_COLUMNS:
+            self._encode(column, values[column])
+        nan = float('nan')
+        for column in NUMBER_COLUMNS:
+            self.numbers[column].extend(nan if value is None else value for value in values[column])
+        for column in DATE_COLUMNS:
+            # Timestamps fall on a few hundred distinct days; parse each day once
+            days = {}
+            for value in set(values[column]):
+                days[value] = _day(value)
+            self.days[column].extend(map(days.__getitem__, values[column]))
+
+    def __len__(self) -> int:
+        return len(self.codes[CATEGORICAL_COLUMNS[0]])
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays."""
+        arrays = [*self.codes.values(), *self.numbers.values(), *self.days.values()]
+        return sum(column.itemsize * len(column) for column in arrays)
+
+    # Queries
+
+    def value_counts(self, column: str) -> Dict:
+        """Cases per value of a categorical column, largest first, without None."""
+        counts = [0] * len(self.categories[column])
+        for code in self.codes[column]:
+            counts[code] += 1
+        pairs = [(value, count) for value, count in zip(self.categories[column], counts)
+                 if value is not None and count]
+        return dict(sorted(pairs, key=lambda pair: pair[1], reverse=True))
+
+    def count(self, column: str, values: Iterable) -> int:
+        """Cases whose ``column`` is one of ``values``."""
+        counts = self.value_counts(column)
+        return sum(counts.get(value, 0) for value in set(values))
+
+    def total(self, column: str) -> float:
+        """Sum of a numeric column, skipping missing values."""
+        return sum(value for value in self.numbers[column] if value == value)
@@ -0,0 +1,216 @@
+"""Renewal tracking for issued policies.
+
+:class:`RenewalBook` keeps every renewable policy in a list sorted by
+expiry date, so "due in the next N days" is two binary searches rather
+than a scan of the book.  :func:`renewal_quotes` reprices a batch of due
+policies for their next term in one vectorized
+:meth:`cdrive.pricing.PremiumEngine.price_frame` call.
+"""
+import threading
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from cdrive.catalog import NCB_STEP_UP
+from cdrive.plans import CURRENT_PLANS, case_plan
+from cdrive.pricing import PremiumEngine, depreciation_percent
+from cdrive.store import CaseStore
+
+RENEWABLE_STATUSES = ['Policy Issued', 'Policy Expired']
+
+POLICY_DURATION_DAYS = {'1 Year': 365, '2 Years': 730, '3 Years': 1095}
+DEFAULT_POLICY_DAYS = 365
+
+# Renewal reminders go out this many days before expiry
+RENEWAL_REMINDER_DAYS = 30
+
+RENEWAL_WINDOWS = [7, 15, 30, 60, 90]
+
+RENEWAL_CHUNK_SIZE = 5000
+
+# Case fields carried into the renewal pricing frame
+RENEWAL_FIELDS = [
+    'id',
+    'customer_name',
+    'customer_phone',
+    'registration_number',
+    'policy_number',
+    'assigned_to',
+    'vehicle_make',
+    'vehicle_model',
+    'vehicle_year',
+    'vehicle_value',
+    'vehicle_type',
+    'fuel_type',
+    'engine_capacity',
+    'coverage_type',
+    'driver_age',
+    'deductible',
+    'ncb_percentage',
+    'premium_amount',
+]
+
+RENEWAL_COLUMNS = [
+    'id', 'customer_name', 'customer_phone', 'registration_number', 'policy_number',
+    'assigned_to', 'vehicle_make', 'vehicle_model', 'coverage_type', 'plan',
+    'policy_expiry_date', 'premium_amount', 'ncb_percentage', 'renewal_ncb',
+    'renewal_idv', 'renewal_premium',
+]
+
+
+def policy_expiry_date(start: datetime, policy_duration: str) -> datetime:
+    """Expiry of a policy starting at ``start`` for a wizard duration like ``'1 Year'``."""
+    return start + timedelta(days=POLICY_DURATION_DAYS.get(policy_duration, DEFAULT_POLICY_DAYS))
+
+
+def _day(value) -> Optional[str]:
+    # ISO date part of a date, datetime or ISO string
+    if value is None or value == '':
+        return None
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return str(value)[:10]
+
+
+def expiry_key(status: Optional[str], created_date, expiry_date) -> Optional[str]:
+    """ISO expiry date a case is tracked under, or None if it is not renewable."""
+    if status not in RENEWABLE_STATUSES:
+        return None
+    expiry = _day(expiry_date)
+    if expiry is None:
+        # Policies saved before expiry dates were recorded: assume a one year
+        # term from when the case was created
+        created = _day(created_date)
+        if created is None:
+            return None
+        expiry = (date.fromisoformat(created) + timedelta(days=DEFAULT_POLICY_DAYS)).isoformat()
+    return expiry
+
+
+class RenewalBook:
+    """Renewable policies ordered by expiry date.
+
+    Like :class:`cdrive.indexes.FilterIndex` the book is built from the
+    store's columns once and then kept current through a store listener.
+    """
+
+    def __init__(self, store: CaseStore):
+        self._lock = threading.RLock()
+        self._expiry = {}
+        for case_id, status, created, expiry in store.columns(
+                ['id', 'status', 'created_date', 'policy_expiry_date']):
+            key = expiry_key(status, created, expiry)
+            if key is not None:
+                self._expiry[case_id] = key
+        self._entries = sorted((key, case_id) for case_id, key in self._expiry.items())
+        store.subscribe(self.apply)
+
+    def apply(self, cases: List[Dict]):
+        """Store listener: track newly issued policies and move changed expiries."""
+        with self._lock:
+            for case in cases:
+                case_id = case['id']
+                key = expiry_key(case.get('status'), case.get('created_date'),
+                                 case.get('policy_expiry_date'))
+                old = self._expiry.get(case_id)
+                if key == old:
+                    continue
+                if old is not None:
+                    del self._entries[bisect_left(self._entries, (old, case_id))]
+                    del self._expiry[case_id]
+                if key is not None:
+                    insort(self._entries, (key, case_id))
+                    self._expiry[case_id] = key
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def expiry(self, case_id: str) -> Optional[date]:
+        key = self._expiry.get(case_id)
+        return date.fromisoformat(key) if key else None
+
+    def _range(self, start: Optional[date], end: Optional[date]) -> tuple:
+        low = 0 if start is None else bisect_left(self._entries, (start.isoformat(),))
+        high = (len(self._entries) if end is None
+                else bisect_left(self._entries, ((end + timedelta(days=1)).isoformat(),)))
+        return low, max(low, high)
+
+    def between(self, start: Optional[date], end: Optional[date]) -> List[str]:
+        """Ids of policies expiring from ``start`` to ``end`` inclusive, soonest first.
+
+        ``None`` leaves that end of the range open.
+        """
+        with self._lock:
+            low, high = self._range(start, end)
+            return [case_id for _, case_id in self._entries[low:high]]
+
+    def count_between(self, start: Optional[date], end: Optional[date]) -> int:
+        with self._lock:
+            low, high = self._range(start, end)
+            return high - low
+
+    def due_within(self, days: int, today: Optional[date] = None, include_lapsed: bool = False) -> List[str]:
+        """Ids of policies expiring in the next ``days`` days, soonest first."""
+        today = today or date.today()
+        return self.between(None if include_lapsed else today, today + timedelta(days=days))
+
+    def count_due(self, days: int, today: Optional[date] = None) -> int:
+        today = today or date.today()
+        return self.count_between(today, today + timedelta(days=days))
+
+    def lapsed(self, today: Optional[date] = None) -> List[str]:
+        """Ids of policies that expired before ``today`` without being renewed."""
+        today = today or date.today()
+        return self.between(None, today - timedelta(days=1))
+
+    def count_lapsed(self, today: Optional[date] = None) -> int:
+        today = today or date.today()
+        return self.count_between(None, today - timedelta(days=1))
+
+
+def renewal_quotes(store: CaseStore, engine: PremiumEngine, book: RenewalBook, case_ids: List[str],
+                   chunk_size: int = RENEWAL_CHUNK_SIZE):
+    """Price the next policy term for ``case_ids`` and return a DataFrame.
+
+    Claim-free policies step up to the next NCB slab while cases with a
+    claim recorded (the wizard's ``any_claim``) lose their NCB.  The IDV is depreciated to the
+    vehicle's age in the renewal year.  Each policy is renewed on the plan
+    it was sold on, at the plan's current version, falling back to the
+    base premium when the plan is unknown.  Only the rating fields are read, ``chunk_size`` cases at a time.
+    """
+    import numpy as np
+    import pandas as pd
+
+    fields = RENEWAL_FIELDS[1:] + ['any_claim', 'plan_id', 'plan_version', 'selected_quote.name']
+    rows = []
+    plans = []
+    for start in range(0, len(case_ids), chunk_size):
+        for *row, plan_id, version, legacy_name in store.get_fields(case_ids[start:start + chunk_size], fields):
+            rows.append(row)
+            plans.append(case_plan({'plan_id': plan_id, 'plan_version': version,
+                                    'selected_quote': {'name': legacy_name}}))
+    frame = pd.DataFrame(rows, columns=RENEWAL_FIELDS + ['any_claim'])
+    if frame.empty:
+        return pd.DataFrame(columns=RENEWAL_COLUMNS)
+    frame['plan_id'] = [plan.id if plan else None for plan in plans]
+    frame['plan'] = [plan.name if plan else None for plan in plans]
+    frame['policy_expiry_date'] = [book.expiry(case_id) for case_id in frame['id']]
+    claimed = frame['any_claim'].fillna(0).astype(bool)
+
+    ncb = pd.to_numeric(frame['ncb_percentage'], errors='coerce').fillna(0).astype(int)
+    frame['renewal_ncb'] = np.where(claimed, 0, ncb.map(NCB_STEP_UP).fillna(0)).astype(int)
+
+    renewal_year = pd.to_datetime(frame['policy_expiry_date']).dt.year
+    # A vehicle registered after the renewal year is treated as new, not as negatively aged
+    age = (renewal_year - pd.to_numeric(frame['vehicle_year'], errors='coerce')).fillna(0).clip(lower=0).astype(int)
+    depreciation = age.map(depreciation_percent)
+    vehicle_value = pd.to_numeric(frame['vehicle_value'], errors='coerce').fillna(0)
+    frame['renewal_idv'] = (vehicle_value * (100 - depreciation) / 100).clip(lower=0).round()
+
+    priced = engine.price_frame(frame.assign(idv=frame['renewal_idv'], ncb_percentage=frame['renewal_ncb']))
+    renewal_premium = priced['base_premium'].to_numpy(copy=True)
+    for plan_id in CURRENT_PLANS:
+        on_plan = (frame['plan_id'] == plan_id).to_numpy() & priced[plan_id].notna().to_numpy()
+        renewal_premium[on_plan] = priced[plan_id].to_numpy()[on_plan]
+    frame['renewal_premium'] = renewal_premium.round(2)
+    return frame[RENEWAL_COLUMNS]
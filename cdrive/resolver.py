@@ -0,0 +1,345 @@
+"""Resolve free-text vehicle names from dealer feeds to the vehicle master.
+
+Dealer files write "Maruti", "MSIL Swift Dzire" or "HYUNDAI CRETA SX(O)"
+where the master has "Maruti Suzuki", "Dzire" and "SX(O)".  The make,
+model and variant columns are joined, split into lowercase tokens and
+matched against phrase indexes built once from the master: the names
+themselves, their spelling without spaces or punctuation ("spresso"),
+trade aliases, and words that name exactly one model of a make
+("hyryder").  The longest phrase wins.  Misspelled makes and models
+("Hundai", "Creata") fall back to an edit-distance search over the few
+names of the make.  Resolutions are memoized, so a bulk import resolves
+each distinct description once.
+"""
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from cdrive.vehicles import VehicleMaster, VehicleSpec, vehicle_master
+
+DEFAULT_RESOLVER_CACHE_SIZE = 65536
+
+# Trade and legal names dealers use -> master make
+MAKE_ALIASES = {
+    'Maruti': 'Maruti Suzuki',
+    'Suzuki': 'Maruti Suzuki',
+    'MSIL': 'Maruti Suzuki',
+    'Maruti Udyog': 'Maruti Suzuki',
+    'HMIL': 'Hyundai',
+    'Hyundai Motor India': 'Hyundai',
+    'Tata Motors': 'Tata',
+    'TML': 'Tata',
+    'Mahindra & Mahindra': 'Mahindra',
+    'M&M': 'Mahindra',
+    'Kia Motors': 'Kia',
+    'Kia India': 'Kia',
+    'Honda Cars': 'Honda',
+    'HCIL': 'Honda',
+    'Toyota Kirloskar': 'Toyota',
+    'TKM': 'Toyota',
+    'MG Motor': 'MG',
+    'Morris Garages': 'MG',
+    'Skoda Auto': 'Skoda',
+    'VW': 'Volkswagen',
+    'Nissan Motor': 'Nissan',
+    'Renault India': 'Renault',
+}
+
+# Former or shortened model names -> master model, per make
+MODEL_ALIASES = {
+    'Maruti Suzuki': {
+        'Swift Dzire': 'Dzire',
+        'Vitara Brezza': 'Brezza',
+        'Alto': 'Alto K10',
+        'Celerio X': 'Celerio',
+    },
+    'Hyundai': {
+        'Grand i10': 'Grand i10 Nios',
+        'Nios': 'Grand i10 Nios',
+        'Elite i20': 'i20',
+        'Creta EV': 'Creta Electric',
+    },
+    'Tata': {'Nexon Electric': 'Nexon EV', 'Tiago Electric': 'Tiago EV'},
+    'Mahindra': {'Scorpio': 'Scorpio N'},
+    'Toyota': {'Innova': 'Innova Crysta'},
+}
+
+# Model words too common to identify a model on their own
+_GENERIC_WORDS = {'plus', 'electric', 'classic', 'line', 'grand', 'cross', 'aircross'}
+
+# Phrase strengths: a whole name or alias outranks a single distinctive word
+_NAME, _WORD = 2, 1
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """Master names for a vehicle description.
+
+    ``model`` and ``variant`` are None when they could not be resolved.
+    ``exact`` is False when a name was only matched by edit distance.
+    """
+    make: str
+    model: Optional[str] = None
+    variant: Optional[str] = None
+    exact: bool = True
+
+
+def tokenize(text) -> Tuple[str, ...]:
+    """Lowercase ASCII word tokens of ``text``; ``+`` reads as "plus" and ``&`` as "and"."""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode().lower()
+    return tuple(_TOKEN.findall(text.replace('+', ' plus ').replace('&', ' and ')))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _typo_limit(word: str) -> int:
+    # Edits tolerated in a misspelt name; short names must match exactly
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 7 else 2
+
+
+def _deletions(word: str, depth: int) -> set:
+    """``word`` with up to ``depth`` characters removed, including ``word`` itself."""
+    found, frontier = {word}, {word}
+    for _ in range(depth):
+        frontier = {item[:i] + item[i + 1:] for item in frontier for i in range(len(item))}
+        found |= frontier
+    return found
+
+
+def _typo_index(index: Dict[tuple, tuple]) -> Dict[str, List[Tuple[str, object]]]:
+    # Deletion neighbourhoods of the whole one-word names (spaces removed) in a phrase index,
+    # so a misspelling is looked up instead of compared against every name
+    typos: Dict[str, List[Tuple[str, object]]] = {}
+    for phrase, (value, strength) in index.items():
+        if len(phrase) == 1 and strength == _NAME and _typo_limit(phrase[0]):
+            for key in _deletions(phrase[0], _typo_limit(phrase[0])):
+                typos.setdefault(key, []).append((phrase[0], value))
+    return typos
+
+
+def _add_phrase(index: Dict[tuple, tuple], name: str, value, strength: int = _NAME):
+    tokens = tokenize(name)
+    for phrase in {tokens, (''.join(tokens),)}:
+        if phrase and phrase != ('',) and index.get(phrase, (None, 0))[1] <= strength:
+            index[phrase] = (value, strength)
+
+
+def _longest_match(index: Dict[tuple, tuple], tokens: Tuple[str, ...],
+                   max_length: int) -> Optional[Tuple[object, int, int]]:
+    """Best ``(value, start, length)`` phrase of ``index`` in ``tokens``: strongest, then longest, then first."""
+    best, best_rank = None, None
+    for length in range(min(max_length, len(tokens)), 0, -1):
+        for start in range(len(tokens) - length + 1):
+            window = tokens[start:start + length]
+            hit = index.get(window)
+            if hit is None and length > 1:
+                hit = index.get((''.join(window),))
+            if hit is None:
+                continue
+            rank = (hit[1], length, -start)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (hit[0], start, length), rank
+    return best
+
+
+def _closest(typos: Dict[str, List[Tuple[str, object]]],
+             tokens: Tuple[str, ...]) -> Optional[Tuple[object, int, int]]:
+    """Nearest name in ``typos`` to one or two adjacent tokens, within the typo limit."""
+    best, best_distance = None, None
+    for length in (2, 1):
+        for start in range(len(tokens) - length + 1):
+            word = ''.join(tokens[start:start + length])
+            limit = _typo_limit(word)
+            if not limit or word.isdigit():
+                continue
+            for key in _deletions(word, limit):
+                for name, value in typos.get(key, ()):
+                    name_limit = min(limit, _typo_limit(name))
+                    distance = edit_distance(word, name, name_limit)
+                    if distance <= name_limit and (best_distance is None or distance < best_distance):
+                        best, best_distance = (value, start, length), distance
+    return best
+
+
+def _without(tokens: Tuple[str, ...], start: int, length: int) -> Tuple[str, ...]:
+    return tokens[:start] + tokens[start + length:]
+
+
+class VehicleResolver:
+    """Maps dealer vehicle descriptions to master make/model/variant names.
+
+    Thread-safe; one instance can be shared by every import in the
+    process so its cache carries over between files.
+    """
+
+    def __init__(self, master: Optional[VehicleMaster] = None, maxsize: int = DEFAULT_RESOLVER_CACHE_SIZE):
+        self.master = master or vehicle_master()
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._makes: Dict[tuple, tuple] = {}
+        for make in self.master.makes():
+            _add_phrase(self._makes, make, make)
+        for alias, make in MAKE_ALIASES.items():
+            if self.master.has_make(make):
+                _add_phrase(self._makes, alias, make)
+        # make -> model phrases, and model phrases across makes for descriptions without a make
+        self._models: Dict[str, Dict[tuple, tuple]] = {}
+        self._any_make_models: Dict[tuple, tuple] = {}
+        self._variants: Dict[tuple, Dict[tuple, tuple]] = {}
+        for make in self.master.makes():
+            models = self._models[make] = {}
+            for model in self.master.models(make):
+                _add_phrase(models, model, model)
+                variants = self._variants[(make, model)] = {}
+                for variant in self.master.variants(make, model):
+                    _add_phrase(variants, variant, variant)
+            for alias, model in MODEL_ALIASES.get(make, {}).items():
+                if self.master.has_model(make, model):
+                    _add_phrase(models, alias, model)
+            for word, model in self._distinctive_words(make).items():
+                if (word,) not in models:
+                    models[(word,)] = (model, _WORD)
+            for phrase, (model, strength) in models.items():
+                if strength == _NAME:
+                    # Names shared by several makes are dropped rather than guessed
+                    seen = self._any_make_models.get(phrase)
+                    self._any_make_models[phrase] = ((make, model), strength) if seen is None else (None, strength)
+        self._make_typos = _typo_index(self._makes)
+        self._model_typos = {make: _typo_index(models) for make, models in self._models.items()}
+        self._max_phrase = max(len(phrase) for index in (self._makes, self._any_make_models, *self._variants.values())
+                               for phrase in index)
+
+    def _distinctive_words(self, make: str) -> Dict[str, str]:
+        # Words of at least four letters found in exactly one model name of the make
+        owners: Dict[str, set] = {}
+        for model in self.master.models(make):
+            for word in tokenize(model):
+                owners.setdefault(word, set()).add(model)
+        return {word: next(iter(models)) for word, models in owners.items()
+                if len(models) == 1 and len(word) >= 4 and word not in _GENERIC_WORDS}
+
+    # Lookups
+
+    def resolve(self, make, model='', variant='') -> Optional[Resolution]:
+        """Resolve the make, model and variant columns of a row, or None if no make is recognised.
+
+        The three texts are read as one description, so a feed that puts
+        everything in the make column resolves too.
+        """
+        key = (make, model, variant)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        tokens = tokenize(' '.join(str(text) for text in key if text is not None))
+        resolution = self._resolve_tokens(tokens)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = resolution
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return resolution
+
+    def spec(self, resolution: Optional[Resolution]) -> Optional[VehicleSpec]:
+        """The master spec of a fully resolved vehicle, or None."""
+        if resolution is None or resolution.variant is None:
+            return None
+        return self.master.spec(resolution.make, resolution.model, resolution.variant)
+
+    def case_fields(self, resolution: Optional[Resolution]) -> Dict:
+        """Step 2 fields known for a resolution: the variant's spec, or what all the model's variants share."""
+        spec = self.spec(resolution)
+        if spec is not None:
+            return spec.case_fields()
+        if resolution is None or resolution.model is None:
+            return {}
+        return self.master.model_fields(resolution.make, resolution.model)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    # Matching
+
+    def _resolve_tokens(self, tokens: Tuple[str, ...]) -> Optional[Resolution]:
+        match = _longest_match(self._makes, tokens, self._max_phrase)
+        if match is None:
+            # No make given: accept a model name that belongs to only one make
+            model_match = _longest_match(self._any_make_models, tokens, self._max_phrase)
+            if model_match is not None and model_match[0] is not None:
+                (make, model), start, length = model_match
+                return Resolution(make, model, self._variant(make, model, _without(tokens, start, length)))
+        exact = match is not None
+        if match is None:
+            match = _closest(self._make_typos, tokens)
+        if match is None:
+            return None
+
+        make, start, length = match
+        rest = _without(tokens, start, length)
+        models = self._models[make]
+        match = _longest_match(models, rest, self._max_phrase)
+        if match is None:
+            match = _closest(self._model_typos[make], rest)
+            exact = exact and match is None
+        if match is None:
+            return Resolution(make, exact=exact)
+        model, start, length = match
+        return Resolution(make, model, self._variant(make, model, _without(rest, start, length)), exact)
+
+    def _variant(self, make: str, model: str, tokens: Tuple[str, ...]) -> Optional[str]:
+        # Variant codes are too short to match approximately
+        match = _longest_match(self._variants[(make, model)], tokens, self._max_phrase)
+        return match[0] if match else None
+
+
+_resolver: Optional[VehicleResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def vehicle_resolver() -> VehicleResolver:
+    """The process-wide resolver over :func:`cdrive.vehicles.vehicle_master`."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = VehicleResolver()
+    return _resolver
@@ -0,0 +1,183 @@
+"""Daily case rollups for the analytics reports.
+
+The ``case_rollups`` table holds, for every creation day and every value
+of a few report dimensions, the number of cases and the premium they
+carry.  SQLite triggers on the cases table keep it current inside each
+write's own transaction: an insert adds the case to its rows and an
+update moves it from its old rows to its new ones.  Because the triggers
+live in the database, writes from every process (the app, the JSON API,
+bulk imports) are counted, and reports read a few thousand rollup rows
+however many cases there are.
+"""
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from cdrive.catalog import CASE_STEPS
+from cdrive.store import DEFAULT_DB_PATH
+
+# Report dimension -> SQL reading it from a row of the cases table
+ROLLUP_DIMENSIONS = {
+    'vehicle_make': '{row}.vehicle_make',
+    'fuel_type': '{row}.fuel_type',
+    'coverage_type': '{row}.coverage_type',
+    'assigned_to': '{row}.assigned_to',
+    'status': '{row}.status',
+    # The wizard step a case has reached, for the conversion funnel
+    'step': "json_extract({row}.data, '$.step')",
+}
+
+# Every case has exactly one status, so the status rows add up to the totals
+TOTAL_DIMENSION = 'status'
+
+
+def _iso_day(value) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def _value_expression(dimension: str, row: str) -> str:
+    return f"coalesce(CAST({ROLLUP_DIMENSIONS[dimension].format(row=row)} AS TEXT), '')"
+
+
+def _day_expression(row: str) -> str:
+    return f"coalesce(substr({row}.created_date, 1, 10), '')"
+
+
+def _upserts(row: str, sign: str) -> str:
+    # One statement per dimension adding (sign '+') or removing ('-') a row's case
+    statements = []
+    for dimension in ROLLUP_DIMENSIONS:
+        statements.append(
+            f"INSERT INTO case_rollups (day, dimension, value, cases, premium) "
+            f"VALUES ({_day_expression(row)}, '{dimension}', {_value_expression(dimension, row)}, "
+            f"{sign}1, {sign}coalesce({row}.premium_amount, 0)) "
+            f"ON CONFLICT (dimension, day, value) DO UPDATE SET "
+            f"cases = cases + excluded.cases, premium = premium + excluded.premium;"
+        )
+    return '\n'.join(statements)
+
+
+class CaseRollups:
+    """Reads the daily rollups, installing the table and its triggers on first use.
+
+    The cases table must already exist, so open the case store first.
+    Databases that had cases before the rollups were installed are
+    backfilled once, in the same transaction.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock:
+            # IMMEDIATE so two processes starting together backfill only once
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'case_rollups'"
+                ).fetchone()
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS case_rollups (
+                        day TEXT NOT NULL,
+                        dimension TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        cases INTEGER NOT NULL,
+                        premium REAL NOT NULL,
+                        PRIMARY KEY (dimension, day, value)
+                    ) WITHOUT ROWID
+                """)
+                self._conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS cases_rollup_insert AFTER INSERT ON cases BEGIN
+                        {_upserts('new', '+')}
+                    END
+                """)
+                self._conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS cases_rollup_update AFTER UPDATE OF data ON cases BEGIN
+                        {_upserts('old', '-')}
+                        {_upserts('new', '+')}
+                    END
+                """)
+                if not exists:
+                    for dimension in ROLLUP_DIMENSIONS:
+                        self._conn.execute(
+                            f"INSERT INTO case_rollups (day, dimension, value, cases, premium) "
+                            f"SELECT {_day_expression('cases')}, '{dimension}', "
+                            f"{_value_expression(dimension, 'cases')}, count(*), "
+                            f"coalesce(sum(premium_amount), 0) FROM cases GROUP BY 1, 3"
+                        )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _where(self, dimension: str, start: Optional[date], end: Optional[date]) -> tuple:
+        # Inclusive day range; with no range, cases without a date are included too
+        clauses, params = ['dimension = ?'], [dimension]
+        if start:
+            clauses.append('day >= ?')
+            params.append(_iso_day(start))
+        if end:
+            clauses.append('day <= ?')
+            params.append(_iso_day(end))
+        return ' AND '.join(clauses), params
+
+    # Reports
+
+    def daily_totals(self, start: Optional[date] = None, end: Optional[date] = None) -> List[tuple]:
+        """``(day, cases, premium)`` per creation day in ``[start, end]``, oldest first."""
+        where, params = self._where(TOTAL_DIMENSION, start, end)
+        return self._query(
+            f"SELECT day, sum(cases), sum(premium) FROM case_rollups WHERE {where} AND day != '' "
+            f"GROUP BY day HAVING sum(cases) > 0 ORDER BY day",
+            params
+        )
+
+    def breakdown(self, dimension: str, start: Optional[date] = None,
+                  end: Optional[date] = None) -> Dict[str, tuple]:
+        """``value -> (cases, premium)`` for cases created in ``[start, end]``, most premium first."""
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Unknown rollup dimension '{dimension}'")
+        where, params = self._where(dimension, start, end)
+        rows = self._query(
+            f"SELECT value, sum(cases), sum(premium) FROM case_rollups WHERE {where} "
+            f"GROUP BY value HAVING sum(cases) > 0 ORDER BY sum(premium) DESC, sum(cases) DESC",
+            params
+        )
+        return {value or 'Unknown': (cases, premium) for value, cases, premium in rows}
+
+    def funnel(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[int, int]:
+        """Cases created in ``[start, end]`` that reached each wizard step.
+
+        A case counts towards its current step and every step before it.
+        """
+        steps = range(1, len(CASE_STEPS) + 1)
+        at_step = {step: 0 for step in steps}
+        for value, (cases, _) in self.breakdown('step', start, end).items():
+            try:
+                step = int(float(value))
+            except ValueError:
+                continue
+            if step in at_step:
+                at_step[step] += cases
+        reached = {}
+        running = 0
+        for step in reversed(steps):
+            running += at_step[step]
+            reached[step] = running
+        return dict(sorted(reached.items()))
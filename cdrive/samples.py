@@ -0,0 +1,150 @@
+"""Sample cases that seed an empty store for demos and first runs."""
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from cdrive.followups import FollowUpScheduler
+from cdrive.store import CaseStore
+
+
+def sample_cases(now: Optional[datetime] = None) -> List[Dict]:
+    """Five cases across vehicle types and statuses, dated relative to ``now``."""
+    now = now or datetime.now()
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'customer_name': 'Rajesh Kumar',
+            'customer_phone': '+91-9876543210',
+            'customer_email': 'rajesh.kumar@email.com',
+            'vehicle_make': 'Maruti Suzuki',
+            'vehicle_model': 'Swift',
+            'vehicle_variant': 'VXi',
+            'vehicle_year': 2020,
+            'registration_number': 'MH12AB1234',
+            'vehicle_type': 'Hatchback',
+            'fuel_type': 'Petrol',
+            'engine_capacity': '1197cc',
+            'vehicle_value': 800000,
+            'coverage_type': 'Comprehensive',
+            'premium_amount': 15000,
+            'status': 'Policy Issued',
+            'created_date': now - timedelta(days=15),
+            'assigned_to': 'Priya Sharma',
+            'follow_up_date': now + timedelta(days=330),
+            'policy_number': 'VEH-2024-001',
+            'policy_expiry_date': now + timedelta(days=350),
+            'documents': ['RC Copy', 'Driving License', 'Previous Policy', 'Photos'],
+            'step': 9
+        },
+        {
+            'id': str(uuid.uuid4()),
+            'customer_name': 'Anita Desai',
+            'customer_phone': '+91-9876543211',
+            'customer_email': 'anita.desai@email.com',
+            'vehicle_make': 'Hyundai',
+            'vehicle_model': 'Creta',
+            'vehicle_variant': 'SX',
+            'vehicle_year': 2023,
+            'registration_number': 'DL08CB5678',
+            'vehicle_type': 'SUV',
+            'fuel_type': 'Diesel',
+            'engine_capacity': '1493cc',
+            'vehicle_value': 1500000,
+            'coverage_type': 'Comprehensive',
+            'premium_amount': 22000,
+            'status': 'Quote Generated',
+            'created_date': now - timedelta(days=5),
+            'assigned_to': 'Amit Singh',
+            'follow_up_date': now + timedelta(days=3),
+            'documents': ['RC Copy', 'Driving License'],
+            'step': 4
+        },
+        {
+            'id': str(uuid.uuid4()),
+            'customer_name': 'Mohammed Ali',
+            'customer_phone': '+91-9876543212',
+            'customer_email': 'mohammed.ali@email.com',
+            'vehicle_make': 'Tata',
+            'vehicle_model': 'Nexon',
+            'vehicle_variant': 'XZ Plus',
+            'vehicle_year': 2022,
+            'registration_number': 'KA03MN9012',
+            'vehicle_type': 'SUV',
+            'fuel_type': 'Electric',
+            'engine_capacity': 'Electric',
+            'vehicle_value': 1200000,
+            'coverage_type': 'Comprehensive',
+            'premium_amount': 18000,
+            'status': 'Documentation Pending',
+            'created_date': now - timedelta(days=2),
+            'assigned_to': 'Sneha Patel',
+            'follow_up_date': now + timedelta(days=1),
+            'documents': ['RC Copy', 'Driving License'],
+            'step': 5
+        },
+        {
+            'id': str(uuid.uuid4()),
+            'customer_name': 'Lakshmi Nair',
+            'customer_phone': '+91-9876543213',
+            'customer_email': 'lakshmi.nair@email.com',
+            'vehicle_make': 'Mahindra',
+            'vehicle_model': 'XUV700',
+            'vehicle_variant': 'AX7',
+            'vehicle_year': 2024,
+            'registration_number': 'TN22PQ3456',
+            'vehicle_type': 'SUV',
+            'fuel_type': 'Petrol',
+            'engine_capacity': '1998cc',
+            'vehicle_value': 2200000,
+            'coverage_type': 'Comprehensive',
+            'premium_amount': 28000,
+            'status': 'New Lead',
+            'created_date': now - timedelta(days=1),
+            'assigned_to': 'Rahul Verma',
+            'follow_up_date': now + timedelta(days=2),
+            'documents': [],
+            'step': 1
+        },
+        {
+            'id': str(uuid.uuid4()),
+            'customer_name': 'Suresh Reddy',
+            'customer_phone': '+91-9876543214',
+            'customer_email': 'suresh.reddy@email.com',
+            'vehicle_make': 'Honda',
+            'vehicle_model': 'City',
+            'vehicle_variant': 'V',
+            'vehicle_year': 2019,
+            'registration_number': 'AP09RS7890',
+            'vehicle_type': 'Sedan',
+            'fuel_type': 'Petrol',
+            'engine_capacity': '1498cc',
+            'vehicle_value': 900000,
+            'coverage_type': 'Third Party',
+            'premium_amount': 8000,
+            'status': 'Policy Expired',
+            'created_date': now - timedelta(days=30),
+            'assigned_to': 'Neha Gupta',
+            'follow_up_date': None,
+            'policy_number': 'VEH-2023-045',
+            'policy_expiry_date': now - timedelta(days=10),
+            'documents': ['RC Copy', 'Driving License', 'Previous Policy', 'Photos'],
+            'step': 9
+        }
+    ]
+
+
+def seed_sample_data(store: CaseStore, scheduler: FollowUpScheduler) -> bool:
+    """Seed an empty store with the sample cases and their follow-ups.
+
+    Several server processes may call this at once; only one seeds.
+    Returns True for that one.
+    """
+    cases = sample_cases()
+    if not store.seed(cases):
+        return False
+    scheduler.schedule_many([
+        {'case_id': case['id'], 'kind': 'customer', 'assigned_to': case['assigned_to'],
+         'due': case['follow_up_date']}
+        for case in cases if case['follow_up_date']
+    ])
+    return True
@@ -0,0 +1,73 @@
+"""Collision-free number sequences shared by every process.
+
+Sequence counters live in a ``sequences`` table next to the cases.  A
+process reserves a block of numbers with one ``BEGIN IMMEDIATE``
+transaction, which SQLite serialises across processes, and then hands
+them out from memory, so most allocations never touch the database.
+Numbers are unique but not gap-free: whatever is left of a block when a
+process exits is never used.
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+from cdrive.store import DEFAULT_DB_PATH
+
+DEFAULT_BLOCK_SIZE = 100
+
+# Seconds to wait for another process's block reservation to commit
+LOCK_TIMEOUT = 30
+
+
+class SequenceAllocator:
+    """Hands out unique integers from named sequences, a block at a time."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.path = path
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._connect()
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sequences (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)'
+            )
+
+    def _connect(self):
+        # Autocommit mode so reservations can open their own BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None,
+                                     check_same_thread=False)
+        if self.path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._pid = os.getpid()
+        # name -> [next value, end of block)
+        self._blocks: Dict[str, List[int]] = {}
+
+    def _reserve(self, name: str, size: int) -> List[int]:
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._conn.execute('INSERT OR IGNORE INTO sequences (name, next_value) VALUES (?, 1)', (name,))
+            start = self._conn.execute('SELECT next_value FROM sequences WHERE name = ?', (name,)).fetchone()[0]
+            self._conn.execute('UPDATE sequences SET next_value = ? WHERE name = ?', (start + size, name))
+            self._conn.execute('COMMIT')
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        return [start, start + size]
+
+    def next(self, name: str) -> int:
+        """The next unused number in sequence ``name``, starting from 1."""
+        with self._lock:
+            if os.getpid() != self._pid:
+                # A forked child must not reuse its parent's connection or blocks
+                self._connect()
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                block = self._blocks[name] = self._reserve(name, self.block_size)
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
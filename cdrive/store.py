@@ -0,0 +1,666 @@
+"""Persistent case storage.
+
+Cases are stored as whole JSON documents alongside a handful of scalar
+columns that the dashboard and Manage Cases screens filter, sort and
+aggregate on.  Those columns are indexed so queries never have to load
+every case into memory.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_DB_PATH = os.environ.get('CDRIVE_DB_PATH', 'cdrive.db')
+
+# Columns copied out of the case document on every write
+CASE_COLUMNS = [
+    'status',
+    'assigned_to',
+    'vehicle_make',
+    'coverage_type',
+    'registration_number',
+    'created_date',
+    'vehicle_type',
+    'fuel_type',
+    'premium_amount',
+    'vehicle_value',
+    'policy_expiry_date',
+]
+
+NUMERIC_COLUMNS = ['premium_amount', 'vehicle_value']
+
+INDEXED_COLUMNS = [
+    'status',
+    'assigned_to',
+    'vehicle_make',
+    'coverage_type',
+    'registration_number',
+    'created_date',
+]
+
+# Fields covered by the trigram search index
+SEARCH_FIELDS = [
+    'customer_name',
+    'customer_phone',
+    'customer_email',
+    'registration_number',
+    'policy_number',
+]
+
+# Separators dropped from searched values and queries, so "MH 12 AB" finds
+# MH12AB1234 and "9876543210" finds +91-9876543210
+SEARCH_IGNORED_CHARS = ' -+()/'
+
+# Trigram matching needs at least this many characters
+MIN_SEARCH_LENGTH = 3
+
+# How often a store checks for cases written by other processes
+CHANGE_POLL_SECONDS = 1.0
+
+# Connections in a SQLiteStorePool
+DEFAULT_POOL_SIZE = 8
+
+SEARCH_RESULT_LIMIT = 1000
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def dump_case(case: Dict) -> str:
+    return json.dumps(case, default=_encode_value, ensure_ascii=False)
+
+
+# Reused so each load does not build a new decoder
+_case_decoder = json.JSONDecoder(object_hook=_decode_object)
+
+
+def load_case(data: str) -> Dict:
+    return _case_decoder.decode(data)
+
+
+def normalize_search_text(text: str) -> str:
+    text = str(text).lower()
+    for char in SEARCH_IGNORED_CHARS:
+        text = text.replace(char, '')
+    return text
+
+
+def _search_expression(field: str) -> str:
+    # SQL equivalent of normalize_search_text for a field of the new row
+    expression = f"coalesce(json_extract(new.data, '$.{field}'), '')"
+    for char in SEARCH_IGNORED_CHARS:
+        expression = f"replace({expression}, '{char}', '')"
+    return f'lower({expression})'
+
+
+def _column_expression(column: str) -> str:
+    # SQL equivalent of _column_value, reading the stored JSON document
+    return (f"coalesce(json_extract(data, '$.{column}.__datetime__'), "
+            f"json_extract(data, '$.{column}.__date__'), json_extract(data, '$.{column}'))")
+
+
+def _column_value(case: Dict, column: str):
+    value = case.get(column)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _column_type(column: str) -> str:
+    return 'REAL' if column in NUMERIC_COLUMNS else 'TEXT'
+
+
+def page_cursor(case: Dict) -> tuple:
+    """Keyset cursor for paging past ``case`` in newest-first order."""
+    return (_column_value(case, 'created_date'), case['id'])
+
+
+class CaseStore(ABC):
+    """Backend-neutral interface used by the UI to read and write cases.
+
+    Filters are passed as keyword arguments naming a case column; a list
+    or tuple value matches any of its members.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def subscribe(self, listener: Callable[[List[Dict]], None]):
+        """Call ``listener`` with the written cases after every add or update."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[List[Dict]], None]):
+        self._listeners.remove(listener)
+
+    def _notify(self, cases: List[Dict]):
+        for listener in list(self._listeners):
+            listener(cases)
+
+    @abstractmethod
+    def add(self, case: Dict) -> str:
+        """Insert a case, assigning an ``id`` if it has none. Returns the id."""
+
+    @abstractmethod
+    def add_many(self, cases: Iterable[Dict]) -> int:
+        """Insert several cases in a single transaction. Returns the count."""
+
+    @abstractmethod
+    def seed(self, cases: List[Dict]) -> bool:
+        """Add ``cases`` if the store has never been seeded and is empty.
+
+        Only one caller ever seeds a store, even when several processes
+        start at once.  Returns True for that caller.
+        """
+
+    @abstractmethod
+    def update(self, case_id: str, changes: Dict, unless_status: Optional[str] = None) -> Optional[Dict]:
+        """Merge ``changes`` into an existing case and return the result.
+
+        With ``unless_status``, nothing is written and None is returned if
+        the stored case already has that status.  The check and the write
+        are one statement, so of several concurrent writers only one can
+        move a case out of a status.
+        """
+
+    @abstractmethod
+    def update_many(self, changes: Dict[str, Dict], unless_status: Optional[str] = None) -> List[Dict]:
+        """Apply ``{case_id: changes}`` in a single transaction and return the updated cases.
+
+        With ``unless_status``, cases already in that status are left as
+        they are and missing from the result, as with :meth:`update`.
+        """
+
+    @abstractmethod
+    def get(self, case_id: str) -> Optional[Dict]:
+        """Return a single case, or None if it does not exist."""
+
+    @abstractmethod
+    def get_many(self, case_ids: List[str]) -> List[Dict]:
+        """Return the given cases in the order of ``case_ids``, skipping unknown ids."""
+
+    @abstractmethod
+    def get_fields(self, case_ids: List[str], fields: List[str]) -> List[tuple]:
+        """Return ``(id, *fields)`` tuples for the given cases without building whole documents.
+
+        Fields may be dotted paths into the document such as
+        ``'selected_quote.name'``; missing fields are None.  Rows follow
+        the order of ``case_ids``, skipping unknown ids.
+        """
+
+    @abstractmethod
+    def find(self, limit: Optional[int] = None, order_by: str = 'created_date',
+             descending: bool = True, **filters) -> List[Dict]:
+        """Return matching cases ordered by an indexed column."""
+
+    @abstractmethod
+    def find_page(self, limit: int, cursor: Optional[tuple] = None, **filters) -> List[Dict]:
+        """Return up to ``limit`` matching cases, newest first.
+
+        ``cursor`` is the :func:`page_cursor` of the last case on the
+        previous page; only cases created before it are returned.
+        """
+
+    @abstractmethod
+    def search(self, text: str, limit: int = SEARCH_RESULT_LIMIT, **filters) -> List[str]:
+        """Ids of matching cases whose ``SEARCH_FIELDS`` contain ``text``, newest first.
+
+        At most ``limit`` of the most recently written matches are returned;
+        ``filters`` apply before the limit.  Matching ignores case and
+        ``SEARCH_IGNORED_CHARS``; queries shorter than ``MIN_SEARCH_LENGTH``
+        return no results.
+        """
+
+    @abstractmethod
+    def search_count(self, text: str, **filters) -> int:
+        """How many matching cases contain ``text``, however many :meth:`search` returns."""
+
+    @abstractmethod
+    def count(self, **filters) -> int:
+        """Count matching cases."""
+
+    @abstractmethod
+    def columns(self, names: List[str]) -> List[tuple]:
+        """Return the given columns for every case as a list of tuples."""
+
+    @abstractmethod
+    def iter_columns(self, names: List[str], chunk_size: int) -> Iterator[List[tuple]]:
+        """Yield the given columns for every case, ``chunk_size`` rows at a time."""
+
+    @abstractmethod
+    def version(self) -> int:
+        """Return a counter that changes whenever a case is added or updated."""
+
+
+class SQLiteCaseStore(CaseStore):
+    """SQLite implementation of :class:`CaseStore`.
+
+    A single connection is shared by all Streamlit sessions in the
+    process and serialised with a lock; WAL journaling keeps readers in
+    other processes from blocking on writes.
+
+    Several processes can share one database file.  Every write tags its
+    rows with the new store version, and :meth:`refresh` (run
+    periodically by :meth:`start_change_watcher`) passes cases written by
+    other processes to this store's listeners, so in-memory indexes stay
+    current everywhere.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+        # Versions this process wrote (its listeners already saw them) and
+        # the version up to which other processes' writes were applied
+        self._written_versions = set()
+        self._synced_version = self.version()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def _create_schema(self):
+        columns = ',\n'.join(f'{column} {_column_type(column)}' for column in CASE_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS cases (
+                    id TEXT PRIMARY KEY,
+                    {columns},
+                    data TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._add_missing_columns()
+            # Cases written since a given version, for other processes to catch up
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_cases_version ON cases (version)')
+            for column in INDEXED_COLUMNS:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS idx_cases_{column} ON cases ({column})'
+                )
+            # Keyset pagination walks (created_date, id) in descending order
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_cases_created_id ON cases (created_date, id)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+            self._create_search_index()
+
+    def _add_missing_columns(self):
+        # Databases created by older versions lack newer columns; add them and
+        # fill them in from the stored documents
+        existing = {row[1] for row in self._conn.execute('PRAGMA table_info(cases)')}
+        for column in CASE_COLUMNS:
+            if column not in existing:
+                self._conn.execute(f'ALTER TABLE cases ADD COLUMN {column} {_column_type(column)}')
+                self._conn.execute(f'UPDATE cases SET {column} = {_column_expression(column)}')
+        if 'version' not in existing:
+            self._conn.execute('ALTER TABLE cases ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+    def _create_search_index(self):
+        # FTS5 trigram index kept in step with the cases table by triggers
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'case_search'"
+        ).fetchone()
+        self._conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS case_search USING fts5("
+            f"{', '.join(SEARCH_FIELDS)}, tokenize='trigram')"
+        )
+        values = ', '.join(_search_expression(field) for field in SEARCH_FIELDS)
+        assignments = ', '.join(f'{field} = {_search_expression(field)}' for field in SEARCH_FIELDS)
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS cases_search_insert AFTER INSERT ON cases BEGIN
+                INSERT INTO case_search (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (new.rowid, {values});
+            END
+        """)
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS cases_search_update AFTER UPDATE OF data ON cases BEGIN
+                UPDATE case_search SET {assignments} WHERE rowid = new.rowid;
+            END
+        """)
+        if not exists:
+            # Index cases written before the search table existed
+            self._conn.execute(
+                f"INSERT INTO case_search (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"SELECT rowid, {values.replace('new.data', 'data')} FROM cases"
+            )
+
+    def close(self):
+        self.stop_change_watcher()
+        with self._lock:
+            self._conn.close()
+
+    # Writes
+
+    def _row(self, case: Dict) -> tuple:
+        return (case['id'], *[_column_value(case, column) for column in CASE_COLUMNS], dump_case(case))
+
+    def _insert(self, case: Dict, version: int) -> Dict:
+        if not case.get('id'):
+            case = {**case, 'id': str(uuid.uuid4())}
+        placeholders = ', '.join('?' * (len(CASE_COLUMNS) + 3))
+        self._conn.execute(
+            f"INSERT INTO cases (id, {', '.join(CASE_COLUMNS)}, data, version) VALUES ({placeholders})",
+            (*self._row(case), version)
+        )
+        return case
+
+    def _bump_version(self) -> int:
+        # First statement of every write transaction, so concurrent writers
+        # in other processes queue here and each gets its own version
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def add(self, case: Dict) -> str:
+        with self._lock:
+            with self._conn:
+                version = self._bump_version()
+                case = self._insert(case, version)
+            self._written_versions.add(version)
+        self._notify([case])
+        return case['id']
+
+    def add_many(self, cases: Iterable[Dict]) -> int:
+        cases = list(cases)
+        if not cases:
+            return 0
+        with self._lock:
+            with self._conn:
+                version = self._bump_version()
+                added = [self._insert(case, version) for case in cases]
+            self._written_versions.add(version)
+        self._notify(added)
+        return len(added)
+
+    def seed(self, cases: List[Dict]) -> bool:
+        with self._lock:
+            with self._conn:
+                # The marker insert takes the write lock, so a second process
+                # waits here and then finds the marker already set
+                first = self._conn.execute(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES ('seeded', 1)"
+                ).rowcount == 1
+                if not first or self._conn.execute('SELECT 1 FROM cases LIMIT 1').fetchone():
+                    return False
+                version = self._bump_version()
+                added = [self._insert(case, version) for case in cases]
+            self._written_versions.add(version)
+        self._notify(added)
+        return True
+
+    def _update(self, case_id: str, changes: Dict, version: int,
+                unless_status: Optional[str] = None) -> Optional[Dict]:
+        current = self.get(case_id)
+        if current is None:
+            raise KeyError(case_id)
+        case = {**current, **changes, 'id': case_id}
+        assignments = ', '.join(f'{column} = ?' for column in CASE_COLUMNS)
+        row = self._row(case)
+        where, params = 'id = ?', [case_id]
+        if unless_status is not None:
+            where += ' AND status IS NOT ?'
+            params.append(unless_status)
+        cursor = self._conn.execute(
+            f'UPDATE cases SET {assignments}, data = ?, version = ? WHERE {where}',
+            (*row[1:], version, *params)
+        )
+        return case if cursor.rowcount else None
+
+    def update(self, case_id: str, changes: Dict, unless_status: Optional[str] = None) -> Optional[Dict]:
+        with self._lock:
+            with self._conn:
+                version = self._bump_version()
+                case = self._update(case_id, changes, version, unless_status)
+            if case is None:
+                return None
+            self._written_versions.add(version)
+        self._notify([case])
+        return case
+
+    def update_many(self, changes: Dict[str, Dict], unless_status: Optional[str] = None) -> List[Dict]:
+        if not changes:
+            return []
+        with self._lock:
+            with self._conn:
+                version = self._bump_version()
+                updated = [self._update(case_id, case_changes, version, unless_status)
+                           for case_id, case_changes in changes.items()]
+            updated = [case for case in updated if case is not None]
+            self._written_versions.add(version)
+        if updated:
+            self._notify(updated)
+        return updated
+
+    # Changes from other processes
+
+    def refresh(self) -> int:
+        """Pass cases other processes wrote since the last refresh to the listeners.
+
+        Returns how many cases were passed on.
+        """
+        with self._lock:
+            if self.version() == self._synced_version:
+                return 0
+            version, rows = self._changes_since(self._synced_version)
+            cases = [load_case(data) for row_version, data in rows
+                     if row_version not in self._written_versions]
+            self._synced_version = version
+            self._written_versions = {seen for seen in self._written_versions if seen > version}
+            # Notify under the lock so a concurrent local write cannot be
+            # overtaken by an older copy of the same case
+            if cases:
+                self._notify(cases)
+        return len(cases)
+
+    def start_change_watcher(self, interval: float = CHANGE_POLL_SECONDS):
+        """Run :meth:`refresh` every ``interval`` seconds on a daemon thread."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.refresh()
+                except sqlite3.Error:
+                    pass  # Database busy or closing; try again next round
+
+        self._watcher = threading.Thread(target=watch, name='case-change-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_change_watcher(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    # Reads
+
+    def _where(self, filters: Dict) -> tuple:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in CASE_COLUMNS:
+                raise ValueError(f"Cannot filter cases on '{column}'")
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get(self, case_id: str) -> Optional[Dict]:
+        rows = self._query('SELECT data FROM cases WHERE id = ?', (case_id,))
+        return load_case(rows[0][0]) if rows else None
+
+    def get_many(self, case_ids: List[str]) -> List[Dict]:
+        if not case_ids:
+            return []
+        rows = self._query(
+            f"SELECT id, data FROM cases WHERE id IN ({', '.join('?' * len(case_ids))})",
+            list(case_ids)
+        )
+        cases = {case_id: data for case_id, data in rows}
+        return [load_case(cases[case_id]) for case_id in case_ids if case_id in cases]
+
+    def get_fields(self, case_ids: List[str], fields: List[str]) -> List[tuple]:
+        if not case_ids:
+            return []
+        for field in fields:
+            if not all(part.isidentifier() for part in field.split('.')):
+                raise ValueError(f"Invalid case field '{field}'")
+        # A multi-path json_extract parses each document once and returns a JSON array
+        paths = [f"'$.{field}'" for field in fields]
+        if len(paths) == 1:
+            paths.append(paths[0])
+        rows = self._query(
+            f"SELECT id, json_extract(data, {', '.join(paths)}) FROM cases "
+            f"WHERE id IN ({', '.join('?' * len(case_ids))})",
+            list(case_ids)
+        )
+        rows = {case_id: values for case_id, values in rows}
+        return [(case_id, *load_case(rows[case_id])[:len(fields)]) for case_id in case_ids if case_id in rows]
+
+    def find(self, limit: Optional[int] = None, order_by: str = 'created_date',
+             descending: bool = True, **filters) -> List[Dict]:
+        if order_by not in INDEXED_COLUMNS:
+            raise ValueError(f"Cannot order cases by '{order_by}'")
+        where, params = self._where(filters)
+        sql = f"SELECT data FROM cases{where} ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [load_case(data) for (data,) in self._query(sql, params)]
+
+    def find_page(self, limit: int, cursor: Optional[tuple] = None, **filters) -> List[Dict]:
+        where, params = self._where(filters)
+        if cursor is not None:
+            where += (' AND ' if where else ' WHERE ') + '(created_date, id) < (?, ?)'
+            params.extend(cursor)
+        sql = f'SELECT data FROM cases{where} ORDER BY created_date DESC, id DESC LIMIT ?'
+        params.append(limit)
+        return [load_case(data) for (data,) in self._query(sql, params)]
+
+    def _search_where(self, text: str, filters: Dict) -> Optional[tuple]:
+        # WHERE clause for FTS matches of ``text`` that also pass ``filters``
+        query = normalize_search_text(text)
+        if len(query) < MIN_SEARCH_LENGTH:
+            return None
+        where, params = self._where(filters)
+        where = where.replace(' WHERE ', ' AND ', 1)
+        return (f' WHERE rowid IN (SELECT rowid FROM case_search WHERE case_search MATCH ?){where}',
+                ['"' + query.replace('"', '""') + '"', *params])
+
+    def search(self, text: str, limit: int = SEARCH_RESULT_LIMIT, **filters) -> List[str]:
+        search = self._search_where(text, filters)
+        if search is None:
+            return []
+        where, params = search
+        # Take the most recently written matches, then order just those by creation date
+        rows = self._query(
+            f'SELECT id FROM (SELECT id, created_date FROM cases{where} ORDER BY rowid DESC LIMIT ?) '
+            f'ORDER BY created_date DESC, id DESC',
+            (*params, limit)
+        )
+        return [case_id for (case_id,) in rows]
+
+    def search_count(self, text: str, **filters) -> int:
+        search = self._search_where(text, filters)
+        if search is None:
+            return 0
+        where, params = search
+        return self._query(f'SELECT COUNT(*) FROM cases{where}', params)[0][0]
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        return self._query(f'SELECT COUNT(*) FROM cases{where}', params)[0][0]
+
+    def _check_columns(self, names: List[str]):
+        for name in names:
+            if name not in CASE_COLUMNS and name != 'id':
+                raise ValueError(f"Unknown case column '{name}'")
+
+    def columns(self, names: List[str]) -> List[tuple]:
+        self._check_columns(names)
+        return self._query(f"SELECT {', '.join(names)} FROM cases")
+
+    def iter_columns(self, names: List[str], chunk_size: int) -> Iterator[List[tuple]]:
+        self._check_columns(names)
+        # Keyset pages on rowid, so the lock is never held between chunks
+        last_rowid = 0
+        while True:
+            rows = self._query(
+                f"SELECT rowid, {', '.join(names)} FROM cases WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, chunk_size)
+            )
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    def version(self) -> int:
+        return self._query("SELECT value FROM meta WHERE key = 'version'")[0][0]
+
+    def _changes_since(self, version: int) -> Tuple[int, List[tuple]]:
+        # Both reads in one transaction so no write can land between them
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN')
+            current = self.version()
+            rows = self._query('SELECT version, data FROM cases WHERE version > ? ORDER BY version', (version,))
+        return current, rows
+
+
+class SQLiteStorePool:
+    """A fixed number of :class:`SQLiteCaseStore` connections to one database.
+
+    Each store serialises its callers on a single connection; services
+    that serve many requests at once borrow a store per request instead,
+    so reads run side by side.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, size: int = DEFAULT_POOL_SIZE):
+        self.path = path
+        self._stores = queue.Queue()
+        self._all = [SQLiteCaseStore(path) for _ in range(size)]
+        for store in self._all:
+            self._stores.put(store)
+
+    @contextmanager
+    def store(self) -> Iterator[SQLiteCaseStore]:
+        """Borrow a store, waiting for one to be free."""
+        store = self._stores.get()
+        try:
+            yield store
+        finally:
+            self._stores.put(store)
+
+    def close(self):
+        for store in self._all:
+            store.close()
@@ -0,0 +1,215 @@
+"""Case wizard step telemetry.
+
+Every move between wizard steps becomes one row in the append-only
+``step_events`` table: when it happened, the case and browser session,
+the step left and the step entered, and how long was spent on the step
+left.  Sessions only append to an in-memory buffer; a background thread
+writes the buffer in one transaction every ``FLUSH_SECONDS``, or sooner
+once ``FLUSH_BATCH_SIZE`` events are waiting, so busy tele-sales floors
+cost one insert batch rather than one transaction per click.  Up to
+``FLUSH_SECONDS`` of events can be lost if the process dies.
+"""
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from cdrive.catalog import CASE_STEPS
+from cdrive.store import DEFAULT_DB_PATH
+
+FLUSH_SECONDS = 2.0
+FLUSH_BATCH_SIZE = 500
+
+# Events held while the database cannot be written; the oldest are dropped beyond this
+MAX_BUFFERED_EVENTS = 100000
+
+# Open wizards idle for longer than this are forgotten, so their next step has no time
+IDLE_SECONDS = 24 * 3600
+
+# to_step recorded when a case is saved at the end of the wizard
+COMPLETED_STEP = len(CASE_STEPS) + 1
+
+EVENT_FIELDS = ['at', 'case_id', 'session_id', 'from_step', 'to_step', 'elapsed']
+
+
+def _timestamp(day: date, end: bool = False) -> float:
+    if end:
+        day = day + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class StepTelemetry:
+    """Buffered writer and reports for wizard step events.
+
+    Events live in the case database by default, on a connection of their
+    own.  Call :meth:`start_flusher` to write them in the background;
+    reports flush the buffer first so they include this process's latest
+    events.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = FLUSH_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._buffer: List[tuple] = []
+        # (session, case) -> when the current step was entered
+        self._entered: Dict[tuple, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._flusher = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._db_lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS step_events (
+                    at REAL NOT NULL,
+                    case_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    from_step INTEGER,
+                    to_step INTEGER NOT NULL,
+                    elapsed REAL
+                )
+            """)
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_step_events_at ON step_events (at)')
+
+    def close(self):
+        self.stop_flusher()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    # Writes
+
+    def record(self, case_id: str, session_id: str, from_step: Optional[int], to_step: int,
+               at: Optional[float] = None):
+        """Buffer a move from ``from_step`` (None when the wizard starts) to ``to_step``."""
+        at = time.time() if at is None else at
+        key = (session_id, case_id)
+        with self._lock:
+            entered = self._entered.pop(key, None)
+            elapsed = at - entered if entered is not None and from_step is not None else None
+            if to_step != COMPLETED_STEP:
+                self._entered[key] = at
+            self._buffer.append((at, case_id, session_id, from_step, to_step, elapsed))
+            if len(self._buffer) > MAX_BUFFERED_EVENTS:
+                del self._buffer[:len(self._buffer) - MAX_BUFFERED_EVENTS]
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every buffered event in one transaction. Returns how many were written."""
+        with self._lock:
+            events, self._buffer = self._buffer, []
+            idle = time.time() - IDLE_SECONDS
+            for key in [key for key, entered in self._entered.items() if entered < idle]:
+                del self._entered[key]
+        if not events:
+            return 0
+        try:
+            with self._db_lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO step_events ({', '.join(EVENT_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                    events
+                )
+        except sqlite3.Error:
+            # Keep the events for the next round, ahead of any recorded since
+            with self._lock:
+                self._buffer[:0] = events
+            raise
+        return len(events)
+
+    def start_flusher(self, interval: float = FLUSH_SECONDS):
+        """Run :meth:`flush` every ``interval`` seconds, or when a batch fills, on a daemon thread."""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self._wake.wait(interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except sqlite3.Error:
+                    pass  # Database busy or closing; try again next round
+
+        self._flusher = threading.Thread(target=run, name='step-telemetry', daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self):
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+
+    # Reports
+
+    def _events(self, columns: str, start: Optional[date], end: Optional[date], where: str = '',
+                group_by: str = '') -> List[tuple]:
+        self.flush()
+        clauses, params = [where] if where else [], []
+        if start:
+            clauses.append('at >= ?')
+            params.append(_timestamp(start))
+        if end:
+            clauses.append('at < ?')
+            params.append(_timestamp(end, end=True))
+        sql = f"SELECT {columns} FROM step_events"
+        if clauses:
+            sql += f" WHERE {' AND '.join(clauses)}"
+        if group_by:
+            sql += f" GROUP BY {group_by}"
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def funnel(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[int, int]:
+        """Cases active in ``[start, end]`` that reached each step, and ``COMPLETED_STEP``."""
+        furthest = {step: 0 for step in range(1, COMPLETED_STEP + 1)}
+        for (step,) in self._events('max(to_step)', start, end, group_by='case_id'):
+            if step in furthest:
+                furthest[step] += 1
+        reached = {}
+        running = 0
+        for step in reversed(furthest):
+            running += furthest[step]
+            reached[step] = running
+        return dict(sorted(reached.items()))
+
+    def step_latency(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[int, Dict]:
+        """Time spent on each step before leaving it, in seconds.
+
+        For every step: ``exits`` (moves off the step with a known time),
+        ``back`` (how many of those went to an earlier step), and the
+        ``median`` and ``p90`` time on the step.
+        """
+        times: Dict[int, List[float]] = {}
+        back: Dict[int, int] = {}
+        for from_step, to_step, elapsed in self._events(
+                'from_step, to_step, elapsed', start, end, 'from_step IS NOT NULL AND elapsed IS NOT NULL'):
+            times.setdefault(from_step, []).append(elapsed)
+            if to_step < from_step:
+                back[from_step] = back.get(from_step, 0) + 1
+        return {
+            step: {
+                'exits': len(values),
+                'back': back.get(step, 0),
+                'median': statistics.median(values),
+                'p90': _percentile(values, 0.9),
+            }
+            for step, values in sorted(times.items())
+        }
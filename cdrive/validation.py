@@ -0,0 +1,186 @@
+"""Case data rules shared by the case wizard and bulk imports."""
+import math
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from cdrive.catalog import (
+    ADDON_FIELDS, COVERAGE_TYPES, DEDUCTIBLE_AMOUNTS, DRIVER_AGES, FUEL_TYPES, MAX_VEHICLE_VALUE, MIN_VEHICLE_VALUE,
+    NCB_SLABS, POLICY_DURATIONS, VEHICLE_TYPES, VEHICLE_YEAR_SPAN
+)
+from cdrive.pricing import idv_range, suggested_idv
+from cdrive.vehicles import vehicle_master
+
+# Fields marked * in wizard steps 1 and 2
+CUSTOMER_REQUIRED_FIELDS = ['customer_name', 'customer_phone', 'customer_email']
+VEHICLE_REQUIRED_FIELDS = [
+    'vehicle_make', 'vehicle_model', 'vehicle_year', 'registration_number', 'vehicle_value'
+]
+REQUIRED_FIELDS = CUSTOMER_REQUIRED_FIELDS + VEHICLE_REQUIRED_FIELDS
+
+# Optional lead fields and the values the wizard preselects for them
+OPTIONAL_FIELDS = {
+    'vehicle_variant': '',
+    'vehicle_type': 'Hatchback',
+    'fuel_type': 'Petrol',
+    'engine_capacity': '',
+    'rto_location': '',
+    'coverage_type': 'Comprehensive',
+    'ncb_percentage': 0,
+    'previous_insurer': '',
+    'assigned_to': 'Unassigned',
+    'customer_occupation': '',
+    'customer_address': '',
+}
+
+# Fields a quote request must carry, and the step 3 choices it may set
+QUOTE_REQUIRED_FIELDS = ['vehicle_make', 'vehicle_model', 'vehicle_year', 'vehicle_value']
+QUOTE_OPTIONAL_FIELDS = {
+    'vehicle_type': 'Hatchback',
+    'fuel_type': 'Petrol',
+    'engine_capacity': '',
+    'coverage_type': 'Comprehensive',
+    'ncb_percentage': 0,
+    'driver_age': '26-35 years',
+    'deductible': 0,
+    'policy_duration': '1 Year',
+}
+
+INTEGER_FIELDS = ['vehicle_year', 'ncb_percentage', 'deductible']
+NUMBER_FIELDS = ['vehicle_value']
+
+
+def missing_fields(data: Dict, fields: List[str]) -> List[str]:
+    """Return the fields in ``fields`` that are empty in ``data``."""
+    return [field for field in fields if not data.get(field)]
+
+
+def is_blank(value) -> bool:
+    """True for an empty cell: CSV cells arrive as '' and Parquet nulls as None or NaN."""
+    return value is None or value == '' or value != value
+
+
+def _clean(value):
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _validate_fields(row: Dict, required: List[str], optional: Dict) -> Tuple[Dict, List[str]]:
+    data = {}
+    errors = []
+
+    for field in required:
+        value = _clean(row.get(field))
+        if is_blank(value):
+            errors.append(f"{field} is required")
+        else:
+            data[field] = value
+    for field, default in optional.items():
+        value = _clean(row.get(field))
+        data[field] = default if is_blank(value) else value
+
+    # JSON bodies can carry lists and objects where a name is expected
+    for field in list(data):
+        if field not in INTEGER_FIELDS + NUMBER_FIELDS and not isinstance(data[field], (str, int, float)):
+            errors.append(f"{field} must be text")
+            if field in optional:
+                data[field] = optional[field]
+            else:
+                data.pop(field)
+
+    for field in INTEGER_FIELDS + NUMBER_FIELDS:
+        if field not in data:
+            continue
+        try:
+            number = float(data[field])
+        except (TypeError, ValueError, OverflowError):
+            number = math.nan
+        # 'nan', 'inf' and '1e400' parse as floats but are not amounts
+        if not math.isfinite(number):
+            errors.append(f"{field} must be a number")
+            data.pop(field)
+            continue
+        if field in INTEGER_FIELDS:
+            if not number.is_integer():
+                errors.append(f"{field} must be a whole number")
+                data.pop(field)
+                continue
+            number = int(number)
+        data[field] = number
+
+    make = data.get('vehicle_make')
+    if make is not None:
+        master = vehicle_master()
+        if not master.has_make(make):
+            errors.append(f"Unknown vehicle make '{make}'")
+        elif data.get('vehicle_model') is not None and not master.has_model(make, data['vehicle_model']):
+            errors.append(f"Unknown {make} model '{data['vehicle_model']}'")
+
+    if data['vehicle_type'] not in VEHICLE_TYPES:
+        errors.append(f"Unknown vehicle type '{data['vehicle_type']}'")
+    if data['fuel_type'] not in FUEL_TYPES:
+        errors.append(f"Unknown fuel type '{data['fuel_type']}'")
+    if data['coverage_type'] not in COVERAGE_TYPES:
+        errors.append(f"Unknown coverage type '{data['coverage_type']}'")
+    if 'ncb_percentage' in data and data['ncb_percentage'] not in NCB_SLABS:
+        errors.append(f"NCB must be one of {', '.join(str(slab) for slab in NCB_SLABS)}")
+
+    if 'vehicle_year' in data:
+        current_year = datetime.now().year
+        if not current_year - VEHICLE_YEAR_SPAN < data['vehicle_year'] <= current_year:
+            errors.append(f"vehicle_year must be between {current_year - VEHICLE_YEAR_SPAN + 1} and {current_year}")
+    if 'vehicle_value' in data and not MIN_VEHICLE_VALUE <= data['vehicle_value'] <= MAX_VEHICLE_VALUE:
+        errors.append(f"vehicle_value must be between ₹{MIN_VEHICLE_VALUE:,} and ₹{MAX_VEHICLE_VALUE:,}")
+    return data, errors
+
+
+def validate_lead(row: Dict) -> Tuple[Dict, List[str]]:
+    """Validate an imported lead row against the wizard's rules.
+
+    Returns the normalized case fields and a list of error messages; the
+    row is valid when the list is empty.
+    """
+    data, errors = _validate_fields(row, REQUIRED_FIELDS, OPTIONAL_FIELDS)
+    if 'registration_number' in data:
+        data['registration_number'] = str(data['registration_number']).upper()
+    for field in ('customer_phone', 'customer_name', 'customer_email'):
+        if field in data:
+            data[field] = str(data[field])
+    data['has_previous_insurance'] = bool(data['previous_insurer']) or data.get('ncb_percentage', 0) > 0
+    return data, errors
+
+
+def validate_quote(row: Dict) -> Tuple[Dict, List[str]]:
+    """Validate the rating factors of a quote request against steps 2 and 3.
+
+    Returns fields ready for :meth:`cdrive.pricing.PremiumEngine.quotes`,
+    with the IDV defaulting to the suggested one, and a list of errors.
+    """
+    data, errors = _validate_fields(row, QUOTE_REQUIRED_FIELDS, QUOTE_OPTIONAL_FIELDS)
+    if data['driver_age'] not in DRIVER_AGES:
+        errors.append(f"Unknown driver age '{data['driver_age']}'")
+    if data['policy_duration'] not in POLICY_DURATIONS:
+        errors.append(f"policy_duration must be one of {', '.join(POLICY_DURATIONS)}")
+    if data['coverage_type'] == "Third Party":
+        data['deductible'] = 0
+    elif 'deductible' in data and data['deductible'] not in DEDUCTIBLE_AMOUNTS:
+        errors.append(f"deductible must be one of {', '.join(str(amount) for amount in DEDUCTIBLE_AMOUNTS)}")
+    for field in ADDON_FIELDS:
+        data[field] = data['coverage_type'] == "Comprehensive" and bool(row.get(field))
+
+    if errors:
+        return data, errors
+    offered = suggested_idv(data['vehicle_value'], data['vehicle_year'], datetime.now().year)
+    if is_blank(row.get('idv')):
+        data['idv'] = int(offered)
+    else:
+        try:
+            data['idv'] = float(row['idv'])
+        except (TypeError, ValueError, OverflowError):
+            return data, ["idv must be a number"]
+        if not math.isfinite(data['idv']):
+            return data, ["idv must be a number"]
+        low, high = idv_range(offered)
+        if not low <= data['idv'] <= high:
+            errors.append(f"idv must be between ₹{low:,} and ₹{high:,} for this vehicle")
+    return data, errors
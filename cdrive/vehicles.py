@@ -0,0 +1,127 @@
+"""Vehicle master: the makes, models and variants the wizard offers.
+
+The catalog lives in ``data/vehicle_master.json`` as make -> model ->
+variant -> spec, under a ``version`` that is bumped whenever prices or
+variants are revised.  It is read once per process, on first use, into
+nested dicts so every lookup is a dictionary hit; all sessions and bulk
+imports share that one copy.  Set ``CDRIVE_VEHICLE_MASTER`` to load a
+different file.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+VEHICLE_MASTER_PATH = os.environ.get(
+    'CDRIVE_VEHICLE_MASTER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'vehicle_master.json')
+)
+
+
+@dataclass(frozen=True)
+class VehicleSpec:
+    """Catalog details of one variant.
+
+    ``engine_capacity`` is the displacement (``'1197cc'``) or, for
+    electric vehicles, the motor power (``'110kW'``).
+    """
+    make: str
+    model: str
+    variant: str
+    body_type: str
+    fuel_type: str
+    engine_capacity: str
+    ex_showroom_price: int
+
+    def case_fields(self) -> Dict:
+        """Step 2 fields filled in from the spec."""
+        return {
+            'vehicle_type': self.body_type,
+            'fuel_type': self.fuel_type,
+            'engine_capacity': self.engine_capacity,
+            'vehicle_value': self.ex_showroom_price,
+        }
+
+
+class VehicleMaster:
+    """In-memory index over one version of the vehicle master file."""
+
+    def __init__(self, document: Dict):
+        self.version = str(document['version'])
+        self.effective_date = document.get('effective_date')
+        # make -> model -> variant -> spec, in file order
+        self._specs: Dict[str, Dict[str, Dict[str, VehicleSpec]]] = {}
+        # Option lists and their positions, built once for the selectboxes
+        self._makes: List[str] = []
+        self._models: Dict[str, List[str]] = {}
+        self._variants: Dict[tuple, List[str]] = {}
+        self._positions: Dict[tuple, int] = {}
+        # (make, model) -> step 2 fields shared by all of the model's variants
+        self._model_fields: Dict[tuple, Dict] = {}
+        for make, models in document['makes'].items():
+            self._positions[(make,)] = len(self._makes)
+            self._makes.append(make)
+            self._specs[make] = {}
+            self._models[make] = list(models)
+            for position, (model, variants) in enumerate(models.items()):
+                self._positions[(make, model)] = position
+                self._specs[make][model] = {
+                    variant: VehicleSpec(make, model, variant, spec['body_type'], spec['fuel_type'],
+                                         spec['engine_capacity'], int(spec['ex_showroom_price']))
+                    for variant, spec in variants.items()
+                }
+                self._variants[(make, model)] = list(variants)
+                specs = [spec.case_fields() for spec in self._specs[make][model].values()]
+                self._model_fields[(make, model)] = {
+                    field: value for field, value in specs[0].items()
+                    if all(spec[field] == value for spec in specs[1:])
+                } if specs else {}
+                for variant_position, variant in enumerate(variants):
+                    self._positions[(make, model, variant)] = variant_position
+
+    @classmethod
+    def load(cls, path: str = VEHICLE_MASTER_PATH) -> 'VehicleMaster':
+        with open(path, encoding='utf-8') as master_file:
+            return cls(json.load(master_file))
+
+    def makes(self) -> List[str]:
+        return self._makes
+
+    def models(self, make: str) -> List[str]:
+        """Models of ``make``, or an empty list for an unknown make."""
+        return self._models.get(make, [])
+
+    def variants(self, make: str, model: str) -> List[str]:
+        return self._variants.get((make, model), [])
+
+    def has_make(self, make: str) -> bool:
+        return make in self._specs
+
+    def has_model(self, make: str, model: str) -> bool:
+        return (make, model) in self._variants
+
+    def spec(self, make: str, model: str, variant: str) -> Optional[VehicleSpec]:
+        """The variant's spec, or None if it is not in the catalog."""
+        return self._specs.get(make, {}).get(model, {}).get(variant)
+
+    def model_fields(self, make: str, model: str) -> Dict:
+        """The :meth:`VehicleSpec.case_fields` every variant of a model agrees on."""
+        return self._model_fields.get((make, model), {})
+
+    def position(self, *names: str) -> Optional[int]:
+        """Index of a make, ``(make, model)`` or ``(make, model, variant)`` in its option list."""
+        return self._positions.get(names)
+
+
+_master: Optional[VehicleMaster] = None
+_master_lock = threading.Lock()
+
+
+def vehicle_master() -> VehicleMaster:
+    """The process-wide vehicle master, loaded on first call."""
+    global _master
+    if _master is None:
+        with _master_lock:
+            if _master is None:
+                _master = VehicleMaster.load()
+    return _master
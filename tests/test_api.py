@@ -0,0 +1,115 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from cdrive.api import MAX_SEARCH_LIMIT, CaseAPI
+from cdrive.issuance import ISSUED_STATUS
+from cdrive.store import SQLiteCaseStore
+
+LEAD = {
+    'customer_name': 'Api User',
+    'customer_phone': '+91-9000000001',
+    'customer_email': 'api@example.com',
+    'vehicle_make': 'Maruti Suzuki',
+    'vehicle_model': 'Swift',
+    'vehicle_year': datetime.now().year - 2,
+    'registration_number': 'mh01ab1234',
+    'vehicle_value': 700000,
+}
+
+
+def call(api, method, path, body=None):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode()}
+    asyncio.run(api(scope, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = CaseAPI(str(tmp_path / 'cases.db'), str(tmp_path / 'documents'), pool_size=4)
+    yield api
+    api.close()
+
+
+def test_issue_twice_conflicts(api):
+    status, case = call(api, 'POST', '/cases', LEAD)
+    assert status == 201
+    status, issued = call(api, 'POST', f"/cases/{case['id']}/issue")
+    assert status == 200 and issued['status'] == ISSUED_STATUS
+    status, payload = call(api, 'POST', f"/cases/{case['id']}/issue")
+    assert status == 409 and issued['policy_number'] in payload['error']
+
+
+def test_concurrent_issues_number_the_case_once(api):
+    _, case = call(api, 'POST', '/cases', LEAD)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: call(api, 'POST', f"/cases/{case['id']}/issue"), range(4)))
+    assert sorted(status for status, _ in results) == [200, 409, 409, 409]
+
+
+def test_unknown_case_is_not_found(api):
+    status, payload = call(api, 'POST', '/cases/nope/issue')
+    assert status == 404 and payload == {'error': "Case 'nope' not found"}
+
+
+def test_unexpected_errors_are_json(api, monkeypatch):
+    def broken(case_id):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(api, 'get_case', broken)
+    assert call(api, 'GET', '/cases/abc') == (500, {'error': "Internal server error"})
+
+
+def test_conditional_update_across_connections(tmp_path):
+    path = str(tmp_path / 'cases.db')
+    first, second = SQLiteCaseStore(path), SQLiteCaseStore(path)
+    first.add({'id': 'c1', 'status': 'Payment Completed', 'created_date': datetime.now()})
+    assert first.update('c1', {'status': ISSUED_STATUS, 'policy_number': 'P1'}, unless_status=ISSUED_STATUS)
+    assert second.update('c1', {'status': ISSUED_STATUS, 'policy_number': 'P2'}, unless_status=ISSUED_STATUS) is None
+    assert second.get('c1')['policy_number'] == 'P1'
+
+
+@pytest.mark.parametrize('limit', ['-1', '0', 'ten'])
+def test_search_limit_must_be_positive(api, limit):
+    status, payload = call(api, 'GET', f'/cases?q=api&limit={limit}')
+    assert status == 400 and 'limit' in payload['error']
+
+
+def test_search_limit_is_capped(api):
+    api.open()
+    with api.pool.store() as store:
+        store.add_many([{**LEAD, 'customer_phone': f'+91-90000{number:05d}'} for number in range(120)])
+    status, payload = call(api, 'GET', '/cases?q=api&limit=500')
+    assert status == 200 and len(payload['cases']) == MAX_SEARCH_LIMIT
+
+
+@pytest.mark.parametrize('path', ['/quotes', '/cases'])
+def test_non_text_make_is_a_field_error(api, path):
+    status, payload = call(api, 'POST', path, {**LEAD, 'vehicle_make': ['x']})
+    assert status == 422
+    assert payload['errors'] == ["vehicle_make must be text"]
+
+
+def test_lead_without_type_or_fuel_takes_them_from_the_master(api):
+    harrier = {**LEAD, 'vehicle_make': 'Tata', 'vehicle_model': 'Harrier', 'vehicle_value': 1800000}
+    status, case = call(api, 'POST', '/cases', harrier)
+    assert status == 201
+    assert (case['vehicle_type'], case['fuel_type'], case['engine_capacity']) == ('SUV', 'Diesel', '1956cc')
+    status, case = call(api, 'POST', '/cases', {**harrier, 'fuel_type': 'CNG'})
+    assert case['fuel_type'] == 'CNG'
+
+    _, implied = call(api, 'POST', '/quotes', harrier)
+    _, explicit = call(api, 'POST', '/quotes', {**harrier, 'vehicle_type': 'SUV', 'fuel_type': 'Diesel'})
+    assert implied == explicit
@@ -0,0 +1,102 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from cdrive.importer import import_cases
+from cdrive.store import SQLiteCaseStore
+
+YEAR = datetime.now().year - 2
+FIELDS = ['customer_name', 'customer_phone', 'customer_email', 'vehicle_make', 'vehicle_model',
+          'vehicle_variant', 'vehicle_year', 'registration_number', 'vehicle_value', 'fuel_type']
+
+
+def lead_file(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return io.BytesIO(output.getvalue().encode())
+
+
+def lead(number, **fields):
+    return {
+        'customer_name': f'Lead {number}',
+        'customer_phone': f'+91-90000000{number:02d}',
+        'customer_email': f'lead{number}@example.com',
+        'vehicle_make': 'Maruti Suzuki',
+        'vehicle_model': 'Swift',
+        'vehicle_variant': 'VXi',
+        'vehicle_year': YEAR,
+        'registration_number': f'MH12AB{number:04d}',
+        'vehicle_value': 700000,
+        'fuel_type': 'Petrol',
+        **fields,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteCaseStore(str(tmp_path / 'cases.db'))
+    yield store
+    store.close()
+
+
+def read_report(path):
+    with open(path, newline='', encoding='utf-8') as report:
+        return list(csv.DictReader(report))
+
+
+def test_rejected_rows_are_reported_as_written(store, tmp_path):
+    rows = [
+        lead(1),
+        lead(2, customer_name=''),
+        lead(3),
+        lead(4, vehicle_year='nan', vehicle_value='-5'),
+        lead(5, vehicle_make='Zorbax', vehicle_model='Q9', vehicle_variant=''),
+        lead(6, vehicle_make='maruti', vehicle_model='Quasar', vehicle_variant=''),
+    ]
+    report_path = str(tmp_path / 'rejected.csv')
+    result = import_cases(store, lead_file(rows), 'csv', report_path, chunk_size=2)
+
+    assert (result.total_rows, result.imported, result.rejected) == (6, 2, 4)
+    assert result.report_path == report_path
+    assert store.count() == 2
+    report = read_report(report_path)
+    assert [row['row_number'] for row in report] == ['2', '4', '5', '6']
+    assert report[0]['customer_email'] == 'lead2@example.com'
+    assert 'customer_name' in report[0]['errors']
+    assert len(report[1]['errors'].split('; ')) == 2
+    # The unresolved row keeps the dealer's spelling
+    assert report[2]['vehicle_make'] == 'Zorbax'
+    assert report[2]['errors'] == "Unknown vehicle make 'Zorbax'"
+    # A row rejected after its make resolved is still reported as the dealer wrote it
+    assert report[3]['vehicle_make'] == 'maruti'
+    assert report[3]['errors'] == "Unknown Maruti Suzuki model 'Quasar'"
+
+
+def test_clean_import_leaves_no_report(store, tmp_path):
+    report_path = tmp_path / 'rejected.csv'
+    result = import_cases(store, lead_file([lead(1), lead(2)]), 'csv', str(report_path))
+    assert result.rejected == 0 and result.report_path is None
+    assert not report_path.exists()
+
+
+def test_dealer_names_are_resolved_to_the_master(store, tmp_path):
+    rows = [lead(1, vehicle_make='MARUTI', vehicle_model='swift', vehicle_variant='vxi', fuel_type='')]
+    result = import_cases(store, lead_file(rows), 'csv', str(tmp_path / 'rejected.csv'))
+    assert (result.imported, result.resolved) == (1, 1)
+    case = store.find()[0]
+    assert (case['vehicle_make'], case['vehicle_model'], case['vehicle_variant']) == ('Maruti Suzuki', 'Swift', 'VXi')
+    # Blank spec columns are filled in; the dealer's value is kept
+    assert case['fuel_type'] == 'Petrol'
+    assert case['vehicle_value'] == 700000
+
+
+def test_model_fields_fill_blank_columns_without_a_variant(store, tmp_path):
+    rows = [lead(1, vehicle_make='Tata', vehicle_model='Harrier', vehicle_variant='', fuel_type='',
+                 vehicle_value=1800000)]
+    import_cases(store, lead_file(rows), 'csv', str(tmp_path / 'rejected.csv'))
+    case = store.find()[0]
+    assert (case['vehicle_type'], case['fuel_type']) == ('SUV', 'Diesel')
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from cdrive.documents import DocumentStore
+from cdrive.issuance import ISSUED_STATUS, AlreadyIssuedError, UnpricedCaseError, issue_batch, issue_case
+from cdrive.pricing import PremiumEngine, suggested_idv
+from cdrive.sequences import SequenceAllocator
+from cdrive.store import SQLiteCaseStore
+
+YEAR = datetime.now().year
+
+
+def lead(number, **fields):
+    return {
+        'id': f'case-{number}',
+        'customer_name': f'Customer {number}',
+        'vehicle_make': 'Hyundai',
+        'vehicle_model': 'Creta',
+        'vehicle_type': 'SUV',
+        'fuel_type': 'Diesel',
+        'vehicle_year': YEAR - 2,
+        'vehicle_value': 1200000,
+        'coverage_type': 'Comprehensive',
+        'status': 'New Lead',
+        'premium_amount': 0,
+        'created_date': datetime(YEAR, 1, 5),
+        **fields,
+    }
+
+
+@pytest.fixture
+def parts(tmp_path):
+    path = str(tmp_path / 'cases.db')
+    store = SQLiteCaseStore(path)
+    documents = DocumentStore(str(tmp_path / 'documents'), path)
+    sequences = SequenceAllocator(path)
+    yield store, documents, sequences
+    sequences.close()
+    documents.close()
+    store.close()
+
+
+def test_lead_is_priced_on_its_suggested_idv(parts):
+    store, documents, sequences = parts
+    store.add(lead(1))
+    issued = issue_case(store, documents, sequences, 'case-1')
+    engine = PremiumEngine()
+    idv = int(suggested_idv(1200000, YEAR - 2, YEAR))
+    assert issued['idv'] == idv
+    assert (issued['plan_id'], issued['plan_version']) == ('basic_comprehensive', 1)
+    assert issued['premium_amount'] == pytest.approx(engine.base_premium({**lead(1), 'idv': idv}), abs=0.01)
+    assert store.get('case-1')['idv'] == idv
+
+
+def test_chosen_plan_and_premium_are_kept(parts):
+    store, documents, sequences = parts
+    store.add(lead(1, idv=900000, plan_id='premium_comprehensive', plan_version=1, premium_amount=31000))
+    issued = issue_case(store, documents, sequences, 'case-1')
+    assert (issued['idv'], issued['plan_id'], issued['premium_amount']) == (900000, 'premium_comprehensive', 31000)
+
+
+def test_case_without_a_vehicle_value_is_refused(parts):
+    store, documents, sequences = parts
+    store.add(lead(1, vehicle_value=None))
+    with pytest.raises(UnpricedCaseError):
+        issue_case(store, documents, sequences, 'case-1')
+    assert store.get('case-1')['status'] == 'New Lead'
+    assert 'policy_number' not in store.get('case-1')
+
+
+def test_batch_leaves_issued_cases_alone(parts):
+    store, documents, sequences = parts
+    store.add_many([lead(1), lead(2), lead(3, vehicle_value=None)])
+    first = issue_case(store, documents, sequences, 'case-1')
+    report = issue_batch(store, documents, sequences, ['case-1', 'case-2', 'case-3'], workers=1)
+    assert (report.issued, report.already_issued, report.unpriced) == (1, 1, 1)
+    assert store.get('case-1')['policy_number'] == first['policy_number']
+    assert store.get('case-2')['status'] == ISSUED_STATUS
+    assert store.get('case-2')['plan_id'] == 'basic_comprehensive'
+    with pytest.raises(AlreadyIssuedError):
+        issue_case(store, documents, sequences, 'case-2')
+
+
+def test_update_many_skips_cases_in_the_excluded_status(parts):
+    store = parts[0]
+    store.add_many([lead(1), lead(2, status=ISSUED_STATUS, policy_number='VEH-1')])
+    updated = store.update_many({'case-1': {'policy_number': 'VEH-2', 'status': ISSUED_STATUS},
+                                 'case-2': {'policy_number': 'VEH-3'}}, unless_status=ISSUED_STATUS)
+    assert [case['id'] for case in updated] == ['case-1']
+    assert store.get('case-2')['policy_number'] == 'VEH-1'
@@ -0,0 +1,126 @@
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from cdrive.followups import FollowUpScheduler
+from cdrive.leaderboard import ExecutiveStats
+from cdrive.store import SQLiteCaseStore
+
+CREATED = datetime(2025, 3, 10, 11, 0)
+
+
+def make_case(number, **fields):
+    return {
+        'id': f'case-{number}',
+        'customer_name': f'Customer {number}',
+        'status': 'New Lead',
+        'assigned_to': 'Priya',
+        'premium_amount': 0,
+        'created_date': CREATED,
+        **fields,
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cases.db')
+
+
+@pytest.fixture
+def store(path):
+    store = SQLiteCaseStore(path)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def scheduler(path, store):
+    scheduler = FollowUpScheduler(path)
+    yield scheduler
+    scheduler.close()
+
+
+@pytest.fixture
+def stats(path, store, scheduler):
+    stats = ExecutiveStats(path)
+    yield stats
+    stats.close()
+
+
+def test_existing_cases_are_counted_once_on_install(path, store, scheduler):
+    store.add_many([make_case(1), make_case(2)])
+    for _ in range(2):
+        stats = ExecutiveStats(path)
+        assert stats.executive('Priya')['cases'] == 2
+        stats.close()
+
+
+def test_update_moves_a_case_between_executives(store, stats):
+    store.add_many([make_case(1), make_case(2)])
+    assert stats.executive('Priya')['policies_issued'] == 0
+
+    store.update('case-1', {'status': 'Policy Issued', 'premium_amount': 15000,
+                            'policy_start_date': CREATED + timedelta(days=4)})
+    priya = stats.executive('Priya')
+    assert (priya['cases'], priya['policies_issued'], priya['premium_written']) == (2, 1, 15000)
+    assert priya['avg_days_to_issue'] == pytest.approx(4)
+
+    store.update('case-1', {'assigned_to': 'Rahul'})
+    assert stats.executive('Priya')['policies_issued'] == 0
+    assert stats.executive('Rahul')['premium_written'] == 15000
+
+
+def test_leaderboard_matches_a_recount_after_many_writes(store, stats):
+    executives = ['Priya', 'Rahul', 'Meera']
+    store.add_many([make_case(number, assigned_to=executives[number % 3]) for number in range(30)])
+    store.update_many({
+        f'case-{number}': {'status': 'Policy Issued', 'premium_amount': 1000 * number,
+                           'assigned_to': executives[number % 2]}
+        for number in range(0, 30, 4)
+    })
+    cases = store.find()
+    board = stats.leaderboard()
+    assert [entry['rank'] for entry in board] == [1, 2, 3]
+    for entry in board:
+        mine = [case for case in cases if case['assigned_to'] == entry['executive']]
+        issued = [case for case in mine if case['status'] == 'Policy Issued']
+        assert entry['cases'] == len(mine)
+        assert entry['policies_issued'] == len(issued)
+        assert entry['premium_written'] == sum(case['premium_amount'] for case in issued)
+
+
+def test_followup_counters_follow_task_updates(store, scheduler, stats):
+    today = date.today()
+    scheduler.schedule('case-1', 'Priya', {'customer': today + timedelta(days=1),
+                                           'renewal': today - timedelta(days=1)})
+    overdue, upcoming = scheduler.for_case('case-1')
+    assert (overdue['status'], upcoming['status']) == ('Overdue', 'Open')
+    assert stats.executive('Priya')['followup_on_time_rate'] == 0
+
+    scheduler.complete(upcoming['id'])
+    assert stats.executive('Priya')['followup_on_time_rate'] == pytest.approx(0.5)
+    scheduler.complete(overdue['id'])
+    assert stats.executive('Priya')['followup_on_time_rate'] == pytest.approx(0.5)
+
+
+def test_days_to_issue_are_not_clamped(store, stats):
+    # A policy dated before its case was created shows up instead of counting as same-day
+    store.add(make_case(1, status='Policy Issued', policy_start_date=CREATED - timedelta(days=2)))
+    assert stats.executive('Priya')['avg_days_to_issue'] == pytest.approx(-2)
+
+
+def test_older_counters_are_rebuilt_once(path, store, scheduler, stats):
+    store.add_many([make_case(1), make_case(2, status='Policy Issued', premium_amount=9000,
+                                              policy_start_date=CREATED + timedelta(days=3))])
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("UPDATE meta SET value = 1 WHERE key = 'executive_stats_version'")
+    for _ in range(2):
+        reopened = ExecutiveStats(path)
+        priya = reopened.executive('Priya')
+        assert (priya['cases'], priya['policies_issued'], priya['premium_written']) == (2, 1, 9000)
+        reopened.close()
+    store.update('case-1', {'status': 'Policy Issued', 'premium_amount': 1000,
+                            'policy_start_date': CREATED + timedelta(days=1)})
+    assert stats.executive('Priya')['avg_days_to_issue'] == pytest.approx(2)
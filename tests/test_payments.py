@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cdrive.payments import COMPLETED, FAILED, PENDING, PaymentDeclined, PaymentGateway, PaymentProcessor
+
+
+class RecordingGateway(PaymentGateway):
+    # Holds every charge until released and counts the calls per key
+
+    def __init__(self, decline=False):
+        self.decline = decline
+        self.release = threading.Event()
+        self.charges = []
+        self._lock = threading.Lock()
+
+    def charge(self, payment):
+        with self._lock:
+            self.charges.append(payment.idempotency_key)
+        self.release.wait(5)
+        if self.decline:
+            raise PaymentDeclined("Insufficient funds")
+        return f"REF-{payment.idempotency_key}"
+
+
+@pytest.fixture
+def gateway():
+    return RecordingGateway()
+
+
+@pytest.fixture
+def processor(gateway):
+    processor = PaymentProcessor(gateway, max_workers=4)
+    yield processor
+    gateway.release.set()
+    processor.shutdown()
+
+
+def test_resubmitting_a_key_returns_the_same_payment(processor, gateway):
+    first = processor.submit('key-1', 'case-1', 15000, 'UPI')
+    again = processor.submit('key-1', 'case-1', 99999, 'Cheque')
+    assert first.status == again.status == PENDING
+    assert (again.amount, again.method, again.submitted_at) == (15000, 'UPI', first.submitted_at)
+
+    gateway.release.set()
+    processor.shutdown()
+    done = processor.submit('key-1', 'case-1', 15000, 'UPI')
+    assert (done.status, done.reference) == (COMPLETED, 'REF-key-1')
+    assert gateway.charges == ['key-1']
+
+
+def test_concurrent_submits_charge_once(processor, gateway):
+    with ThreadPoolExecutor(8) as pool:
+        payments = list(pool.map(lambda _: processor.submit('key-1', 'case-1', 15000, 'UPI'), range(8)))
+    gateway.release.set()
+    processor.shutdown()
+    assert len({payment.submitted_at for payment in payments}) == 1
+    assert gateway.charges == ['key-1']
+    assert processor.status('key-1').status == COMPLETED
+
+
+def test_failed_payment_is_kept_under_its_key():
+    gateway = RecordingGateway(decline=True)
+    gateway.release.set()
+    processor = PaymentProcessor(gateway, max_workers=1)
+    processor.submit('key-1', 'case-1', 15000, 'UPI')
+    processor.shutdown()
+    failed = processor.submit('key-1', 'case-1', 15000, 'UPI')
+    assert (failed.status, failed.error) == (FAILED, "Insufficient funds")
+    assert gateway.charges == ['key-1']
@@ -0,0 +1,46 @@
+import math
+
+import pandas as pd
+import pytest
+
+from cdrive.plans import CURRENT_PLANS
+from cdrive.pricing import PremiumEngine
+
+CASES = [
+    {'coverage_type': 'Comprehensive', 'idv': 640000, 'vehicle_type': 'SUV', 'fuel_type': 'Diesel',
+     'driver_age': '25-35', 'ncb_percentage': 20, 'deductible': 5000},
+    {'coverage_type': 'Comprehensive', 'idv': 320000, 'vehicle_type': 'Hatchback', 'fuel_type': 'Petrol',
+     'driver_age': '18-25', 'ncb_percentage': 0, 'deductible': 0},
+    {'coverage_type': 'Comprehensive', 'idv': 2500000, 'vehicle_type': 'Luxury', 'fuel_type': 'Electric',
+     'ncb_percentage': 50, 'deductible': 50000},
+    {'coverage_type': 'Third Party', 'fuel_type': 'Petrol', 'engine_capacity': '998cc'},
+    {'coverage_type': 'Third Party', 'fuel_type': 'Diesel', 'engine_capacity': '1493cc'},
+    {'coverage_type': 'Third Party', 'fuel_type': 'Diesel', 'engine_capacity': '2184cc'},
+    {'coverage_type': 'Third Party', 'fuel_type': 'Electric', 'engine_capacity': '110kW'},
+    {'coverage_type': 'Third Party', 'fuel_type': 'CNG'},
+    # Only defaults
+    {},
+]
+
+
+@pytest.fixture
+def engine():
+    return PremiumEngine()
+
+
+def test_price_frame_matches_per_case_quotes(engine):
+    frame = engine.price_cases(CASES)
+    for case, (_, row) in zip(CASES, frame.iterrows()):
+        assert row['base_premium'] == pytest.approx(engine.base_premium(case))
+        quoted = {quote['plan_id']: quote['premium'] for quote in engine.quotes(case)}
+        for plan_id in CURRENT_PLANS:
+            if plan_id in quoted:
+                assert row[plan_id] == pytest.approx(quoted[plan_id])
+            else:
+                assert math.isnan(row[plan_id])
+
+
+def test_price_frame_treats_missing_values_as_defaults(engine):
+    frame = engine.price_frame(pd.DataFrame([{'coverage_type': None, 'idv': None, 'deductible': None}]))
+    assert frame['base_premium'].iloc[0] == pytest.approx(engine.base_premium({}))
+
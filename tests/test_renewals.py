@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from cdrive.pricing import PremiumEngine, depreciation_percent, suggested_idv
+from cdrive.renewals import RenewalBook, renewal_quotes
+from cdrive.store import SQLiteCaseStore
+
+EXPIRY = datetime(2026, 6, 30)
+
+
+def policy(number, **fields):
+    return {
+        'id': f'case-{number}',
+        'customer_name': f'Customer {number}',
+        'status': 'Policy Issued',
+        'vehicle_make': 'Maruti Suzuki',
+        'vehicle_model': 'Swift',
+        'vehicle_year': 2023,
+        'vehicle_value': 700000,
+        'vehicle_type': 'Hatchback',
+        'fuel_type': 'Petrol',
+        'coverage_type': 'Comprehensive',
+        'ncb_percentage': 25,
+        'plan_id': 'basic_comprehensive',
+        'plan_version': 1,
+        'created_date': datetime(2025, 6, 1),
+        'policy_expiry_date': EXPIRY,
+        **fields,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteCaseStore(str(tmp_path / 'cases.db'))
+    yield store
+    store.close()
+
+
+def quotes(store, cases):
+    store.add_many(cases)
+    book = RenewalBook(store)
+    frame = renewal_quotes(store, PremiumEngine(), book, [case['id'] for case in cases])
+    return frame.set_index('id')
+
+
+def test_claimed_policy_loses_its_ncb(store):
+    frame = quotes(store, [policy(1), policy(2, any_claim=True)])
+    assert frame.loc['case-1', 'renewal_ncb'] == 35
+    assert frame.loc['case-2', 'renewal_ncb'] == 0
+    assert frame.loc['case-2', 'renewal_premium'] > frame.loc['case-1', 'renewal_premium']
+
+
+def test_renewal_idv_uses_the_wizard_depreciation(store):
+    frame = quotes(store, [policy(1), policy(2, vehicle_year=2012)])
+    assert frame.loc['case-1', 'renewal_idv'] == round(suggested_idv(700000, 2023, 2026))
+    assert frame.loc['case-2', 'renewal_idv'] == round(suggested_idv(700000, 2012, 2026))
+
+
+def test_vehicle_newer_than_the_renewal_year_is_not_appreciated(store):
+    frame = quotes(store, [policy(1, vehicle_year=2028)])
+    assert frame.loc['case-1', 'renewal_idv'] == 700000
+    assert depreciation_percent(-3) == depreciation_percent(0) == 0
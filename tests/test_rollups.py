@@ -0,0 +1,84 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from cdrive.rollups import CaseRollups
+from cdrive.store import SQLiteCaseStore
+
+CREATED = datetime(2025, 3, 10, 11, 0)
+
+
+def make_case(number, **fields):
+    return {
+        'id': f'case-{number}',
+        'customer_name': f'Customer {number}',
+        'vehicle_make': 'Hyundai',
+        'fuel_type': 'Petrol',
+        'coverage_type': 'Comprehensive',
+        'status': 'New Lead',
+        'assigned_to': 'Priya',
+        'premium_amount': 0,
+        'created_date': CREATED,
+        'step': 1,
+        **fields,
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cases.db')
+
+
+@pytest.fixture
+def store(path):
+    store = SQLiteCaseStore(path)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def rollups(path, store):
+    rollups = CaseRollups(path)
+    yield rollups
+    rollups.close()
+
+
+def test_existing_cases_are_counted_once_on_install(path, store):
+    store.add_many([make_case(1), make_case(2, status='Quote Sent', premium_amount=12000)])
+    for _ in range(2):
+        rollups = CaseRollups(path)
+        assert rollups.breakdown('status') == {'Quote Sent': (1, 12000), 'New Lead': (1, 0)}
+        rollups.close()
+
+
+def test_update_moves_a_case_between_rollups(store, rollups):
+    store.add_many([make_case(1), make_case(2)])
+    assert rollups.daily_totals() == [('2025-03-10', 2, 0)]
+
+    store.update('case-1', {'status': 'Policy Issued', 'premium_amount': 15000, 'step': 9})
+    assert rollups.breakdown('status') == {'Policy Issued': (1, 15000), 'New Lead': (1, 0)}
+    assert rollups.daily_totals() == [('2025-03-10', 2, 15000)]
+    assert rollups.funnel()[9] == 1 and rollups.funnel()[1] == 2
+
+    store.update('case-1', {'assigned_to': 'Rahul'})
+    assert rollups.breakdown('assigned_to') == {'Rahul': (1, 15000), 'Priya': (1, 0)}
+
+
+def test_rollups_match_a_recount_after_many_writes(store, rollups):
+    executives = ['Priya', 'Rahul', 'Meera']
+    store.add_many([make_case(number, assigned_to=executives[number % 3],
+                              created_date=CREATED + timedelta(days=number % 4))
+                    for number in range(30)])
+    store.update_many({
+        f'case-{number}': {'status': 'Policy Issued', 'premium_amount': 1000 * number,
+                           'assigned_to': executives[number % 2]}
+        for number in range(0, 30, 4)
+    })
+    cases = store.find()
+    assert {value: count for value, (count, _) in rollups.breakdown('assigned_to').items()} == \
+        dict(Counter(case['assigned_to'] for case in cases))
+    assert {day: premium for day, _, premium in rollups.daily_totals()} == {
+        day.isoformat(): sum(case['premium_amount'] for case in cases if case['created_date'].date() == day)
+        for day in {case['created_date'].date() for case in cases}
+    }
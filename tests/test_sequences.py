@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cdrive.sequences import SequenceAllocator
+
+
+@pytest.fixture
+def allocators(tmp_path):
+    path = str(tmp_path / 'cases.db')
+    allocators = [SequenceAllocator(path, block_size=7), SequenceAllocator(path, block_size=7)]
+    yield allocators
+    for allocator in allocators:
+        allocator.close()
+
+
+def test_two_connections_never_hand_out_the_same_number(allocators):
+    def draw(allocator):
+        return [allocator.next('policy') for _ in range(500)]
+
+    with ThreadPoolExecutor(4) as pool:
+        drawn = [number for numbers in pool.map(draw, allocators * 2) for number in numbers]
+    assert len(drawn) == len(set(drawn)) == 2000
+    assert min(drawn) == 1
+
+
+def test_sequences_are_independent(allocators):
+    first, second = allocators
+    assert first.next('policy') == 1
+    assert first.next('receipt') == 1
+    # The second connection reserves the next block
+    assert second.next('policy') == 8
+    assert first.next('policy') == 2
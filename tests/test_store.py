@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cdrive.store import SQLiteCaseStore, page_cursor
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+def make_case(number, **fields):
+    return {
+        'id': f'case-{number:03d}',
+        'customer_name': f'Customer {number}',
+        'vehicle_make': 'Tata',
+        'status': 'New Lead',
+        'assigned_to': 'Priya',
+        'premium_amount': 1000 + number,
+        'created_date': START + timedelta(hours=number),
+        **fields,
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cases.db')
+
+
+@pytest.fixture
+def store(path):
+    store = SQLiteCaseStore(path)
+    yield store
+    store.close()
+
+
+def test_add_and_update_notify_listeners(store):
+    seen = []
+    store.subscribe(seen.extend)
+    case_id = store.add(make_case(1))
+    store.update(case_id, {'status': 'Quote Sent'})
+    assert [case['status'] for case in seen] == ['New Lead', 'Quote Sent']
+    assert store.get(case_id)['status'] == 'Quote Sent'
+    assert store.get(case_id)['created_date'] == START + timedelta(hours=1)
+
+
+def test_update_many_writes_one_version(store):
+    store.add_many([make_case(1), make_case(2)])
+    version = store.version()
+    updated = store.update_many({'case-001': {'status': 'Lost'}, 'case-002': {'status': 'Lost'}})
+    assert [case['status'] for case in updated] == ['Lost', 'Lost']
+    assert store.version() == version + 1
+    assert store.count(status='Lost') == 2
+
+
+def test_update_unknown_case_raises(store):
+    with pytest.raises(KeyError):
+        store.update('missing', {'status': 'Lost'})
+
+
+def test_refresh_passes_on_other_connections_writes(path, store):
+    other = SQLiteCaseStore(path)
+    try:
+        seen = []
+        store.subscribe(seen.extend)
+        store.add(make_case(1))
+        other.add(make_case(2))
+        other.update('case-001', {'status': 'Quote Sent'})
+        assert store.refresh() == 2
+        assert sorted((case['id'], case['status']) for case in seen[1:]) == [
+            ('case-001', 'Quote Sent'), ('case-002', 'New Lead')
+        ]
+        # Nothing new, and this store's own writes are never passed on twice
+        assert store.refresh() == 0
+        store.update('case-002', {'status': 'Lost'})
+        assert store.refresh() == 0
+        assert len(seen) == 4
+    finally:
+        other.close()
+
+
+def test_find_page_walks_every_case_once(store):
+    # Several cases share a creation time, so the id breaks the tie
+    store.add_many([make_case(number, created_date=START + timedelta(hours=number // 3))
+                    for number in range(20)])
+    seen, cursor = [], None
+    while True:
+        page = store.find_page(6, cursor)
+        if not page:
+            break
+        seen.extend(page)
+        cursor = page_cursor(page[-1])
+    assert len(seen) == 20
+    assert len({case['id'] for case in seen}) == 20
+    assert seen == sorted(seen, key=lambda case: (case['created_date'], case['id']), reverse=True)
+
+
+def test_find_page_applies_filters(store):
+    store.add_many([make_case(number, status='Lost' if number % 2 else 'New Lead') for number in range(10)])
+    first = store.find_page(3, status='Lost')
+    rest = store.find_page(10, page_cursor(first[-1]), status='Lost')
+    assert [case['id'] for case in first + rest] == ['case-009', 'case-007', 'case-005', 'case-003', 'case-001']
@@ -0,0 +1,116 @@
+from datetime import datetime
+
+import pytest
+
+from cdrive.validation import validate_lead, validate_quote
+
+LEAD = {
+    'customer_name': 'Asha Rao',
+    'customer_phone': '+91-9000000000',
+    'customer_email': 'asha@example.com',
+    'vehicle_make': 'Maruti Suzuki',
+    'vehicle_model': 'Swift',
+    'vehicle_year': str(datetime.now().year - 2),
+    'registration_number': 'mh12ab1234',
+    'vehicle_value': '800000',
+}
+
+
+def test_valid_lead_is_normalized():
+    data, errors = validate_lead(LEAD)
+    assert errors == []
+    assert data['vehicle_year'] == datetime.now().year - 2
+    assert data['vehicle_value'] == 800000.0
+    assert data['registration_number'] == 'MH12AB1234'
+    assert data['has_previous_insurance'] is False
+
+
+@pytest.mark.parametrize('field, value', [
+    ('vehicle_year', 'nan'),
+    ('vehicle_year', '1e400'),
+    ('vehicle_value', 'inf'),
+    ('vehicle_value', '-inf'),
+    ('ncb_percentage', 'inf'),
+    ('ncb_percentage', 'Infinity'),
+    ('vehicle_year', 10 ** 400),
+])
+def test_non_finite_numbers_are_rejected(field, value):
+    data, errors = validate_lead({**LEAD, field: value})
+    assert errors == [f"{field} must be a number"]
+    assert field not in data
+
+
+def test_parquet_nan_reads_as_blank():
+    _, errors = validate_lead({**LEAD, 'vehicle_year': float('nan')})
+    assert errors == ["vehicle_year is required"]
+
+
+def test_fractional_integer_field_is_rejected():
+    data, errors = validate_lead({**LEAD, 'vehicle_year': '2020.5'})
+    assert errors == ["vehicle_year must be a whole number"]
+    assert 'vehicle_year' not in data
+
+
+@pytest.mark.parametrize('row, message', [
+    ({'vehicle_make': 'Foo'}, "Unknown vehicle make 'Foo'"),
+    ({'vehicle_model': 'Corolla'}, "Unknown Maruti Suzuki model 'Corolla'"),
+    ({'fuel_type': 'Steam'}, "Unknown fuel type 'Steam'"),
+    ({'ncb_percentage': '15'}, "NCB must be one of 0, 20, 25, 35, 45, 50"),
+    ({'vehicle_value': '10'}, "vehicle_value must be between ₹50,000 and ₹50,000,000"),
+    ({'customer_email': ''}, "customer_email is required"),
+])
+def test_rule_violations(row, message):
+    _, errors = validate_lead({**LEAD, **row})
+    assert errors == [message]
+
+
+def test_year_outside_span():
+    _, errors = validate_lead({**LEAD, 'vehicle_year': str(datetime.now().year + 1)})
+    assert len(errors) == 1 and errors[0].startswith("vehicle_year must be between")
+
+
+QUOTE = {
+    'vehicle_make': 'Hyundai',
+    'vehicle_model': 'Creta',
+    'vehicle_year': datetime.now().year - 1,
+    'vehicle_value': 1500000,
+}
+
+
+def test_quote_defaults_idv_to_suggested():
+    data, errors = validate_quote(QUOTE)
+    assert errors == []
+    assert data['idv'] == int(1500000 * 0.95)
+
+
+@pytest.mark.parametrize('idv', ['nan', 'inf', '-inf', '1e400', 'abc'])
+def test_quote_rejects_non_finite_idv(idv):
+    _, errors = validate_quote({**QUOTE, 'idv': idv})
+    assert errors == ["idv must be a number"]
+
+
+def test_quote_rejects_idv_out_of_range():
+    _, errors = validate_quote({**QUOTE, 'idv': 10 ** 7})
+    assert len(errors) == 1 and errors[0].startswith("idv must be between")
+
+
+def test_quote_rejects_non_finite_deductible():
+    _, errors = validate_quote({**QUOTE, 'deductible': 'nan'})
+    assert errors == ["deductible must be a number"]
+
+
+@pytest.mark.parametrize('field, value', [
+    ('vehicle_make', ['Maruti Suzuki']),
+    ('vehicle_model', {'name': 'Swift'}),
+    ('fuel_type', ['Petrol']),
+    ('customer_name', {'first': 'Asha'}),
+])
+def test_non_text_names_are_rejected(field, value):
+    data, errors = validate_lead({**LEAD, field: value})
+    assert errors == [f"{field} must be text"]
+
+
+def test_non_text_quote_make_is_rejected():
+    data, errors = validate_quote({'vehicle_make': ['x'], 'vehicle_model': 'Swift',
+                                   'vehicle_year': datetime.now().year - 1, 'vehicle_value': 700000})
+    assert errors == ["vehicle_make must be text"]